@@ -12,11 +12,23 @@ class SurveillanceAgentBuilder:
         self.llm = f"ollama/{settings.LLM_MODEL}"
         
         # Import tools
-        from tools import get_recent_symptoms, detect_spike, write_alert_log
+        from tools import (
+            get_recent_symptoms,
+            detect_spike,
+            run_outbreak_detectors,
+            scan_space_time_clusters,
+            compute_symptom_correlation,
+            read_surveillance_snapshot,
+            write_alert_log,
+        )
         
         self.tools = [
             get_recent_symptoms,
             detect_spike,
+            run_outbreak_detectors,
+            scan_space_time_clusters,
+            compute_symptom_correlation,
+            read_surveillance_snapshot,
             write_alert_log
         ]
     
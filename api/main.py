@@ -1,14 +1,34 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from config import settings
 from config.mongo import db
 from utils import log
 from api.telegram_webhook import telegram_router, telegram_app
-from api.scheduler import start_scheduler, shutdown_scheduler
-from database import RiskLevel
+from api.scheduler import start_scheduler, shutdown_scheduler, refresh_surveillance_snapshot
+from messaging import (
+    OutboxDispatcher,
+    close_telegram_client,
+    get_broadcast_engine,
+    start_outbox_dispatcher,
+    stop_outbox_dispatcher,
+)
+from utils.metrics import metrics_snapshot
+from database import RiskLevel, init_db
+from database.retention import ensure_retention_indexes
+from database.session_store import close_session_store
+from database.write_batcher import close_write_batcher
+from followups import FollowupScheduler, start_followup_scheduler, stop_followup_scheduler
+from reporting import ReportingPipeline, get_reporting_pipeline, stop_reporting_pipeline
+from surveillance.rollups import ensure_rollup_indexes
+from surveillance.scan import shutdown_scan_pool
+from surveillance.snapshot import get_snapshot_cache
+from surveillance.timeseries import ensure_timeseries_collection
 import uvicorn
+import asyncio
+import hmac
 import os
+from typing import Optional
 from builtins import Exception, str
 
 users_collection = db["users"]
@@ -23,6 +43,13 @@ async def lifespan(app: FastAPI):
     
     log.info("📊 MongoDB client ready")
     
+    # Indexes (incl. the unique telegram_id the user upsert relies on)
+    await asyncio.to_thread(init_db)
+    await asyncio.to_thread(ensure_rollup_indexes)
+    await asyncio.to_thread(ensure_retention_indexes)
+    if settings.HEALTH_TIMESERIES_ENABLED:
+        await asyncio.to_thread(ensure_timeseries_collection)
+    
     # Create necessary directories
     os.makedirs(settings.BASE_DIR / "logs", exist_ok=True)
     os.makedirs(settings.DATA_DIR, exist_ok=True)
@@ -50,6 +77,32 @@ async def lifespan(app: FastAPI):
     start_scheduler()
     log.info("✅ Scheduler started")
     
+    # Outbox workers deliver messages queued by the agents
+    try:
+        start_outbox_dispatcher()
+    except Exception as outbox_error:
+        log.error(f"❌ Could not start outbox dispatcher: {outbox_error}")
+    
+    # Follow-ups are claimed in batches on this event loop
+    try:
+        await start_followup_scheduler()
+    except Exception as followup_error:
+        log.error(f"❌ Could not start follow-up scheduler: {followup_error}")
+    
+    # Deliver authority submissions queued before a restart
+    try:
+        get_reporting_pipeline()
+    except Exception as reporting_error:
+        log.error(f"❌ Could not start authority reporting: {reporting_error}")
+    
+    # Pick up broadcasts interrupted by a restart
+    try:
+        resumed = get_broadcast_engine().resume_unfinished()
+        if resumed:
+            log.info(f"📣 Resumed {len(resumed)} unfinished broadcasts")
+    except Exception as broadcast_error:
+        log.error(f"❌ Could not resume broadcasts: {broadcast_error}")
+    
     log.info(f"✅ {settings.APP_NAME} is ready!")
     
     yield
@@ -57,6 +110,13 @@ async def lifespan(app: FastAPI):
     # Shutdown
     log.info(f"🛑 Shutting down {settings.APP_NAME}...")
     shutdown_scheduler()
+    shutdown_scan_pool()
+    await stop_followup_scheduler()
+    stop_outbox_dispatcher()
+    close_session_store()
+    stop_reporting_pipeline()
+    close_write_batcher()
+    await close_telegram_client()
     if telegram_initialized:
         await telegram_app.stop()
         await telegram_app.shutdown()
@@ -105,6 +165,10 @@ async def root():
             "webhook_setup": "/webhook/setup",
             "health": "/health",
             "stats": "/stats",
+            "surveillance": "/surveillance",
+            "metrics": "/metrics",
+            "reporting": "/reporting",
+            "followups": "/followups",
             "docs": "/docs"
         }
     }
@@ -133,11 +197,15 @@ async def get_stats():
                 {"risk_level": level.value}
             )
         
+        # Latest scheduled analysis, read from the snapshot cache
+        surveillance = await asyncio.to_thread(get_snapshot_cache().summary)
+        
         return {
             "total_users": total_users,
             "total_health_records": total_records,
             "total_alerts": total_alerts,
             "risk_distribution": risk_counts,
+            "surveillance": surveillance,
             "status": "operational",
             "agents": {
                 "coordinator": "active",
@@ -150,6 +218,56 @@ async def get_stats():
         log.error(f"Error fetching stats: {str(e)}")
         return {"status": "error", "message": str(e)}
 
+@app.get("/surveillance")
+async def get_surveillance():
+    """Latest surveillance snapshot with its version and freshness"""
+    cache = get_snapshot_cache()
+    snapshot = await asyncio.to_thread(cache.current)
+    return {"freshness": cache.freshness(snapshot), "snapshot": snapshot}
+
+def _require_admin(key: Optional[str]) -> None:
+    """Operator endpoints need X-Admin-Key to match ADMIN_API_KEY"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_API_KEY is not set)")
+    if not key or not hmac.compare_digest(key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+@app.post("/surveillance/refresh")
+async def refresh_surveillance(x_admin_key: Optional[str] = Header(default=None)):
+    """Recompute the surveillance snapshot now (or wait for the run in progress)"""
+    _require_admin(x_admin_key)
+    refreshed = await asyncio.to_thread(refresh_surveillance_snapshot)
+    freshness = await asyncio.to_thread(get_snapshot_cache().freshness)
+    return {"refreshed": refreshed, **freshness}
+
+@app.get("/broadcasts/{job_id}")
+async def get_broadcast(job_id: str):
+    """Progress of a broadcast job"""
+    progress = await asyncio.to_thread(get_broadcast_engine().progress, job_id)
+    if progress is None:
+        return {"status": "error", "message": f"Unknown broadcast job: {job_id}"}
+    return progress.model_dump()
+
+@app.get("/outbox")
+async def get_outbox():
+    """Outbox backlog, lag and delivery throughput"""
+    return await asyncio.to_thread(OutboxDispatcher.stats)
+
+@app.get("/reporting")
+async def get_reporting():
+    """Authority submission backlog and batch delivery metrics"""
+    return await asyncio.to_thread(ReportingPipeline.stats)
+
+@app.get("/followups")
+async def get_followups():
+    """Due follow-up backlog and claim/completion lag"""
+    return await asyncio.to_thread(FollowupScheduler.stats)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Per-call latency and error counters (Telegram delivery, etc.)"""
+    return metrics_snapshot()
+
 if __name__ == "__main__":
     uvicorn.run(
         "api.main:app",
@@ -1,28 +1,19 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime
-import asyncio
 from config import settings
-from config.mongo import db
 from utils import log
 from crew import get_health_crew
+from database.retention import run_archival
+from surveillance.analysis import run_surveillance_analysis
 import atexit
+import threading
 
-# Global scheduler instance
+# Global scheduler instance (follow-ups run on the API loop, see followups/)
 scheduler = None
-health_records_collection = db["health_records"]
 
+# One surveillance run at a time (scheduled job or explicit refresh)
+_surveillance_lock = threading.Lock()
 
-async def _find_followups_due(limit: int = 50):
-    now = datetime.utcnow()
-    cursor = health_records_collection.find(
-        {
-            "requires_followup": True,
-            "followup_completed": False,
-            "followup_date": {"$lte": now},
-        }
-    ).limit(limit)
-    return await cursor.to_list(length=limit)
 
 def run_scheduled_surveillance():
     """
@@ -31,67 +22,60 @@ def run_scheduled_surveillance():
     This function is called periodically to check for disease patterns.
     """
     log.info("⏰ Running scheduled surveillance analysis...")
-    
+    with _surveillance_lock:
+        _run_surveillance()
+
+
+def refresh_surveillance_snapshot() -> bool:
+    """
+    Run the code-only surveillance analysis now and publish a new snapshot.
+    Escalations are left to the scheduled run, so no LLM is involved. If a
+    run is already in progress, wait for it instead of starting another
+    one; returns True when this call ran the analysis.
+    """
+    if _surveillance_lock.acquire(blocking=False):
+        try:
+            log.info("🔄 Surveillance snapshot refresh requested")
+            run_surveillance_analysis(time_window_hours=settings.SPIKE_WINDOW_HOURS)
+        finally:
+            _surveillance_lock.release()
+        return True
+    with _surveillance_lock:
+        return False
+
+
+def _run_surveillance():
     try:
         health_crew = get_health_crew()
         
+        # Detection runs in code; the LLM only narrates escalations
         result = health_crew.run_surveillance_analysis(
             time_window_hours=settings.SPIKE_WINDOW_HOURS
         )
+        log.info(
+            f"📊 {result['total_reports']} reports in last {settings.SPIKE_WINDOW_HOURS}h, "
+            f"{result['anomalies']} anomalies (log {result['log_id']})"
+        )
         
         if result.get("escalation"):
             log.warning(f"🚨 Escalation detected in scheduled surveillance!")
         else:
-            log.info("✅ Scheduled surveillance complete - No anomalies")
+            log.info("✅ Scheduled surveillance complete - No escalation needed")
             
     except Exception as e:
         log.error(f"❌ Error in scheduled surveillance: {str(e)}")
 
-def run_scheduled_followups():
+def run_scheduled_archival():
     """
-    Check for users requiring follow-up and send messages.
+    Move health records and alerts past their hot window to the archive.
     """
-    log.info("⏰ Checking for scheduled follow-ups...")
+    log.info("⏰ Running scheduled archival...")
     
     try:
-        records = asyncio.run(_find_followups_due())
-        
-        if not records:
-            log.info("No follow-ups due at this time")
-            return
-        
-        log.info(f"Found {len(records)} follow-ups due")
-        
-        health_crew = get_health_crew()
-        
-        for record in records:
-            try:
-                telegram_id = record.get("telegram_id")
-                if not telegram_id:
-                    log.warning("Skipping follow-up without telegram_id")
-                    continue
-                
-                health_crew.execute_followup_check(
-                    user_id=telegram_id,
-                    telegram_id=telegram_id,
-                    previous_assessment={
-                        "symptoms": record.get("symptoms", []),
-                        "risk_level": record.get("risk_level", "moderate"),
-                        "severity_score": record.get("severity_score", 0),
-                        "reported_at": record.get("reported_at", datetime.utcnow()).isoformat(),
-                        "recommendations": record.get("recommendations", []),
-                    },
-                    followup_type="scheduled",
-                )
-                
-                log.info(f"✅ Follow-up sent to {telegram_id}")
-            
-            except Exception as e:
-                log.error(f"Error sending follow-up to user {record.get('telegram_id')}: {str(e)}")
-                continue
-                    
+        moved = run_archival()
+        log.info(f"✅ Archival complete: {moved}")
     except Exception as e:
-        log.error(f"❌ Error in scheduled follow-ups: {str(e)}")
+        log.error(f"❌ Error in scheduled archival: {str(e)}")
 
 def start_scheduler():
     """
@@ -114,12 +98,12 @@ def start_scheduler():
         replace_existing=True
     )
     
-    # Schedule follow-up checks every 15 minutes
+    # Archive cold records (daily by default)
     scheduler.add_job(
-        func=run_scheduled_followups,
-        trigger=IntervalTrigger(minutes=15),
-        id='followup_job',
-        name='Check scheduled follow-ups',
+        func=run_scheduled_archival,
+        trigger=IntervalTrigger(hours=settings.ARCHIVE_INTERVAL_HOURS),
+        id='archival_job',
+        name='Archive cold health records',
         replace_existing=True
     )
     
@@ -127,7 +111,7 @@ def start_scheduler():
     
     log.info(f"✅ Scheduler started:")
     log.info(f"   - Surveillance: Every {settings.SURVEILLANCE_INTERVAL_MINUTES} minutes")
-    log.info(f"   - Follow-ups: Every 15 minutes")
+    log.info(f"   - Archival: Every {settings.ARCHIVE_INTERVAL_HOURS} hours")
     
     # Shut down scheduler on exit
     atexit.register(lambda: shutdown_scheduler())
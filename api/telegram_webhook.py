@@ -18,8 +18,13 @@ from config.mongo import db
 from utils import log
 from crew import get_health_crew
 from database import User, Session, SessionState, RiskLevel
+from database.conversation_history import ASSISTANT, get_history_store
+from database.session_store import get_session_store
+from database.user_cache import PROFILE_FIELDS, get_user_cache
+from followups import get_followup_composer
 from datetime import datetime
-from pymongo import DESCENDING
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import json
 from api.image_analyzer import analyze_medical_image
 from api.voice_to_text import transcribe_audio
@@ -118,100 +123,83 @@ def _model_dump(model):
 
 
 async def fetch_user(telegram_id: str):
-    return await users_collection.find_one({"telegram_id": telegram_id})
+    return await get_user_cache().aget(telegram_id)
+
+
+def _mongo_now() -> datetime:
+    """utcnow truncated to BSON's millisecond precision so it compares equal after a round trip"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+async def upsert_user(telegram_id: str, profile: Optional[dict] = None) -> tuple:
+    """
+    Create-or-update a user in one atomic round trip. Fields in `profile`
+    are always set; model defaults are only written on insert. Returns
+    (document, created).
+    """
+    now = _mongo_now()
+    profile = dict(profile or {})
+    defaults = _model_dump(User(telegram_id=telegram_id, created_at=now, updated_at=now))
+    for field in ("_id", "telegram_id", "updated_at", *profile):
+        defaults.pop(field, None)
+    
+    update = {"$set": {**profile, "updated_at": now}, "$setOnInsert": defaults}
+    try:
+        doc = await users_collection.find_one_and_update(
+            {"telegram_id": telegram_id},
+            update,
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # Lost an insert race on the unique index: the document exists now
+        doc = await users_collection.find_one_and_update(
+            {"telegram_id": telegram_id},
+            update,
+            return_document=ReturnDocument.AFTER,
+        )
+    
+    if "preferred_language" not in doc:
+        # Users created before languages existed
+        doc["preferred_language"] = "en"
+        await users_collection.update_one(
+            {"telegram_id": telegram_id, "preferred_language": {"$exists": False}},
+            {"$set": {"preferred_language": "en"}},
+        )
+    
+    get_user_cache().put(doc)
+    return doc, doc.get("created_at") == now
 
 
 async def ensure_user_profile(tg_user):
     telegram_id = str(tg_user.id)
-    existing = await fetch_user(telegram_id)
-    now = datetime.utcnow()
-    update_fields = {
-        "username": tg_user.username,
-        "first_name": tg_user.first_name,
-        "last_name": tg_user.last_name,
-        "updated_at": now,
-    }
+    cache = get_user_cache()
+    existing = cache.peek(telegram_id)
     
-    if existing:
-        # backfill default language if missing
-        if "preferred_language" not in existing:
-            update_fields["preferred_language"] = "en"
-        if update_fields:
-            await users_collection.update_one(
-                {"telegram_id": telegram_id},
-                {"$set": update_fields},
-            )
-        return await fetch_user(telegram_id), False
+    # Cached profile already matches Telegram: no database round trip
+    if existing and "preferred_language" in existing and not cache.profile_changed(existing, tg_user):
+        return existing, False
     
-    user_model = User(
-        telegram_id=telegram_id,
-        username=tg_user.username,
-        first_name=tg_user.first_name,
-        last_name=tg_user.last_name,
+    return await upsert_user(
+        telegram_id,
+        {field: getattr(tg_user, field, None) for field in PROFILE_FIELDS},
     )
-    payload = _model_dump(user_model)
-    result = await users_collection.insert_one(payload)
-    payload["_id"] = result.inserted_id
-    return payload, True
 
 
 async def fetch_active_session(telegram_id: str):
-    return await sessions_collection.find_one(
-        {
-            "telegram_id": telegram_id,
-            "session_state": {"$ne": SessionState.COMPLETED.value},
-        },
-        sort=[("started_at", DESCENDING)],
-    )
+    return await get_session_store().aget_active(telegram_id)
 
 
 async def ensure_active_session(telegram_id: str) -> Session:
     """Ensure user has an active session"""
-    
-    # Get or create user (ASYNC)
-    user = await users_collection.find_one({"telegram_id": telegram_id})
-    
+    # Cached user, else get-or-create in one round trip
+    user = get_user_cache().peek(telegram_id)
     if not user:
-        # Create new user
-        user_data = {
-            "telegram_id": telegram_id,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
-        result = await users_collection.insert_one(user_data)
-        user = await users_collection.find_one({"_id": result.inserted_id})
-    
-    # Find active session (ASYNC)
-    session = await sessions_collection.find_one(
-        {
-            "user_id": user["_id"],
-            "session_state": {"$ne": "COMPLETED"}
-        },
-        sort=[("started_at", -1)]
-    )
-    
-    if not session:
-        # Create new session
-        session_data = {
-            "user_id": user["_id"],
-            "telegram_id": telegram_id,
-            "session_state": "initial",
-            "context": {},
-            "current_question": 0,
-            "symptoms_collected": [],
-            "started_at": datetime.utcnow(),
-            "last_activity": datetime.utcnow()
-        }
-        result = await sessions_collection.insert_one(session_data)
-        session = await sessions_collection.find_one({"_id": result.inserted_id})
+        user, _ = await upsert_user(telegram_id)
     
-    # Convert ObjectId to string for Pydantic
-    session_dict = dict(session)
-    session_dict["_id"] = str(session_dict["_id"])  # Convert ObjectId to string
-    session_dict["user_id"] = str(session_dict["user_id"])  # Convert user_id too
-    
-    # Convert to Pydantic model
-    return Session(**session_dict)
+    # Cached session is served without I/O; activity is written behind
+    return await get_session_store().aensure_active(telegram_id, user_id=user["_id"])
 
 
 # Command handlers
@@ -404,10 +392,8 @@ async def language_selection_handler(update: Update, context: ContextTypes.DEFAU
     
     telegram_id = str(query.from_user.id)
     
-    await users_collection.update_one(
-        {"telegram_id": telegram_id},
-        {"$set": {"preferred_language": language_code}},
-    )
+    # Write-through so tools and handlers see the new language immediately
+    await get_user_cache().aset_language(telegram_id, language_code)
     
     log.info("🌍 User %s selected language %s", telegram_id, language_code)
     
@@ -431,13 +417,13 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     profile, _ = await ensure_user_profile(user)
     preferred_language = profile.get("preferred_language", "en")
     message_text = update.message.text
+    original_text = message_text
     
     log.info(f"💬 Message from {telegram_id}: {message_text}")
     
     try:
         # Send typing indicator
         await update.message.chat.send_action("typing")
-        await ensure_user_profile(user)
         
         # Normalize user input
         if preferred_language != "en" and message_text:
@@ -460,9 +446,21 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "symptoms_collected": session.symptoms_collected or [],
         }
         
-        # Get conversation history
-        if 'history' not in context.user_data:
-            context.user_data['history'] = []
+        # Get conversation history (token-budgeted, shared across workers)
+        history = get_history_store()
+        
+        # A plain "I'm better" reply to a follow-up check-in is answered
+        # from a template; other replies go to the crew for re-evaluation
+        followup_reply = await get_followup_composer().ahandle_reply(
+            telegram_id, original_text, preferred_language
+        )
+        if followup_reply:
+            await history.aappend(telegram_id, message_text)
+            await history.aappend(telegram_id, followup_reply, role=ASSISTANT)
+            await update.message.reply_text(followup_reply)
+            return
+        
+        conversation_history = await history.arecent(telegram_id)
         
         # Get health crew and process message
         log.info(f"🚀 Invoking CrewAI agents for {telegram_id}")
@@ -473,14 +471,12 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             message=message_text,
             telegram_id=telegram_id,
             session_data=session_data,
-            conversation_history=context.user_data.get('history', []),
+            conversation_history=conversation_history,
             language=preferred_language
         )
         
         # Store in history
-        context.user_data['history'].append(f"User: {message_text}")
-        if len(context.user_data['history']) > 10:
-            context.user_data['history'] = context.user_data['history'][-10:]
+        await history.aappend(telegram_id, message_text)
         
         log.info(f"✅ CrewAI processing complete for {telegram_id}")
         
@@ -500,6 +496,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         elif result and result.get("status") == "success" and result.get("result"):
             reply_text = result.get("result")
+            await history.aappend(telegram_id, reply_text, role=ASSISTANT)
             
             # Translate outgoing response to user's language
             if preferred_language != "en" and reply_text:
@@ -653,8 +650,8 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "symptoms_collected": session.symptoms_collected
         }
         
-        if "history" not in context.user_data:
-            context.user_data["history"] = []
+        history = get_history_store()
+        conversation_history = await history.arecent(telegram_id)
         
         # Get health crew and process transcribed message
         health_crew = get_health_crew()
@@ -665,19 +662,18 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
             message=transcription,
             telegram_id=telegram_id,
             session_data=session_data,
-            conversation_history=context.user_data.get("history", []),
+            conversation_history=conversation_history,
             language=preferred_language,
         )
         
-        context.user_data["history"].append(f"User (voice): {transcription}")
-        if len(context.user_data["history"]) > 10:
-            context.user_data["history"] = context.user_data["history"][-10:]
+        await history.aappend(telegram_id, transcription, via="voice")
         
         log.info(f"✅ Voice health assessment complete for {telegram_id}")
         
         # Handle result
         if result and result.get("status") == "success" and result.get("result"):
             reply_text = result.get("result")
+            await history.aappend(telegram_id, reply_text, role=ASSISTANT)
             
             # Final translation
             if preferred_language != "en" and reply_text:
@@ -0,0 +1,130 @@
+# benchmarks/authority_reporting.py
+"""
+Throughput of the ReportingPipeline against the local stand-in server,
+for several batch sizes (batch size 1 is the old one-POST-per-alert
+pattern), optionally with injected latency/failures.
+
+Submissions are queued with ReportingPipeline.submit() into a scratch
+database on MONGODB_URL and drained with flush(), so the timings include
+the claim and lease updates, payload building, receipt writes and the
+retry path (_failed) exactly as in production. The delivery thread is
+not started; flush() is driven directly until everything is delivered.
+
+Starts reporting.stand_in on a free local port in a background thread:
+
+    python -m benchmarks.authority_reporting --submissions 5000 --latency-ms 20
+"""
+import argparse
+import os
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import uvicorn
+from pymongo import MongoClient
+
+import reporting.pipeline as pipeline_module
+import reporting.submission_log as submission_log_module
+from config import settings
+from reporting.pipeline import DELIVERED, FAILED, AuthoritySubmission, ReportingPipeline
+from reporting.submission_log import SubmissionLog
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_stand_in(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config("reporting.stand_in:app", host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def submissions(count: int):
+    for i in range(count):
+        yield AuthoritySubmission(
+            alert_type="outbreak",
+            severity="HIGH",
+            location="Pune",
+            case_count=i % 40,
+            symptoms=["fever", "cough"],
+            summary="Synthetic load-test submission",
+        )
+
+
+def drain(pipeline: ReportingPipeline, collection, total: int, timeout: float) -> None:
+    """Flush until every submission is delivered or failed for good"""
+    deadline = time.perf_counter() + timeout
+    while collection.count_documents({"status": {"$in": [DELIVERED, FAILED]}}) < total:
+        if time.perf_counter() > deadline:
+            raise RuntimeError("pipeline did not drain in time")
+        if not pipeline.flush():
+            # Only backed-off retries left
+            time.sleep(0.01)
+
+
+def main(args):
+    os.environ["STAND_IN_LATENCY_MS"] = str(args.latency_ms)
+    settings.REPORTING_BACKOFF_BASE_SECONDS = args.backoff_seconds
+    port = free_port()
+    server = start_stand_in(port)
+    base = f"http://127.0.0.1:{port}"
+
+    client = MongoClient(args.url)
+    db = client[f"{settings.MONGODB_DB_NAME}_bench_reporting"]
+    collection = db["authority_submissions"]
+    pipeline_module.authority_submissions_collection = collection
+    submission_log_module._log_instance = SubmissionLog(Path(tempfile.mkdtemp()) / "submissions.jsonl")
+
+    print(f"{args.submissions:,} submissions, {args.latency_ms}ms server latency, {args.failure_rate:.0%} failures\n")
+    print(f"{'batch size':<12}{'queue s':>10}{'deliver s':>11}{'per second':>12}{'retries':>9}{'failed':>8}")
+
+    with httpx.Client(timeout=30) as http:
+        for size in args.batch_sizes:
+            http.post(f"{base}/reset", params={"failure_rate": args.failure_rate})
+            collection.drop()
+            pipeline = ReportingPipeline(
+                endpoint=f"{base}/api/v1/reports/batch",
+                batch_size=size,
+                max_attempts=args.max_attempts,
+            )
+
+            start = time.perf_counter()
+            for submission in submissions(args.submissions):
+                pipeline.submit(submission)
+            queued = time.perf_counter() - start
+            drain(pipeline, collection, args.submissions, args.timeout)
+            elapsed = time.perf_counter() - start
+
+            retries = sum(d["attempts"] - 1 for d in collection.find({}, {"attempts": 1}))
+            failed = collection.count_documents({"status": FAILED})
+            stored = http.get(f"{base}/stats").json()["stored"]
+            assert stored == args.submissions - failed, f"batch {size}: stand-in stored {stored} of {args.submissions - failed}"
+            print(f"{size:<12}{queued:>10.2f}{elapsed - queued:>11.2f}{args.submissions / elapsed:>12,.0f}{retries:>9}{failed:>8}")
+            pipeline.stop()
+
+    if not args.keep:
+        client.drop_database(db.name)
+    client.close()
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=settings.MONGODB_URL)
+    parser.add_argument("--submissions", type=int, default=5000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--max-attempts", type=int, default=settings.REPORTING_MAX_ATTEMPTS)
+    parser.add_argument("--backoff-seconds", type=float, default=0.01, help="retry backoff base (production: 5s)")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    main(parser.parse_args())
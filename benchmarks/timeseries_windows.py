@@ -0,0 +1,129 @@
+# benchmarks/timeseries_windows.py
+"""
+Window-aggregation latency on the plain health_records layout versus the
+time-series layout from surveillance/timeseries.py.
+
+Generates synthetic records (default 10M over 180 days) into a scratch
+database on MONGODB_URL, loads them into a plain collection indexed like
+init_db() and into a time-series collection, then times the surveillance
+window queries on both. The scratch database is dropped afterwards
+unless --keep is given.
+
+    python -m benchmarks.timeseries_windows --records 10000000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+from config import settings
+from surveillance.series import load_daily_series, load_location_time_counts
+from surveillance.timeseries import ensure_timeseries_collection, event_from_record
+from utils.locations import GAZETTEER
+from utils.symptoms import SYMPTOM_VOCABULARY
+
+RISK_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+
+
+def synthetic_records(count: int, days: int, seed: int = 7):
+    """Records spread over `days`, skewed towards a few busy locations"""
+    rng = random.Random(seed)
+    places = [(entry[0], entry[1], entry[3]) for entry in GAZETTEER]
+    weights = [1 / (rank + 1) for rank in range(len(places))]
+    symptom_ids = [entry[0] for entry in SYMPTOM_VOCABULARY]
+    end = datetime.utcnow()
+    span = days * 86400
+    for _ in range(count):
+        location_id, name, district = rng.choices(places, weights)[0]
+        symptoms = rng.sample(symptom_ids, rng.randint(1, 4))
+        yield {
+            "_id": ObjectId(),
+            "telegram_id": str(rng.randint(1, 200_000)),
+            "location": name,
+            "location_raw": name,
+            "location_id": location_id,
+            "district": district,
+            "symptoms": [],
+            "symptom_ids": symptoms,
+            "risk_level": rng.choice(RISK_LEVELS),
+            "severity_score": round(rng.uniform(1, 10), 1),
+            "has_fever": 1 in symptoms,
+            "agent_assessment": "synthetic",
+            "recommendations": [],
+            "reported_at": end - timedelta(seconds=rng.randrange(span)),
+        }
+
+
+def load(db, count: int, days: int, batch_size: int) -> None:
+    plain = db["health_records"]
+    plain.create_index("reported_at")
+    plain.create_index([("symptom_ids", 1), ("reported_at", -1)])
+    plain.create_index([("location_id", 1), ("reported_at", -1)])
+    events = ensure_timeseries_collection(settings.HEALTH_TIMESERIES_COLLECTION, target=db)
+
+    started, batch = time.perf_counter(), []
+    for i, record in enumerate(synthetic_records(count, days), 1):
+        batch.append(record)
+        if len(batch) >= batch_size or i == count:
+            plain.insert_many(batch, ordered=False)
+            events.insert_many([event_from_record(r) for r in batch], ordered=False)
+            batch = []
+            if i % (batch_size * 20) == 0 or i == count:
+                print(f"  loaded {i:,} records ({i / (time.perf_counter() - started):,.0f}/s)")
+
+
+def timed(fn, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), max(latencies)
+
+
+def main(args):
+    client = MongoClient(args.url)
+    db = client[f"{settings.MONGODB_DB_NAME}_bench_timeseries"]
+    if not args.skip_load:
+        client.drop_database(db.name)
+        print(f"Loading {args.records:,} synthetic records over {args.days} days...")
+        load(db, args.records, args.days, args.batch_size)
+
+    sources = {"plain": db["health_records"], "timeseries": db[settings.HEALTH_TIMESERIES_COLLECTION]}
+    queries = {
+        "daily series 7d": lambda source: load_daily_series(7, source=source),
+        "daily series 28d": lambda source: load_daily_series(28, source=source),
+        "daily series 28d (1 location)": lambda source: load_daily_series(28, location="Pune", source=source),
+        "hourly counts 72h": lambda source: load_location_time_counts(72, period_hours=1, source=source),
+        "daily counts 56d (fever)": lambda source: load_location_time_counts(56, symptom="fever", source=source),
+    }
+    print(f"\n{'query':<32}{'layout':<12}{'median ms':>12}{'max ms':>12}")
+    for name, query in queries.items():
+        for layout, source in sources.items():
+            median, worst = timed(lambda: query(source), args.repeat)
+            print(f"{name:<32}{layout:<12}{median:>12.1f}{worst:>12.1f}")
+
+    for layout, source in sources.items():
+        stats = db.command("collStats", source.name)
+        print(f"{layout:<12} storage {stats.get('storageSize', 0) / 2**20:,.1f} MiB, "
+              f"indexes {stats.get('totalIndexSize', 0) / 2**20:,.1f} MiB")
+
+    if not args.keep:
+        client.drop_database(db.name)
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=settings.MONGODB_URL)
+    parser.add_argument("--records", type=int, default=10_000_000)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-load", action="store_true", help="reuse a database kept with --keep")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    main(parser.parse_args())
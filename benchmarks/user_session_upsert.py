@@ -0,0 +1,154 @@
+# benchmarks/user_session_upsert.py
+"""
+Compare the old multi-round-trip user/session bootstrap with the
+production handlers in api/telegram_webhook.py (ensure_user_profile and
+ensure_active_session, i.e. upsert_user and the SessionStore). Per message
+the old path makes 8 round trips for an existing user (two profile
+ensures of find + update + find, then user + session lookups); the new
+path makes at most 2 and none once the profile and session are cached.
+
+Runs against a scratch database on MONGODB_URL (dropped afterwards):
+
+    python -m benchmarks.user_session_upsert --users 500 --messages 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+
+import api.telegram_webhook as telegram_webhook
+import database
+import database.user_cache as user_cache
+from api.telegram_webhook import ensure_active_session, ensure_user_profile
+from config import settings
+from database.session_store import close_session_store
+
+
+class Profile:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.username = f"user{user_id}"
+        self.first_name = "Test"
+        self.last_name = None
+
+
+# ========== OLD PATH (find → update → find, find → insert → find) ==========
+
+async def old_ensure_user_profile(db, tg_user):
+    telegram_id = str(tg_user.id)
+    existing = await db.users.find_one({"telegram_id": telegram_id})
+    update_fields = {
+        "username": tg_user.username,
+        "first_name": tg_user.first_name,
+        "last_name": tg_user.last_name,
+        "updated_at": datetime.utcnow(),
+    }
+    if existing:
+        if "preferred_language" not in existing:
+            update_fields["preferred_language"] = "en"
+        await db.users.update_one({"telegram_id": telegram_id}, {"$set": update_fields})
+        return await db.users.find_one({"telegram_id": telegram_id})
+    payload = {"telegram_id": telegram_id, "preferred_language": "en", **update_fields, "created_at": datetime.utcnow()}
+    await db.users.insert_one(payload)
+    return payload
+
+
+async def old_ensure_active_session(db, telegram_id):
+    user = await db.users.find_one({"telegram_id": telegram_id})
+    if not user:
+        result = await db.users.insert_one({"telegram_id": telegram_id, "created_at": datetime.utcnow()})
+        user = await db.users.find_one({"_id": result.inserted_id})
+    session = await db.sessions.find_one(
+        {"user_id": user["_id"], "session_state": {"$ne": "COMPLETED"}},
+        sort=[("started_at", -1)],
+    )
+    if not session:
+        result = await db.sessions.insert_one({
+            "user_id": user["_id"],
+            "telegram_id": telegram_id,
+            "session_state": "initial",
+            "context": {},
+            "current_question": 0,
+            "symptoms_collected": [],
+            "started_at": datetime.utcnow(),
+            "last_activity": datetime.utcnow(),
+        })
+        session = await db.sessions.find_one({"_id": result.inserted_id})
+    return session
+
+
+async def old_path(db, tg_user):
+    # handle_message called ensure_user_profile twice before the session
+    await old_ensure_user_profile(db, tg_user)
+    await old_ensure_user_profile(db, tg_user)
+    return await old_ensure_active_session(db, str(tg_user.id))
+
+
+# ========== NEW PATH (production handlers) ==========
+
+async def new_path(db, tg_user):
+    # The real handlers, with their profile/session caches and write-behind
+    await ensure_user_profile(tg_user)
+    return await ensure_active_session(str(tg_user.id))
+
+
+def use_scratch_database(client: AsyncIOMotorClient, url: str, name: str) -> None:
+    """Point the collections the production handlers use at a scratch database"""
+    sync_db = MongoClient(url)[name]
+    telegram_webhook.users_collection = client[name]["users"]
+    user_cache.async_db = client[name]
+    database.users_collection = sync_db["users"]
+    database.sessions_collection = sync_db["sessions"]
+
+
+# ========== HARNESS ==========
+
+async def measure(name, path, db, users, messages):
+    latencies = []
+    for round_number in range(messages):
+        for user_id in range(users):
+            start = time.perf_counter()
+            await path(db, Profile(user_id))
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(
+        f"{name:>4}: {len(latencies)} messages | mean {statistics.mean(latencies):.2f}ms | "
+        f"p50 {latencies[len(latencies) // 2]:.2f}ms | p95 {latencies[int(len(latencies) * 0.95)]:.2f}ms | "
+        f"total {sum(latencies) / 1000:.2f}s"
+    )
+
+
+async def race(name, path, db, concurrency):
+    """Concurrent first messages from one brand-new user"""
+    await asyncio.gather(*[path(db, Profile(10_000_000)) for _ in range(concurrency)], return_exceptions=True)
+    users = await db.users.count_documents({"telegram_id": "10000000"})
+    print(f"{name:>4}: {concurrency} concurrent first messages → {users} user document(s)")
+
+
+async def main(args):
+    client = AsyncIOMotorClient(args.url)
+    for name, path in (("old", old_path), ("new", new_path)):
+        db = client[f"{settings.MONGODB_DB_NAME}_bench_{name}"]
+        await client.drop_database(db.name)
+        if name == "new":
+            await db.users.create_index("telegram_id", unique=True)
+            use_scratch_database(client, args.url, db.name)
+        await measure(name, path, db, args.users, args.messages)
+        await race(name, path, db, args.concurrency)
+        if name == "new":
+            close_session_store()
+        await client.drop_database(db.name)
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=settings.MONGODB_URL)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--messages", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
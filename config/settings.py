@@ -19,12 +19,67 @@ class Settings(BaseSettings):
     # Telegram Configuration
     TELEGRAM_BOT_TOKEN: str
     WEBHOOK_URL: str = ""
+    TELEGRAM_API_BASE: str = "https://api.telegram.org"
+    TELEGRAM_TIMEOUT_SECONDS: float = 10.0
+    TELEGRAM_MAX_RETRIES: int = 3
+    TELEGRAM_POOL_SIZE: int = 32
+    TELEGRAM_GLOBAL_RATE: float = 25.0  # messages/second, Telegram allows ~30
+    TELEGRAM_PER_CHAT_RATE: float = 1.0
+    ADMIN_API_KEY: str = ""  # X-Admin-Key for operator endpoints; empty disables them
+    BROADCAST_CONCURRENCY: int = 32
+    BROADCAST_TOOL_WAIT_SECONDS: int = 30
+    OUTBOX_WORKERS: int = 4
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 2.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 900.0
+    OUTBOX_LEASE_SECONDS: int = 60
     
     # Database Configuration
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "SwasthAI"
     DATABASE_NAME: str = "swasthai"
     
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 300
+    SESSION_CACHE_SIZE: int = 10000
+    SESSION_CACHE_TTL_SECONDS: int = 1800
+    SESSION_FLUSH_SECONDS: float = 5.0
+    HISTORY_MAX_TURNS: int = 20
+    HISTORY_TOKEN_BUDGET: int = 600
+    HISTORY_CACHE_SIZE: int = 2000
+    HISTORY_CACHE_TTL_SECONDS: int = 5  # short: other workers append to the same chats
+    HISTORY_RETENTION_DAYS: int = 30
+    WRITE_BATCH_MAX_DOCS: int = 500
+    WRITE_BATCH_MAX_DELAY_MS: int = 50
+    HEALTH_TIMESERIES_ENABLED: bool = False
+    HEALTH_TIMESERIES_COLLECTION: str = "health_events"
+    SESSION_RETENTION_DAYS: int = 30
+    BROADCAST_RETENTION_DAYS: int = 30
+    HEALTH_RECORD_HOT_DAYS: int = 180
+    ALERT_HOT_DAYS: int = 365
+    ARCHIVE_FORMAT: str = "jsonl.zst"
+    ARCHIVE_INTERVAL_HOURS: int = 24
+    
+    # Health authority reporting (no endpoint = acknowledged locally)
+    AUTHORITY_ENDPOINT: Optional[str] = None
+    REPORTING_BATCH_SIZE: int = 100
+    REPORTING_BATCH_INTERVAL_SECONDS: float = 5.0
+    REPORTING_MAX_ATTEMPTS: int = 8
+    REPORTING_BACKOFF_BASE_SECONDS: float = 5.0
+    REPORTING_TIMEOUT_SECONDS: float = 15.0
+    
+    # Alert deduplication
+    ALERT_SUPPRESSION_HOURS: float = 24.0
+    ALERT_CASE_ESCALATION_FACTOR: float = 2.0
+    
+    # Follow-ups (claimed in batches by the API process)
+    FOLLOWUP_POLL_SECONDS: float = 30.0
+    FOLLOWUP_BATCH_SIZE: int = 200
+    FOLLOWUP_CONCURRENCY: int = 8
+    FOLLOWUP_LEASE_SECONDS: int = 600
+    FOLLOWUP_MAX_ATTEMPTS: int = 5
+    FOLLOWUP_QUEUE_HORIZON_HOURS: float = 24.0
+    
     # Redis (optional)
     REDIS_URL: str = "redis://localhost:6379/0"
     
@@ -59,6 +114,19 @@ class Settings(BaseSettings):
     SURVEILLANCE_INTERVAL_MINUTES: int = 15
     ANOMALY_THRESHOLD: int = 5
     SPIKE_WINDOW_HOURS: int = 24
+    SURVEILLANCE_BUCKET_MINUTES: int = 15
+    SURVEILLANCE_INGEST_OVERLAP_SECONDS: int = 300  # re-read window for clock skew between writers
+    DETECTOR_BASELINE_DAYS: int = 56
+    DETECTOR_MIN_COUNT: int = 3
+    SCAN_STUDY_PERIODS: int = 28
+    SCAN_MAX_WINDOW: int = 7
+    SCAN_MAX_ZONE_SIZE: int = 5
+    SCAN_REPLICATIONS: int = 999
+    SCAN_WORKERS: int = 0  # 0 = one per CPU
+    SYNDROME_LIFT_THRESHOLD: float = 1.5  # observed / expected co-occurrence
+    SYNDROME_BASELINE_DAYS: int = 28  # history syndrome rates are compared against
+    SURVEILLANCE_SNAPSHOT_RELOAD_SECONDS: float = 30.0
+    LOCATION_NEIGHBOUR_RADIUS_KM: float = 25.0
     
     # Logging
     LOG_LEVEL: str = "INFO"
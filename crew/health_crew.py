@@ -6,8 +6,12 @@ from crewai import LLM
 from config.settings import settings
 from tools.database_tools import get_user_session, write_health_record, update_session
 from tools.telegram_tools import send_telegram_message
-from tools.anomaly_tools import detect_spike
+from tools.anomaly_tools import read_surveillance_snapshot
 from tools.gov_mock_tools import submit_to_mock_authority
+from database.conversation_history import get_history_store
+from surveillance.alerts import AUTHORITY, get_alert_index
+from surveillance.analysis import record_escalation, run_surveillance_analysis as analyze_surveillance
+from surveillance.snapshot import get_surveillance_snapshot
 from datetime import datetime
 import logging
 from utils import log
@@ -67,6 +71,24 @@ class HealthCrew:
             verbose=True,
             memory=False
         )
+
+        # Same pipeline without the alert task, used while there is nothing
+        # new for it to escalate
+        self.triage_crew = Crew(
+            agents=[
+                self.coordinator_agent,
+                self.triage_agent,
+                self.surveillance_agent
+            ],
+            tasks=[
+                self.intake_task,
+                self.triage_task,
+                self.surveillance_task
+            ],
+            process=Process.sequential,
+            verbose=True,
+            memory=False
+        )
         
         logger.info("✅ All agents initialized successfully")
 
@@ -104,7 +126,11 @@ class HealthCrew:
             role="Public Health Surveillance Analyst",
             goal="Detect disease patterns and emerging health threats",
             backstory="Epidemiologist specializing in disease surveillance",
-            tools=[get_user_session, detect_spike, submit_to_mock_authority],
+            tools=[
+                get_user_session,
+                read_surveillance_snapshot,
+                submit_to_mock_authority,
+            ],
             llm=self.llm,
             verbose=True,
             allow_delegation=False,
@@ -276,10 +302,11 @@ Current user: {telegram_id}
 Health record: From Triage Agent's output
 
 Your job:
-1. Analyze population health patterns (silent)
-2. Detect disease clustering
-3. Check for anomalies using detect_spike if needed
-4. Log findings internally
+1. Read the latest surveillance results with read_surveillance_snapshot
+   (location of the current report; anomalies, escalations and syndrome
+   clusters are already computed by the scheduled analysis)
+2. Note whether this report matches an active anomaly or syndrome cluster
+3. Log findings internally
 
 **DO NOT send any messages to users.**
 **DO NOT call send_telegram_message.**
@@ -321,6 +348,22 @@ Otherwise: Stay silent, do nothing.""",
         )
 
     # ========== MESSAGE PROCESSING METHOD ==========
+
+    def _alert_pending(self) -> bool:
+        """Whether a current escalation has not been submitted to the authority yet"""
+        try:
+            snapshot = get_surveillance_snapshot()
+            if not snapshot:
+                return False
+            alerts = get_alert_index()
+            return any(
+                alerts.peek(e["location"], [e["symptom"]], e["severity"], int(e["observed"]), channel=AUTHORITY).allowed
+                for e in snapshot["escalations"]
+            )
+        except Exception as e:
+            # Run the alert task rather than risk dropping an outbreak
+            logger.warning(f"⚠️ Could not check pending alerts: {e}")
+            return True
     
     # ✅ ADD 'async' keyword
     async def process_user_message(
@@ -339,14 +382,22 @@ Otherwise: Stay silent, do nothing.""",
             session_info = "No previous session"
             if session_data:
                 session_info = f"Session ID: {session_data.get('session_id', 'N/A')}, State: {session_data.get('state', 'initial')}"
+                followup = session_data.get('context') or {}
+                if session_data.get('state') == 'follow_up' and followup.get('followup_record_id'):
+                    # Reply to a follow-up check-in: compare against the previous assessment
+                    session_info += (
+                        f"\nFollow-up reply. Previous report: symptoms {followup.get('followup_symptoms', [])}, "
+                        f"risk {followup.get('followup_risk_level', 'unknown')}, check-in sent {followup.get('followup_sent_at')}"
+                    )
                 logger.info(f"📝 {session_info}")
             
-            # Format history
+            # Format history (already trimmed to the token budget by the store)
+            if conversation_history is None:
+                conversation_history = get_history_store().recent(str(telegram_id))
             history_text = "No previous conversation"
-            if conversation_history and len(conversation_history) > 0:
-                recent_history = conversation_history[-5:]
-                history_text = "\n".join(recent_history)
-                logger.info(f"💬 Including {len(recent_history)} previous messages")
+            if conversation_history:
+                history_text = "\n".join(conversation_history)
+                logger.info(f"💬 Including {len(conversation_history)} previous messages")
             
             # ✅ ADD THIS: Extract user name from session or use default
             user_name = "User"
@@ -367,8 +418,10 @@ Otherwise: Stay silent, do nothing.""",
                 'language': language
             }
             
-            # Kickoff crew
-            result = self.crew.kickoff(inputs=crew_inputs)
+            # Kickoff crew; the alert task only runs when the alert index
+            # shows an escalation that has not been submitted yet
+            crew = self.crew if self._alert_pending() else self.triage_crew
+            result = crew.kickoff(inputs=crew_inputs)
             
             logger.info(f"✅ Crew processing complete")
             
@@ -389,6 +442,101 @@ Otherwise: Stay silent, do nothing.""",
                 "error": str(e)
             }
 
+    # ========== SCHEDULED SURVEILLANCE METHOD ==========
+
+    def run_surveillance_analysis(self, time_window_hours: float = settings.SPIKE_WINDOW_HOURS):
+        """
+        Scheduled surveillance: aggregates and detectors run in code; the
+        Alert Agent only gets a compact summary when something needs
+        escalating that has not been escalated already.
+        """
+        report = analyze_surveillance(time_window_hours=time_window_hours)
+        result = {
+            "escalation": report.escalation,
+            "log_id": report.log_id,
+            "total_reports": report.total_reports,
+            "anomalies": len(report.anomalies),
+            "suppressed": report.suppressed,
+        }
+        if not report.escalation:
+            return result
+        
+        try:
+            escalation_task = Task(
+                description=f"""You are the Alert Agent. Scheduled surveillance found anomalies
+that need escalation:
+
+{report.summary()}
+
+For each listed location/symptom, submit it to the health authority with
+submit_to_mock_authority (alert_type "outbreak", the listed severity, the
+observed case count and a one-line summary).
+
+**DO NOT send messages to individual users.**
+
+Finish with a 2-3 sentence situation summary for the surveillance log.""",
+                expected_output="Authority submissions made and a short situation summary",
+                agent=self.alert_agent
+            )
+            narration = Crew(
+                agents=[self.alert_agent],
+                tasks=[escalation_task],
+                process=Process.sequential,
+                verbose=True,
+                memory=False
+            ).kickoff()
+            narrative = str(narration.raw) if hasattr(narration, 'raw') else str(narration)
+            record_escalation(report.log_id, narrative, report.escalations)
+            result["narrative"] = narrative
+        except Exception as e:
+            logger.error(f"❌ Escalation narration failed: {str(e)}")
+            result["error"] = str(e)
+        
+        return result
+
+    # ========== FOLLOW-UP METHOD ==========
+
+    def execute_followup_check(
+        self,
+        user_id: str,
+        telegram_id: str,
+        previous_assessment: dict,
+        followup_type: str = "scheduled"
+    ):
+        """Run the follow-up task for one due health record"""
+        try:
+            logger.info(f"📅 Running {followup_type} follow-up for user {telegram_id}")
+            
+            followup_crew = Crew(
+                agents=[self.coordinator_agent, self.triage_agent],
+                tasks=[
+                    create_followup_task(
+                        self.coordinator_agent,
+                        self.triage_agent,
+                        user_id=user_id,
+                        telegram_id=telegram_id,
+                        previous_assessment=previous_assessment,
+                        followup_type=followup_type
+                    )
+                ],
+                process=Process.sequential,
+                verbose=True,
+                memory=False
+            )
+            result = followup_crew.kickoff()
+            
+            return {
+                "status": "success",
+                "result": str(result.raw) if hasattr(result, 'raw') else str(result)
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Error in follow-up check for {telegram_id}: {str(e)}")
+            return {
+                "status": "error",
+                "error": str(e)
+            }
+
 
 # Singleton pattern
 _health_crew_instance = None
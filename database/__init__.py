@@ -25,6 +25,7 @@ sessions_collection = db['sessions']
 health_records_collection = db['health_records']
 alerts_collection = db['alerts']
 surveillance_logs_collection = db['surveillance_logs']
+conversation_history_collection = db['conversation_history']
 
 
 # ADD THIS: Initialize Database Function
@@ -35,9 +36,14 @@ def init_db():
         users_collection.create_index("telegram_id", unique=True)
         health_records_collection.create_index("user_id")
         health_records_collection.create_index("reported_at")
+        health_records_collection.create_index("inserted_at")
+        health_records_collection.create_index([("symptom_ids", 1), ("reported_at", -1)])
+        health_records_collection.create_index([("location_id", 1), ("reported_at", -1)])
+        health_records_collection.create_index([("geohash", 1), ("reported_at", -1)])
         sessions_collection.create_index([("user_id", 1), ("last_activity", -1)])
         alerts_collection.create_index("created_at")
         surveillance_logs_collection.create_index("timestamp")
+        surveillance_logs_collection.create_index("run_at")
         
         log.info("✅ MongoDB initialized with indexes")
     except Exception as e:
@@ -63,5 +69,6 @@ __all__ = [
     "health_records_collection",
     "alerts_collection",
     "surveillance_logs_collection",
+    "conversation_history_collection",
     "init_db",
 ]
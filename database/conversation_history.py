@@ -0,0 +1,169 @@
+# database/conversation_history.py
+import asyncio
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from cachetools import TTLCache
+from pymongo import ReturnDocument
+
+from config.settings import settings
+from utils.logger import log
+from utils.metrics import get_recorder
+
+USER, ASSISTANT = "user", "assistant"
+
+# Rough chars-per-token ratio; good enough to keep prompts bounded
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text or "") // CHARS_PER_TOKEN)
+
+
+def format_turn(turn: Dict[str, Any]) -> str:
+    """'User: ...', 'User (voice): ...' or 'Assistant: ...'"""
+    speaker = "Assistant" if turn.get("role") == ASSISTANT else "User"
+    if turn.get("via"):
+        speaker = f"{speaker} ({turn['via']})"
+    return f"{speaker}: {turn.get('text', '')}"
+
+
+class ConversationHistoryStore:
+    """
+    Per-chat conversation history, shared by every API worker.
+
+    Each chat is one Mongo document whose `turns` array is a ring buffer:
+    appends use `$push` with `$slice`, so a chat never holds more than
+    `max_turns` entries, and a TTL index on `updated_at` drops chats that
+    went quiet. Hot chats are mirrored in a bounded cache, refreshed from
+    the document returned by every append. Its TTL is only a few seconds:
+    it absorbs the repeated reads while one message is handled, but turns
+    appended by other workers must show up on the next message.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = settings.HISTORY_MAX_TURNS,
+        cache_size: int = settings.HISTORY_CACHE_SIZE,
+        cache_ttl: int = settings.HISTORY_CACHE_TTL_SECONDS,
+        retention_days: int = settings.HISTORY_RETENTION_DAYS,
+    ):
+        self.max_turns = max_turns
+        self.retention_days = retention_days
+        self._cache: TTLCache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._lock = threading.Lock()
+        self.metrics = get_recorder("conversation_history")
+        self._ensure_indexes()
+
+    @staticmethod
+    def _collection():
+        from database import conversation_history_collection
+        return conversation_history_collection
+
+    def _ensure_indexes(self) -> None:
+        try:
+            self._collection().create_index(
+                "updated_at",
+                name="history_retention",
+                expireAfterSeconds=self.retention_days * 24 * 3600,
+            )
+        except Exception as e:
+            log.warning(f"⚠️ Could not create conversation history indexes: {e}")
+
+    # ========== SYNC ==========
+
+    def turns(self, chat_id: str) -> List[Dict[str, Any]]:
+        """All stored turns for a chat, oldest first"""
+        chat_id = str(chat_id)
+        with self._lock:
+            turns = self._cache.get(chat_id)
+        self.metrics.incr("hits" if turns is not None else "misses")
+        if turns is None:
+            doc = self._collection().find_one({"_id": chat_id}, {"turns": 1})
+            turns = doc.get("turns", []) if doc else []
+            with self._lock:
+                self._cache[chat_id] = turns
+        return list(turns)
+
+    def append(self, chat_id: str, text: str, role: str = USER, via: Optional[str] = None) -> None:
+        """Add one turn, trimming the chat to its newest `max_turns` entries"""
+        chat_id = str(chat_id)
+        text = (text or "").strip()
+        if not text:
+            return
+        now = datetime.utcnow()
+        turn = {"role": role, "text": text, "at": now}
+        if via:
+            turn["via"] = via
+
+        with self.metrics.time():
+            doc = self._collection().find_one_and_update(
+                {"_id": chat_id},
+                {
+                    "$push": {"turns": {"$each": [turn], "$slice": -self.max_turns}},
+                    "$set": {"updated_at": now},
+                },
+                projection={"turns": 1},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        with self._lock:
+            self._cache[chat_id] = doc.get("turns", []) if doc else [turn]
+
+    def recent(
+        self,
+        chat_id: str,
+        token_budget: int = settings.HISTORY_TOKEN_BUDGET,
+        max_turns: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Newest turns that fit in `token_budget`, formatted for the prompt and
+        returned oldest first. The newest turn is always included, truncated
+        to the budget if needed.
+        """
+        selected: List[str] = []
+        remaining = token_budget
+        for turn in reversed(self.turns(chat_id)[-(max_turns or self.max_turns):]):
+            line = format_turn(turn)
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                if not selected:
+                    selected.append(line[:remaining * CHARS_PER_TOKEN])
+                break
+            selected.append(line)
+            remaining -= cost
+        selected.reverse()
+        return selected
+
+    def clear(self, chat_id: str) -> None:
+        chat_id = str(chat_id)
+        self._collection().delete_one({"_id": chat_id})
+        with self._lock:
+            self._cache.pop(chat_id, None)
+
+    # ========== ASYNC FACADE (handlers) ==========
+
+    async def arecent(self, chat_id: str, token_budget: int = settings.HISTORY_TOKEN_BUDGET) -> List[str]:
+        with self._lock:
+            hot = str(chat_id) in self._cache
+        if hot:
+            # Cached chats are served on the event loop without I/O
+            return self.recent(chat_id, token_budget)
+        return await asyncio.to_thread(self.recent, chat_id, token_budget)
+
+    async def aappend(self, chat_id: str, text: str, role: str = USER, via: Optional[str] = None) -> None:
+        await asyncio.to_thread(self.append, chat_id, text, role, via)
+
+
+# Process-wide store
+_history_instance: Optional[ConversationHistoryStore] = None
+_history_lock = threading.Lock()
+
+
+def get_history_store() -> ConversationHistoryStore:
+    global _history_instance
+    with _history_lock:
+        if _history_instance is None:
+            _history_instance = ConversationHistoryStore()
+        return _history_instance
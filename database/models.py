@@ -81,10 +81,15 @@ class HealthRecord(MongoModel):
     telegram_id: str
     session_id: Optional[str] = None
     symptoms: List[str]
+    symptom_ids: List[int] = Field(default_factory=list)
     symptom_details: Dict[str, Any] = Field(default_factory=dict)
     risk_level: RiskLevel
     severity_score: float = 0.0
     location: Optional[str] = None
+    location_raw: Optional[str] = None
+    location_id: Optional[str] = None
+    district: Optional[str] = None
+    geohash: Optional[str] = None
     reported_at: datetime = Field(default_factory=datetime.utcnow)
     symptom_onset: Optional[datetime] = None
     temperature: Optional[float] = None
@@ -127,4 +132,8 @@ class SurveillanceLog(MongoModel):
     anomalies_detected: List[Dict[str, Any]] = Field(default_factory=list)
     alert_triggered: bool = False
     alert_id: Optional[str] = None
+    # Anomalies handed to the alert agent ({alert_key, severity, case_count}),
+    # set once the escalation succeeded; the alert index is rebuilt from these
+    escalated: List[Dict[str, Any]] = Field(default_factory=list)
+    escalated_at: Optional[datetime] = None
     analysis_details: Dict[str, Any] = Field(default_factory=dict)
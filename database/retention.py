@@ -0,0 +1,333 @@
+# database/retention.py
+"""
+Retention tiers:
+
+- transient data (completed sessions, delivered broadcast rows) expires
+  through TTL indexes;
+- health records and alerts older than their hot window are moved to
+  compressed monthly archive files under DATA_DIR/archive;
+- hourly rollups are never archived, so long-range counts stay cheap.
+
+`archived_records()` reads the archive back for queries that reach past
+the hot window, e.g. long surveillance baselines. The manifest records
+each part's time range and locations, so only matching parts are opened.
+"""
+import io
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from bson import json_util
+
+from config.settings import settings
+from utils.logger import log
+
+FORMATS = ("jsonl.zst", "parquet")
+
+# (collection, time field, hot days setting)
+ARCHIVED_COLLECTIONS = {
+    "health_records": ("reported_at", "HEALTH_RECORD_HOT_DAYS"),
+    "alerts": ("created_at", "ALERT_HOT_DAYS"),
+}
+
+
+def _db():
+    from database import db
+    return db
+
+
+def _manifest():
+    return _db()["archive_manifest"]
+
+
+def archive_root() -> Path:
+    return Path(settings.DATA_DIR) / "archive"
+
+
+# ========== TTL INDEXES ==========
+
+def ensure_retention_indexes() -> None:
+    """TTL indexes for data that is only useful for a while"""
+    db = _db()
+    day = 24 * 3600
+    specs = [
+        # Only completed sessions carry completed_at, so active ones never expire
+        (db["sessions"], "completed_at", settings.SESSION_RETENTION_DAYS * day),
+        (db["broadcast_deliveries"], "finished_at", settings.BROADCAST_RETENTION_DAYS * day),
+    ]
+    for collection, field, seconds in specs:
+        try:
+            collection.create_index(field, name=f"{field}_ttl", expireAfterSeconds=seconds)
+        except Exception as e:
+            log.warning(f"⚠️ Could not create TTL index on {collection.name}.{field}: {e}")
+
+
+# ========== ARCHIVE FILES ==========
+
+def _write_jsonl_zst(path: Path, docs: List[Dict[str, Any]]) -> None:
+    import zstandard
+
+    with open(path, "wb") as raw:
+        with zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=False) as writer:
+            for doc in docs:
+                line = json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS)
+                writer.write(line.encode("utf-8") + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def _read_jsonl_zst(path: Path) -> Iterator[Dict[str, Any]]:
+    import zstandard
+
+    with open(path, "rb") as raw:
+        reader = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        for line in io.TextIOWrapper(reader, encoding="utf-8"):
+            if line.strip():
+                yield json_util.loads(line)
+
+
+def _location_key(doc: Dict[str, Any]) -> str:
+    from utils.locations import record_location_name
+    return record_location_name(doc)
+
+
+def _write_parquet(path: Path, docs: List[Dict[str, Any]], time_field: str) -> None:
+    """
+    Time and canonical location are real columns (for predicate pushdown);
+    the full document is kept as extended JSON because record schemas vary.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table({
+        "_id": [str(d["_id"]) for d in docs],
+        time_field: pa.array([d.get(time_field) for d in docs], type=pa.timestamp("ms")),
+        "location": [d.get("location") for d in docs],
+        "location_key": [_location_key(d) for d in docs],
+        "document": [json_util.dumps(d, json_options=json_util.RELAXED_JSON_OPTIONS) for d in docs],
+    })
+    pq.write_table(table, path, compression="zstd")
+
+
+def _read_parquet(
+    path: Path,
+    time_field: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    location: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Documents of a Parquet part; time and location filters are pushed into the read"""
+    import pyarrow.parquet as pq
+
+    columns = pq.read_schema(path).names
+    filters = []
+    if time_field in columns and start is not None and end is not None:
+        filters += [(time_field, ">=", start), (time_field, "<", end)]
+    # Parts written before location_key existed are filtered by the caller
+    if location and "location_key" in columns:
+        filters.append(("location_key", "=", location))
+    table = pq.read_table(path, columns=["document"], filters=filters or None)
+    for document in table.column("document").to_pylist():
+        yield json_util.loads(document)
+
+
+def read_archive_file(path: Path, **filters: Any) -> Iterator[Dict[str, Any]]:
+    """Documents of one part; `filters` (time_field, start, end, location) narrow Parquet reads"""
+    if path.name.endswith(".parquet"):
+        return _read_parquet(path, **filters)
+    return _read_jsonl_zst(path)
+
+
+def _month_key(timestamp: datetime) -> str:
+    return f"{timestamp:%Y-%m}"
+
+
+def _months_between(start: datetime, end: datetime) -> List[str]:
+    months, cursor = [], start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    while cursor < end:
+        months.append(_month_key(cursor))
+        cursor = (cursor + timedelta(days=32)).replace(day=1)
+    return months
+
+
+# ========== ARCHIVER ==========
+
+class Archiver:
+    """
+    Moves documents older than a cutoff into monthly archive directories
+    (`archive/<collection>/<YYYY-MM>/part-<run>.<format>`).
+
+    Parts of up to `batch_size` documents are written, fsynced and re-read
+    to verify the count before their documents are deleted from Mongo, so
+    an interrupted run never loses data; at worst a re-run writes a second
+    part with the same documents, which readers de-duplicate by _id.
+    """
+
+    def __init__(self, fmt: str = settings.ARCHIVE_FORMAT, batch_size: int = 20_000):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown archive format {fmt!r}; expected one of {FORMATS}")
+        self.fmt = fmt
+        self.batch_size = batch_size
+
+    def archive_collection(self, name: str, time_field: str, cutoff: datetime) -> int:
+        collection = _db()[name]
+        first = collection.find_one({time_field: {"$lt": cutoff}}, {time_field: 1}, sort=[(time_field, 1)])
+        if not first:
+            return 0
+
+        moved = 0
+        run = f"{datetime.utcnow():%Y%m%dT%H%M%S}"
+        for month in _months_between(first[time_field], cutoff):
+            month_start = datetime.strptime(month, "%Y-%m")
+            month_end = min(cutoff, (month_start + timedelta(days=32)).replace(day=1))
+            cursor = collection.find({time_field: {"$gte": month_start, "$lt": month_end}}).sort(time_field, 1)
+            part, chunk = 0, []
+            for doc in cursor:
+                chunk.append(doc)
+                if len(chunk) >= self.batch_size:
+                    moved += self._write_part(collection, name, time_field, month, f"{run}-{part}", chunk)
+                    part, chunk = part + 1, []
+            if chunk:
+                moved += self._write_part(collection, name, time_field, month, f"{run}-{part}", chunk)
+
+        _manifest().update_one(
+            {"_id": f"horizon:{name}"},
+            {"$max": {"archived_before": cutoff}},
+            upsert=True,
+        )
+        return moved
+
+    def _write_part(self, collection, name: str, time_field: str, month: str, part: str, docs: List[Dict]) -> int:
+        directory = archive_root() / name / month
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{part}.{self.fmt}"
+        started = time.perf_counter()
+        if self.fmt == "parquet":
+            _write_parquet(path, docs, time_field)
+        else:
+            _write_jsonl_zst(path, docs)
+
+        written = sum(1 for _ in read_archive_file(path))
+        if written != len(docs):
+            path.unlink(missing_ok=True)
+            raise IOError(f"Archive verification failed for {path}: {written} != {len(docs)}")
+
+        # Manifest first: a crash before the delete leaves documents in both
+        # places (readers de-duplicate), never in neither
+        _manifest().insert_one({
+            "collection": name,
+            "month": month,
+            "path": str(path.relative_to(archive_root())),
+            "count": len(docs),
+            "first": docs[0][time_field],
+            "last": docs[-1][time_field],
+            "locations": sorted({_location_key(d) for d in docs}),
+            "bytes": path.stat().st_size,
+            "created_at": datetime.utcnow(),
+        })
+        collection.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+        log.info(
+            f"🗄️ Archived {len(docs)} {name} for {month} → {path.name} "
+            f"({path.stat().st_size / 1024:.0f} KiB, {time.perf_counter() - started:.1f}s)"
+        )
+        return len(docs)
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Archive every configured collection past its hot window"""
+        now = now or datetime.utcnow()
+        moved = {}
+        for name, (time_field, hot_days_setting) in ARCHIVED_COLLECTIONS.items():
+            cutoff = now - timedelta(days=getattr(settings, hot_days_setting))
+            try:
+                moved[name] = self.archive_collection(name, time_field, cutoff)
+            except Exception as e:
+                log.error(f"❌ Archiving {name} failed: {e}")
+                moved[name] = 0
+
+        # Derived time-series events are not archived, just trimmed
+        if settings.HEALTH_TIMESERIES_ENABLED:
+            cutoff = now - timedelta(days=settings.HEALTH_RECORD_HOT_DAYS)
+            _db()[settings.HEALTH_TIMESERIES_COLLECTION].delete_many({"reported_at": {"$lt": cutoff}})
+        return moved
+
+
+# ========== QUERY FACADE ==========
+
+def archived_before(name: str = "health_records") -> Optional[datetime]:
+    """Everything older than this lives in the archive rather than Mongo"""
+    doc = _manifest().find_one({"_id": f"horizon:{name}"})
+    return doc.get("archived_before") if doc else None
+
+
+def archived_records(
+    start: datetime,
+    end: datetime,
+    location: Optional[str] = None,
+    name: str = "health_records",
+) -> Iterator[Dict[str, Any]]:
+    """
+    Archived documents with their time field in [start, end), optionally
+    for one location. Yields nothing when the range is fully in Mongo.
+
+    Parts are picked from the manifest by time range and location, and
+    Parquet parts only decode matching rows; the checks below still run
+    for JSONL parts and older Parquet parts without a location column.
+    """
+    horizon = archived_before(name)
+    if horizon is None or start >= horizon:
+        return
+    time_field = ARCHIVED_COLLECTIONS[name][0]
+    end = min(end, horizon)
+    canonical = None
+    if location:
+        from utils.locations import canonical_location_name
+        canonical = canonical_location_name(location)
+
+    query: Dict[str, Any] = {"collection": name, "first": {"$lt": end}, "last": {"$gte": start}}
+    if canonical:
+        query["$or"] = [{"locations": canonical}, {"locations": {"$exists": False}}]
+    parts = _manifest().find(query, {"path": 1}).sort("first", 1)
+
+    seen = set()
+    for part in parts:
+        path = archive_root() / part["path"]
+        if not path.exists():
+            log.warning(f"⚠️ Archive part {part['path']} is in the manifest but missing on disk")
+            continue
+        for doc in read_archive_file(path, time_field=time_field, start=start, end=end, location=canonical):
+            timestamp = doc.get(time_field)
+            if not timestamp or not start <= timestamp < end or doc["_id"] in seen:
+                continue
+            if canonical and _location_key(doc) != canonical:
+                continue
+            seen.add(doc["_id"])
+            yield doc
+
+
+def archive_stats() -> List[Dict[str, Any]]:
+    """Per collection and month: parts, documents and bytes on disk"""
+    pipeline = [
+        {"$match": {"collection": {"$exists": True}}},
+        {"$group": {
+            "_id": {"collection": "$collection", "month": "$month"},
+            "parts": {"$sum": 1},
+            "count": {"$sum": "$count"},
+            "bytes": {"$sum": "$bytes"},
+        }},
+        {"$sort": {"_id.collection": 1, "_id.month": 1}},
+    ]
+    return [
+        {**doc["_id"], "parts": doc["parts"], "count": doc["count"], "bytes": doc["bytes"]}
+        for doc in _manifest().aggregate(pipeline)
+    ]
+
+
+def run_archival() -> Dict[str, int]:
+    return Archiver().run()
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_archival(), indent=2))
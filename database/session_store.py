@@ -0,0 +1,327 @@
+# database/session_store.py
+import asyncio
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from cachetools import TTLCache
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from config.settings import settings
+from utils.logger import log
+from utils.metrics import get_recorder
+
+from .models import Session, SessionState
+
+# Allowed moves between states. COMPLETED is terminal: the next message
+# starts a new session.
+TRANSITIONS: Dict[SessionState, frozenset] = {
+    SessionState.INITIAL: frozenset({
+        SessionState.IN_TRIAGE, SessionState.AWAITING_RESPONSE,
+        SessionState.FOLLOW_UP, SessionState.COMPLETED,
+    }),
+    SessionState.IN_TRIAGE: frozenset({
+        SessionState.AWAITING_RESPONSE, SessionState.FOLLOW_UP, SessionState.COMPLETED,
+    }),
+    SessionState.AWAITING_RESPONSE: frozenset({
+        SessionState.IN_TRIAGE, SessionState.FOLLOW_UP, SessionState.COMPLETED,
+    }),
+    SessionState.FOLLOW_UP: frozenset({
+        SessionState.IN_TRIAGE, SessionState.AWAITING_RESPONSE, SessionState.COMPLETED,
+    }),
+    SessionState.COMPLETED: frozenset(),
+}
+
+
+class InvalidTransition(ValueError):
+    """Raised when a session is moved to a state its current state cannot reach"""
+
+
+def normalize_state(value: Any) -> SessionState:
+    """
+    Map any spelling seen in stored sessions ("INITIAL", "completed",
+    SessionState.COMPLETED, " In_Triage ") to the enum.
+    """
+    if isinstance(value, SessionState):
+        return value
+    text = str(value or "").strip().lower()
+    try:
+        return SessionState(text)
+    except ValueError:
+        raise InvalidTransition(f"Unknown session state: {value!r}") from None
+
+
+def can_transition(current: SessionState, target: SessionState) -> bool:
+    return current == target or target in TRANSITIONS[current]
+
+
+class SessionStore:
+    """
+    Single entry point for conversation sessions, used by the Telegram
+    handlers and the CrewAI tools alike.
+
+    Active sessions carry `active: true`, backed by a partial unique index
+    on telegram_id, so get-or-create is one race-free upsert. Active
+    sessions are kept in a per-process hot cache. State, context and
+    symptom changes are written through immediately; `last_activity`
+    touches are buffered and flushed in one bulk write every few seconds.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = settings.SESSION_CACHE_SIZE,
+        ttl: int = settings.SESSION_CACHE_TTL_SECONDS,
+        flush_interval: float = settings.SESSION_FLUSH_SECONDS,
+    ):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._dirty: Dict[Any, datetime] = {}
+        self._lock = threading.RLock()
+        self.flush_interval = flush_interval
+        self.metrics = get_recorder("session_store")
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._ensure_indexes()
+
+    @staticmethod
+    def _collection():
+        from database import sessions_collection
+        return sessions_collection
+
+    def _ensure_indexes(self) -> None:
+        try:
+            self._collection().create_index(
+                "telegram_id",
+                name="one_active_session_per_user",
+                unique=True,
+                partialFilterExpression={"active": True},
+            )
+            self._collection().create_index([("telegram_id", 1), ("started_at", DESCENDING)])
+        except Exception as e:
+            log.warning(f"⚠️ Could not create session indexes: {e}")
+
+    # ========== CACHE ==========
+
+    @staticmethod
+    def _to_model(doc: Dict[str, Any]) -> Session:
+        data = dict(doc)
+        data["_id"] = str(data["_id"])
+        data["session_state"] = normalize_state(data.get("session_state"))
+        return Session(**data)
+
+    def _cache_put(self, doc: Dict[str, Any]) -> Session:
+        with self._lock:
+            if doc.get("active"):
+                self._cache[doc["telegram_id"]] = doc
+            else:
+                self._cache.pop(doc["telegram_id"], None)
+        return self._to_model(doc)
+
+    def _cache_get(self, telegram_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            doc = self._cache.get(telegram_id)
+        self.metrics.incr("hits" if doc is not None else "misses")
+        return doc
+
+    def _touch(self, doc: Dict[str, Any]) -> None:
+        now = datetime.utcnow()
+        with self._lock:
+            doc["last_activity"] = now
+            self._dirty[doc["_id"]] = now
+        self._start_flusher()
+
+    # ========== READS ==========
+
+    def get_active(self, telegram_id: str) -> Optional[Session]:
+        telegram_id = str(telegram_id)
+        doc = self._cache_get(telegram_id)
+        if doc is None:
+            doc = self._collection().find_one({"telegram_id": telegram_id, "active": True})
+            if doc is None:
+                return None
+        return self._cache_put(doc)
+
+    def ensure_active(self, telegram_id: str, user_id: Any = None) -> Session:
+        """Active session for the user, creating one if needed; records activity"""
+        telegram_id = str(telegram_id)
+        doc = self._cache_get(telegram_id)
+        if doc is not None:
+            self._touch(doc)
+            return self._to_model(doc)
+
+        now = datetime.utcnow()
+        update = {
+            "$set": {"last_activity": now},
+            "$setOnInsert": {
+                "user_id": user_id,
+                "session_state": SessionState.INITIAL.value,
+                "context": {},
+                "current_question": 0,
+                "symptoms_collected": [],
+                "started_at": now,
+            },
+        }
+        query = {"telegram_id": telegram_id, "active": True}
+        try:
+            doc = self._collection().find_one_and_update(
+                query, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            doc = self._collection().find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+        return self._cache_put(doc)
+
+    # ========== WRITES ==========
+
+    def update(
+        self,
+        telegram_id: str,
+        state: Any = None,
+        context: Optional[Dict[str, Any]] = None,
+        symptoms: Optional[Iterable[str]] = None,
+        current_question: Optional[int] = None,
+    ) -> Session:
+        """
+        Apply a state transition and/or merge context and symptoms into the
+        active session (created if missing). Raises InvalidTransition for
+        moves the state machine does not allow.
+
+        If the session is completed or expires between reading and writing
+        it, the update is retried once against a fresh active session.
+        """
+        for attempt in range(2):
+            session = self.ensure_active(telegram_id)
+            current = session.session_state
+            target = normalize_state(state) if state is not None else current
+            if not can_transition(current, target):
+                raise InvalidTransition(f"Cannot move session from {current.value} to {target.value}")
+
+            now = datetime.utcnow()
+            update: Dict[str, Any] = {
+                "$set": {"session_state": target.value, "last_activity": now},
+            }
+            for key, value in (context or {}).items():
+                update["$set"][f"context.{key}"] = value
+            if symptoms:
+                update["$addToSet"] = {"symptoms_collected": {"$each": list(symptoms)}}
+            if current_question is not None:
+                update["$set"]["current_question"] = current_question
+            if target == SessionState.COMPLETED:
+                update["$set"].update({"active": False, "completed_at": now})
+
+            doc = self._collection().find_one_and_update(
+                {"_id": self._object_id(session.id), "active": True},
+                update,
+                return_document=ReturnDocument.AFTER,
+            )
+            if doc is not None:
+                break
+            # Closed under us: forget the cached copy so ensure_active starts a new one
+            with self._lock:
+                self._cache.pop(str(telegram_id), None)
+                self._dirty.pop(self._object_id(session.id), None)
+            self.metrics.incr("stale_updates")
+            log.warning(f"⚠️ Session {session.id} for {telegram_id} closed during update, retrying")
+        else:
+            raise RuntimeError(f"Session for {telegram_id} kept closing during update")
+
+        with self._lock:
+            self._dirty.pop(doc["_id"], None)
+        if current != target:
+            log.info(f"🔄 Session {session.id} for {telegram_id}: {current.value} → {target.value}")
+        return self._cache_put(doc)
+
+    def complete(self, telegram_id: str) -> Session:
+        return self.update(telegram_id, state=SessionState.COMPLETED)
+
+    @staticmethod
+    def _object_id(session_id: str):
+        from bson import ObjectId
+        return ObjectId(session_id) if ObjectId.is_valid(session_id) else session_id
+
+    # ========== WRITE-BEHIND ==========
+
+    def flush(self) -> int:
+        """Write buffered last_activity touches in one unordered bulk write"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+        operations: List[UpdateOne] = [
+            UpdateOne({"_id": session_id}, {"$max": {"last_activity": last_activity}})
+            for session_id, last_activity in dirty.items()
+        ]
+        start = time.perf_counter()
+        try:
+            self._collection().bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Put them back; a newer touch for the same session wins
+            with self._lock:
+                for session_id, last_activity in dirty.items():
+                    self._dirty.setdefault(session_id, last_activity)
+            self.metrics.record(time.perf_counter() - start, ok=False)
+            log.error(f"❌ Session activity flush failed: {e}")
+            return 0
+        self.metrics.record(time.perf_counter() - start)
+        self.metrics.incr("flushed", len(operations))
+        return len(operations)
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="session-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the flusher and write any pending touches"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=self.flush_interval + 1)
+            self._flusher = None
+        flushed = self.flush()
+        log.info(f"✅ Session store closed ({flushed} activity updates flushed)")
+
+    # ========== ASYNC FACADE (handlers) ==========
+
+    async def aget_active(self, telegram_id: str) -> Optional[Session]:
+        return await asyncio.to_thread(self.get_active, telegram_id)
+
+    async def aensure_active(self, telegram_id: str, user_id: Any = None) -> Session:
+        doc = self._cache_get(str(telegram_id))
+        if doc is not None:
+            # Hot path stays on the event loop: no I/O
+            self._touch(doc)
+            return self._to_model(doc)
+        return await asyncio.to_thread(self.ensure_active, telegram_id, user_id)
+
+    async def aupdate(self, telegram_id: str, **kwargs: Any) -> Session:
+        return await asyncio.to_thread(self.update, telegram_id, **kwargs)
+
+
+# Process-wide store
+_store_instance: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    global _store_instance
+    with _store_lock:
+        if _store_instance is None:
+            _store_instance = SessionStore()
+        return _store_instance
+
+
+def close_session_store() -> None:
+    global _store_instance
+    with _store_lock:
+        store, _store_instance = _store_instance, None
+    if store is not None:
+        store.close()
@@ -0,0 +1,144 @@
+# database/user_cache.py
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from cachetools import TTLCache
+
+from config.mongo import db as async_db
+from config.settings import settings
+from utils.logger import log
+from utils.metrics import get_recorder
+
+SUPPORTED_LANGUAGES = ("en", "hi", "mr")
+
+# Telegram profile fields mirrored onto the user document
+PROFILE_FIELDS = ("username", "first_name", "last_name")
+
+
+class UserProfileCache:
+    """
+    Bounded LRU + TTL cache of user documents keyed by telegram_id.
+
+    Reads go through the cache (read-through) and writes made through this
+    class update Mongo and the cache together (write-through). One
+    instance is shared by the Telegram handlers (async, Motor) and the
+    CrewAI tools (sync, pymongo), so it is guarded by a lock. The TTL
+    bounds staleness when several processes write the same user.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = settings.USER_CACHE_SIZE,
+        ttl: int = settings.USER_CACHE_TTL_SECONDS,
+    ):
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.metrics = get_recorder("user_cache")
+
+    @staticmethod
+    def _sync_users():
+        from database import users_collection
+        return users_collection
+
+    @staticmethod
+    def _async_users():
+        return async_db["users"]
+
+    # ========== CACHE PRIMITIVES ==========
+
+    def peek(self, telegram_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            doc = self._cache.get(str(telegram_id))
+        self.metrics.incr("hits" if doc is not None else "misses")
+        return dict(doc) if doc is not None else None
+
+    def put(self, doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if doc and doc.get("telegram_id"):
+            with self._lock:
+                self._cache[str(doc["telegram_id"])] = dict(doc)
+        return doc
+
+    def invalidate(self, telegram_id: str) -> None:
+        with self._lock:
+            self._cache.pop(str(telegram_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    # ========== SYNC (tools) ==========
+
+    def get(self, telegram_id: str) -> Optional[Dict[str, Any]]:
+        telegram_id = str(telegram_id)
+        doc = self.peek(telegram_id)
+        if doc is None:
+            doc = self.put(self._sync_users().find_one({"telegram_id": telegram_id}))
+        return doc
+
+    def get_language(self, telegram_id: str) -> str:
+        doc = self.get(telegram_id)
+        lang = doc.get("preferred_language") if doc else None
+        return lang if lang in SUPPORTED_LANGUAGES else "en"
+
+    def get_languages(self, telegram_ids: Iterable[str]) -> Dict[str, str]:
+        """Languages for many chats; cache misses are fetched with batched $in queries"""
+        languages: Dict[str, str] = {}
+        missing = []
+        for telegram_id in dict.fromkeys(str(t) for t in telegram_ids):
+            doc = self.peek(telegram_id)
+            if doc is None:
+                missing.append(telegram_id)
+            else:
+                lang = doc.get("preferred_language")
+                languages[telegram_id] = lang if lang in SUPPORTED_LANGUAGES else "en"
+
+        for i in range(0, len(missing), 1000):
+            for doc in self._sync_users().find({"telegram_id": {"$in": missing[i:i + 1000]}}):
+                self.put(doc)
+                lang = doc.get("preferred_language")
+                languages[doc["telegram_id"]] = lang if lang in SUPPORTED_LANGUAGES else "en"
+
+        for telegram_id in missing:
+            languages.setdefault(telegram_id, "en")
+        return languages
+
+    # ========== ASYNC (handlers) ==========
+
+    async def aget(self, telegram_id: str) -> Optional[Dict[str, Any]]:
+        telegram_id = str(telegram_id)
+        doc = self.peek(telegram_id)
+        if doc is None:
+            doc = self.put(await self._async_users().find_one({"telegram_id": telegram_id}))
+        return doc
+
+    async def aset_language(self, telegram_id: str, language: str) -> None:
+        """Write-through language change"""
+        telegram_id = str(telegram_id)
+        await self._async_users().update_one(
+            {"telegram_id": telegram_id},
+            {"$set": {"preferred_language": language, "updated_at": datetime.utcnow()}},
+        )
+        with self._lock:
+            doc = self._cache.get(telegram_id)
+            if doc is not None:
+                doc["preferred_language"] = language
+        log.info(f"🌍 Cached language for {telegram_id} set to {language}")
+
+    @staticmethod
+    def profile_changed(doc: Dict[str, Any], tg_user) -> bool:
+        """True when the Telegram profile differs from the stored document"""
+        return any(doc.get(field) != getattr(tg_user, field, None) for field in PROFILE_FIELDS)
+
+
+# Process-wide cache
+_cache_instance: Optional[UserProfileCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_user_cache() -> UserProfileCache:
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = UserProfileCache()
+        return _cache_instance
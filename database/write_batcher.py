@@ -0,0 +1,232 @@
+# database/write_batcher.py
+import atexit
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from config.settings import settings
+from utils.logger import log
+from utils.metrics import get_recorder
+
+DUPLICATE_KEY = 11000
+
+
+def unwritten(collection, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    The docs whose _id is not stored in `collection` yet. Needed where a
+    duplicate insert does not fail: time-series collections have no unique
+    _id index. A reported_at range, when present, lets Mongo prune buckets.
+    """
+    if not docs:
+        return docs
+    query: Dict[str, Any] = {"_id": {"$in": [doc["_id"] for doc in docs]}}
+    times = [doc["reported_at"] for doc in docs if isinstance(doc.get("reported_at"), datetime)]
+    if len(times) == len(docs):
+        query["reported_at"] = {"$gte": min(times), "$lte": max(times)}
+    stored = {doc["_id"] for doc in collection.find(query, {"_id": 1})}
+    return [doc for doc in docs if doc["_id"] not in stored]
+
+
+class WriteBatcher:
+    """
+    Coalesces inserts and `$inc` counter upserts from the CrewAI tools and
+    writes them with one unordered bulk_write per collection.
+
+    Callers get a pre-generated ObjectId back immediately; a background
+    thread flushes when `max_docs` operations are buffered or the oldest
+    one has waited `max_delay_ms`. Increments to the same key are merged
+    before they are sent. Inserts carry their own `_id`, so re-sending a
+    batch after a connection error is safe for them; counter upserts may
+    double count in that rare case. Inserts that are re-sent are first
+    checked against the collection, since duplicate-key errors cannot be
+    relied on everywhere (time-series collections). Each insert is stamped with
+    `inserted_at` when it is actually written, so readers that tail a
+    collection see re-queued or delayed documents as new.
+    """
+
+    def __init__(
+        self,
+        max_docs: int = settings.WRITE_BATCH_MAX_DOCS,
+        max_delay_ms: int = settings.WRITE_BATCH_MAX_DELAY_MS,
+    ):
+        self.max_docs = max_docs
+        self.max_delay = max_delay_ms / 1000
+        self.metrics = get_recorder("write_batcher")
+        self._inserts: Dict[str, List[Dict[str, Any]]] = {}
+        self._increments: Dict[str, Dict[Tuple, List[Dict]]] = {}
+        # _ids of inserts re-queued after a failed write, per collection
+        self._retried: Dict[str, set] = {}
+        self._size = 0
+        self._oldest: Optional[float] = None
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _collection(name: str):
+        from database import db
+        return db[name]
+
+    # ========== BUFFERING ==========
+
+    def _added(self, count: int) -> None:
+        self._size += count
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        self._cond.notify()
+
+    def insert(self, collection: str, doc: Dict[str, Any]) -> ObjectId:
+        """Queue an insert and return its _id"""
+        doc.setdefault("_id", ObjectId())
+        with self._cond:
+            self._inserts.setdefault(collection, []).append(doc)
+            self._added(1)
+        return doc["_id"]
+
+    def increment(
+        self,
+        collection: str,
+        key: Dict[str, Any],
+        inc: Dict[str, int],
+        set_on_insert: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Queue an upsert that adds `inc` to the document matching `key`"""
+        merge_key = tuple(sorted(key.items()))
+        with self._cond:
+            pending = self._increments.setdefault(collection, {})
+            entry = pending.get(merge_key)
+            if entry is None:
+                pending[merge_key] = [dict(key), dict(inc), dict(set_on_insert or {})]
+                self._added(1)
+                return
+            for field, amount in inc.items():
+                entry[1][field] = entry[1].get(field, 0) + amount
+
+    # ========== FLUSHING ==========
+
+    def _take(self) -> Tuple[Dict, Dict]:
+        with self._cond:
+            inserts, self._inserts = self._inserts, {}
+            increments, self._increments = self._increments, {}
+            self._size, self._oldest = 0, None
+        return inserts, increments
+
+    def flush(self) -> int:
+        """Write everything buffered; returns the number of operations sent"""
+        with self._flush_lock:
+            inserts, increments = self._take()
+            sent = 0
+            written_at = datetime.utcnow()
+            for docs in inserts.values():
+                for doc in docs:
+                    doc["inserted_at"] = written_at
+            for name in set(inserts) | set(increments):
+                sent += self._write(name, inserts.get(name, []), increments.get(name, {}))
+            return sent
+
+    def _write(self, name: str, inserts: List[Dict], increments: Dict) -> int:
+        """Send one collection's operations; returns how many were sent (0 if re-queued)"""
+        start = time.perf_counter()
+        collection = self._collection(name)
+        try:
+            docs = inserts
+            retried = self._retried.pop(name, None)
+            if retried:
+                # The failed attempt may have stored some of these already
+                repeats = [doc for doc in inserts if doc["_id"] in retried]
+                stored = {doc["_id"] for doc in repeats} - {doc["_id"] for doc in unwritten(collection, repeats)}
+                docs = [doc for doc in inserts if doc["_id"] not in stored]
+            operations: List[Any] = [InsertOne(doc) for doc in docs]
+            operations += [
+                UpdateOne(key, {"$inc": inc, **({"$setOnInsert": on_insert} if on_insert else {})}, upsert=True)
+                for key, inc, on_insert in increments.values()
+            ]
+            if not operations:
+                return 0
+            collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate _ids come from a retried batch and are already stored
+            errors = [err for err in e.details.get("writeErrors", []) if err.get("code") != DUPLICATE_KEY]
+            self.metrics.record(time.perf_counter() - start, ok=not errors)
+            for err in errors:
+                log.error(f"❌ Batched write to {name} failed: {err.get('errmsg')}")
+            return len(operations)
+        except Exception as e:
+            self.metrics.record(time.perf_counter() - start, ok=False)
+            self.metrics.incr("retries")
+            log.error(f"❌ Batched write to {name} failed, re-queued {len(inserts) + len(increments)} ops: {e}")
+            self._requeue(name, inserts, increments)
+            return 0
+        self.metrics.record(time.perf_counter() - start)
+        self.metrics.incr("batches")
+        self.metrics.incr("operations", len(operations))
+        return len(operations)
+
+    def _requeue(self, name: str, inserts: List[Dict], increments: Dict) -> None:
+        with self._cond:
+            self._inserts.setdefault(name, [])[:0] = inserts
+            self._retried.setdefault(name, set()).update(doc["_id"] for doc in inserts)
+            pending = self._increments.setdefault(name, {})
+            for merge_key, (key, inc, on_insert) in increments.items():
+                entry = pending.setdefault(merge_key, [key, {}, on_insert])
+                for field, amount in inc.items():
+                    entry[1][field] = entry[1].get(field, 0) + amount
+            self._added(len(inserts) + len(increments))
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    if self._size >= self.max_docs:
+                        break
+                    if self._oldest is not None:
+                        remaining = self._oldest + self.max_delay - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                stopping = self._stopping
+            if self.flush() == 0 and self._size:
+                # Mongo is unreachable; back off instead of spinning
+                time.sleep(min(5.0, self.max_delay * 20))
+            if stopping:
+                return
+
+    def close(self) -> None:
+        """Stop the flusher and write anything still buffered"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout=10)
+        flushed = self.flush()
+        log.info(f"✅ Write batcher closed ({flushed} pending operations flushed)")
+
+
+# Process-wide batcher
+_batcher_instance: Optional[WriteBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_write_batcher() -> WriteBatcher:
+    global _batcher_instance
+    with _batcher_lock:
+        if _batcher_instance is None:
+            _batcher_instance = WriteBatcher()
+        return _batcher_instance
+
+
+@atexit.register
+def close_write_batcher() -> None:
+    global _batcher_instance
+    with _batcher_lock:
+        batcher, _batcher_instance = _batcher_instance, None
+    if batcher is not None:
+        batcher.close()
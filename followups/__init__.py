@@ -0,0 +1,24 @@
+from .composer import FollowupComposer, get_followup_composer
+from .queue import FollowupQueue, followup_priority, get_followup_queue
+from .scheduler import (
+    FollowupScheduler,
+    backfill_followup_priority,
+    ensure_followup_indexes,
+    run_followup_check,
+    start_followup_scheduler,
+    stop_followup_scheduler,
+)
+
+__all__ = [
+    "FollowupComposer",
+    "get_followup_composer",
+    "FollowupQueue",
+    "followup_priority",
+    "get_followup_queue",
+    "FollowupScheduler",
+    "backfill_followup_priority",
+    "ensure_followup_indexes",
+    "run_followup_check",
+    "start_followup_scheduler",
+    "stop_followup_scheduler",
+]
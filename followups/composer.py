@@ -0,0 +1,129 @@
+# followups/composer.py
+import asyncio
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from database import health_records_collection
+from database.models import SessionState
+from database.session_store import InvalidTransition, get_session_store
+from database.user_cache import get_user_cache
+from messaging.outbox import enqueue_messages
+from utils import log
+from utils.metrics import get_recorder
+
+from .templates import RECOVERED, classify_reply, render_checkin, render_reply, risk_tier
+
+
+class FollowupComposer:
+    """
+    Sends follow-up check-ins without an LLM.
+
+    A due batch is rendered from the health records with pre-translated
+    templates (one per language and risk tier) and queued in the outbox
+    with a single write; the idempotency key is the record ID, so a
+    retried batch never double-sends. The user's session moves to
+    FOLLOW_UP with the previous assessment in its context.
+
+    When the user replies, a short recovery confirmation is answered from
+    a template and closes the case. Anything else is handed to the triage
+    crew, which sees the follow-up context in the session.
+    """
+
+    def __init__(self):
+        self.metrics = get_recorder("followups")
+
+    # ========== CHECK-INS ==========
+
+    def send(self, records: List[Dict[str, Any]]) -> Dict[Any, str]:
+        """Queue check-ins for a claimed batch; returns record ID → error for failures"""
+        if not records:
+            return {}
+        now = datetime.utcnow()
+        languages = get_user_cache().get_languages({r["telegram_id"] for r in records})
+        messages = [
+            {
+                "chat_id": record["telegram_id"],
+                "text": render_checkin(record, languages.get(record["telegram_id"], "en"), now),
+                "parse_mode": None,
+                "idempotency_key": f"followup:{record['_id']}",
+            }
+            for record in records
+        ]
+        try:
+            enqueue_messages(messages, source="followup")
+        except Exception as e:
+            log.error(f"❌ Could not queue {len(messages)} follow-up check-ins: {e}")
+            return {record["_id"]: str(e) for record in records}
+        self.metrics.incr("templated", len(messages))
+
+        store = get_session_store()
+        for record in records:
+            try:
+                store.update(record["telegram_id"], state=SessionState.FOLLOW_UP, context={
+                    "followup_record_id": str(record["_id"]),
+                    "followup_sent_at": now,
+                    "followup_symptoms": record.get("symptoms", []),
+                    "followup_risk_level": record.get("risk_level"),
+                    "followup_tier": risk_tier(record.get("risk_level")),
+                })
+            except Exception as e:
+                # The check-in is queued; a reply just won't carry the context
+                log.warning(f"⚠️ Could not open follow-up session for {record['telegram_id']}: {e}")
+        log.info(f"📅 Queued {len(messages)} follow-up check-ins")
+        return {}
+
+    # ========== REPLIES ==========
+
+    def handle_reply(self, telegram_id: str, text: str, language: Optional[str] = "en") -> Optional[str]:
+        """
+        Template answer for a reply to a check-in, or None when the reply
+        needs re-evaluation by the triage crew (or is not a follow-up reply).
+        """
+        store = get_session_store()
+        session = store.get_active(telegram_id)
+        if session is None or session.session_state != SessionState.FOLLOW_UP:
+            return None
+        context = session.context or {}
+        outcome = classify_reply(text)
+        self._record_response(context.get("followup_record_id"), outcome or "needs_review", text)
+
+        try:
+            if outcome == RECOVERED:
+                store.update(telegram_id, state=SessionState.COMPLETED, context={"followup_outcome": outcome})
+                self.metrics.incr("auto_answered")
+                log.info(f"✅ Follow-up for {telegram_id} closed: user reports recovery")
+                return render_reply(outcome, language)
+            store.update(telegram_id, state=SessionState.IN_TRIAGE, context={"followup_outcome": "needs_review"})
+        except InvalidTransition as e:
+            log.warning(f"⚠️ Follow-up session update rejected for {telegram_id}: {e}")
+        self.metrics.incr("escalated_to_triage")
+        return None
+
+    @staticmethod
+    def _record_response(record_id: Optional[str], outcome: str, text: str) -> None:
+        if not record_id:
+            return
+        _id = ObjectId(record_id) if ObjectId.is_valid(record_id) else record_id
+        health_records_collection.update_one(
+            {"_id": _id},
+            {"$set": {"followup_response": outcome, "followup_response_text": text[:500], "followup_response_at": datetime.utcnow()}},
+        )
+
+    async def ahandle_reply(self, telegram_id: str, text: str, language: Optional[str] = "en") -> Optional[str]:
+        return await asyncio.to_thread(self.handle_reply, telegram_id, text, language)
+
+
+# Process-wide composer
+_composer_instance: Optional[FollowupComposer] = None
+_composer_lock = threading.Lock()
+
+
+def get_followup_composer() -> FollowupComposer:
+    global _composer_instance
+    with _composer_lock:
+        if _composer_instance is None:
+            _composer_instance = FollowupComposer()
+        return _composer_instance
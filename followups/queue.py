@@ -0,0 +1,178 @@
+# followups/queue.py
+import heapq
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from database import health_records_collection
+from utils import log
+from utils.metrics import get_recorder
+
+RISK_PRIORITY = {"LOW": 0, "MODERATE": 1, "MEDIUM": 1, "HIGH": 2, "CRITICAL": 3}
+
+
+def followup_priority(risk_level: Optional[str], severity_score: Optional[float] = 0.0) -> int:
+    """Higher is more urgent: risk level first, severity (0-10) breaks ties"""
+    risk = RISK_PRIORITY.get(str(risk_level or "").upper(), 1)
+    severity = min(10.0, max(0.0, float(severity_score or 0.0)))
+    return risk * 100 + int(severity * 10)
+
+
+class FollowupQueue:
+    """
+    In-memory schedule of upcoming follow-ups.
+
+    Entries wait in a timer heap ordered by `followup_date`; once due they
+    move to a ready heap ordered by priority (risk, then severity, then
+    how overdue), so a CRITICAL case never queues behind LOW ones. The
+    health records stay the source of truth: the queue is rebuilt from
+    Mongo on start, topped up every `reload_interval` with follow-ups
+    entering the horizon, and fed directly by write_health_record. An
+    entry is only a hint; claiming still re-checks the record.
+    """
+
+    def __init__(
+        self,
+        horizon_hours: float = settings.FOLLOWUP_QUEUE_HORIZON_HOURS,
+        reload_interval: timedelta = timedelta(minutes=15),
+    ):
+        self.horizon = timedelta(hours=horizon_hours)
+        self.reload_interval = reload_interval
+        self.metrics = get_recorder("followup_queue")
+        self._timers: List[Tuple[datetime, Any]] = []
+        self._ready: List[Tuple[int, datetime, Any]] = []
+        self._entries: Dict[Any, Tuple[datetime, int]] = {}
+        self._lock = threading.Lock()
+        self._loaded_until: Optional[datetime] = None
+        self._reloaded_at: Optional[datetime] = None
+        self._on_earlier: Optional[Callable[[], None]] = None
+
+    def on_earlier(self, callback: Optional[Callable[[], None]]) -> None:
+        """Called (from any thread) when an entry becomes the next to fire"""
+        self._on_earlier = callback
+
+    # ========== LOADING ==========
+
+    def load(self, now: Optional[datetime] = None) -> int:
+        """Add pending follow-ups due before now + horizon that are not queued yet"""
+        now = now or datetime.utcnow()
+        until = now + self.horizon
+        query: Dict[str, Any] = {
+            "requires_followup": True,
+            "followup_completed": {"$ne": True},
+            "followup_date": {"$lte": until},
+        }
+        if self._loaded_until is not None:
+            # Overdue items from other processes are picked up by the claim sweep
+            query["followup_date"]["$gt"] = self._loaded_until
+        self._loaded_until = until
+        cursor = health_records_collection.find(
+            query, {"followup_date": 1, "followup_priority": 1, "risk_level": 1, "severity_score": 1}
+        )
+        added = 0
+        for doc in cursor:
+            priority = doc.get("followup_priority")
+            if priority is None:
+                priority = followup_priority(doc.get("risk_level"), doc.get("severity_score"))
+            added += self.add(doc["_id"], doc["followup_date"], priority, notify=False)
+        self._reloaded_at = now
+        if added:
+            log.info(f"📅 Follow-up queue loaded {added} entries (horizon {self.horizon})")
+        self._notify()
+        return added
+
+    def maybe_reload(self, now: Optional[datetime] = None) -> int:
+        now = now or datetime.utcnow()
+        if self._reloaded_at is None or now - self._reloaded_at >= self.reload_interval:
+            return self.load(now)
+        return 0
+
+    # ========== SCHEDULING ==========
+
+    def add(self, record_id: Any, due: datetime, priority: int, notify: bool = True) -> int:
+        """Schedule (or reschedule) a record; returns 1 if it was not queued before"""
+        if self._loaded_until is None or due > self._loaded_until:
+            return 0  # Not running in this process, or beyond the horizon (a reload brings it in)
+        with self._lock:
+            new = record_id not in self._entries
+            self._entries[record_id] = (due, priority)
+            heapq.heappush(self._timers, (due, record_id))
+            earliest = self._timers[0][1] == record_id
+        self.metrics.incr("scheduled")
+        if notify and earliest:
+            self._notify()
+        return int(new)
+
+    def discard(self, record_id: Any) -> None:
+        with self._lock:
+            self._entries.pop(record_id, None)
+
+    def _notify(self) -> None:
+        if self._on_earlier is not None:
+            self._on_earlier()
+
+    def _promote(self, now: datetime) -> None:
+        """Move due timers to the ready heap, skipping stale heap entries"""
+        while self._timers and self._timers[0][0] <= now:
+            due, record_id = heapq.heappop(self._timers)
+            entry = self._entries.get(record_id)
+            if entry is None or entry[0] != due:
+                continue
+            heapq.heappush(self._ready, (-entry[1], due, record_id))
+
+    def pop_due(self, limit: int, now: Optional[datetime] = None) -> List[Any]:
+        """Up to `limit` due record IDs, most urgent first"""
+        now = now or datetime.utcnow()
+        ids: List[Any] = []
+        with self._lock:
+            self._promote(now)
+            while self._ready and len(ids) < limit:
+                negative_priority, due, record_id = heapq.heappop(self._ready)
+                entry = self._entries.get(record_id)
+                if entry is None or entry != (due, -negative_priority):
+                    continue
+                del self._entries[record_id]
+                ids.append(record_id)
+        return ids
+
+    def seconds_until_next(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Seconds until the next entry is due (0 if one is ready), None if empty"""
+        now = now or datetime.utcnow()
+        with self._lock:
+            self._promote(now)
+            if self._ready:
+                return 0.0
+            while self._timers:
+                due, record_id = self._timers[0]
+                entry = self._entries.get(record_id)
+                if entry is not None and entry[0] == due:
+                    return max(0.0, (due - now).total_seconds())
+                heapq.heappop(self._timers)
+        return None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        until_next = self.seconds_until_next()
+        return {
+            "queued": len(self),
+            "next_due_seconds": round(until_next, 1) if until_next is not None else None,
+            "loaded_until": self._loaded_until,
+            "activity": self.metrics.snapshot(),
+        }
+
+
+# Process-wide queue
+_queue_instance: Optional[FollowupQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_followup_queue() -> FollowupQueue:
+    global _queue_instance
+    with _queue_lock:
+        if _queue_instance is None:
+            _queue_instance = FollowupQueue()
+        return _queue_instance
@@ -0,0 +1,403 @@
+# followups/scheduler.py
+import asyncio
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from config import settings
+from database import health_records_collection
+from utils import log
+from utils.metrics import get_recorder
+
+from .composer import FollowupComposer, get_followup_composer
+from .queue import FollowupQueue, followup_priority, get_followup_queue
+
+FollowupHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+COMPLETED, FAILED = "completed", "failed"
+
+
+def _due_query(now: datetime) -> Dict[str, Any]:
+    """Due, not completed, and not leased (a retry delay is also a lease)"""
+    return {
+        "requires_followup": True,
+        "followup_completed": {"$ne": True},
+        "followup_date": {"$lte": now},
+        "$or": [
+            {"followup_lease_until": {"$exists": False}},
+            {"followup_lease_until": {"$lt": now}},
+        ],
+    }
+
+
+def ensure_followup_indexes() -> None:
+    try:
+        health_records_collection.create_index(
+            [("requires_followup", 1), ("followup_completed", 1), ("followup_date", 1)]
+        )
+        health_records_collection.create_index(
+            [("requires_followup", 1), ("followup_completed", 1), ("followup_priority", -1), ("followup_date", 1)]
+        )
+        health_records_collection.create_index("followup_claim", sparse=True)
+    except Exception as e:
+        log.warning(f"⚠️ Could not create follow-up indexes: {e}")
+
+
+def backfill_followup_priority(batch_size: int = 1000) -> int:
+    """
+    Stamp `followup_priority` on pending follow-ups written before the
+    field existed. The sweep sorts on it, and a missing value sorts last,
+    so those records would otherwise wait behind every newer one.
+    """
+    cursor = health_records_collection.find(
+        {
+            "requires_followup": True,
+            "followup_completed": {"$ne": True},
+            "followup_priority": {"$exists": False},
+        },
+        {"risk_level": 1, "severity_score": 1},
+    )
+    updated, batch = 0, []
+    for record in cursor:
+        priority = followup_priority(record.get("risk_level"), record.get("severity_score"))
+        batch.append(UpdateOne({"_id": record["_id"]}, {"$set": {"followup_priority": priority}}))
+        if len(batch) >= batch_size:
+            updated += health_records_collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += health_records_collection.bulk_write(batch, ordered=False).modified_count
+    if updated:
+        log.info(f"📅 Backfilled follow-up priority on {updated} records")
+    return updated
+
+
+async def run_followup_check(record: Dict[str, Any]) -> None:
+    """Per-record handler running the LLM follow-up crew task"""
+    from crew import get_health_crew
+
+    reported_at = record.get("reported_at") or datetime.utcnow()
+    result = await asyncio.to_thread(
+        get_health_crew().execute_followup_check,
+        user_id=record.get("user_id") or record["telegram_id"],
+        telegram_id=record["telegram_id"],
+        previous_assessment={
+            "symptoms": record.get("symptoms", []),
+            "risk_level": record.get("risk_level", "moderate"),
+            "severity_score": record.get("severity_score", 0),
+            "reported_at": reported_at.isoformat(),
+            "recommendations": record.get("recommendations", []),
+        },
+        followup_type="scheduled",
+    )
+    if result.get("status") != "success":
+        raise RuntimeError(result.get("error") or "follow-up check failed")
+
+
+class FollowupScheduler:
+    """
+    Sends due follow-ups from inside the API's event loop.
+
+    Follow-ups fire at their `followup_date`: the FollowupQueue holds the
+    upcoming ones and wakes the loop when the next falls due, handing out
+    due records most urgent first (risk, then severity). Each tick also
+    sweeps Mongo, in the same priority order, for due records the queue
+    does not know about (written by another process, or overdue from
+    before a restart), so `poll_interval` bounds how late any can be.
+
+    A tick claims up to `batch_size` due health records at once: a claim
+    ID and lease are set in a single update that re-checks the due
+    condition, so several API processes never pick the same record.
+
+    By default the whole batch goes to the FollowupComposer, which queues
+    templated check-ins in one outbox write, and the batch is marked
+    `followup_completed` in one update. A custom per-record `handler`
+    (e.g. run_followup_check, the LLM follow-up crew) is run with at most
+    `concurrency` records in flight, and only that many are claimed per
+    round so no lease ticks away while its record waits. Failures release the record with a
+    backoff (stored as the lease) until `max_attempts`, after which it is
+    closed as failed.
+
+    Lag from `followup_date` is recorded at claim and at completion
+    ("followup_claim_lag" / "followup_completion_lag" in /metrics).
+    """
+
+    def __init__(
+        self,
+        handler: Optional[FollowupHandler] = None,
+        composer: Optional[FollowupComposer] = None,
+        queue: Optional[FollowupQueue] = None,
+        batch_size: int = settings.FOLLOWUP_BATCH_SIZE,
+        concurrency: int = settings.FOLLOWUP_CONCURRENCY,
+        poll_interval: float = settings.FOLLOWUP_POLL_SECONDS,
+        lease_seconds: int = settings.FOLLOWUP_LEASE_SECONDS,
+        max_attempts: int = settings.FOLLOWUP_MAX_ATTEMPTS,
+    ):
+        self.handler = handler
+        self.composer = composer or get_followup_composer()
+        self.queue = queue or get_followup_queue()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.metrics = get_recorder("followups")
+        self.claim_lag = get_recorder("followup_claim_lag")
+        self.completion_lag = get_recorder("followup_completion_lag")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    # ========== CLAIMING ==========
+
+    def _claim(self, ids: Optional[List[Any]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Claim the given record IDs if still due, else sweep for the most urgent due records"""
+        now = datetime.utcnow()
+        due = _due_query(now)
+        if ids is None:
+            ids = [
+                d["_id"]
+                for d in health_records_collection.find(due, {"_id": 1})
+                .sort([("followup_priority", -1), ("followup_date", 1)])
+                .limit(limit or self.batch_size)
+            ]
+        if not ids:
+            return []
+        claim_id = str(ObjectId())
+        health_records_collection.update_many(
+            {"_id": {"$in": ids}, **due},
+            {
+                "$set": {
+                    "followup_claim": claim_id,
+                    "followup_claimed_at": now,
+                    "followup_lease_until": now + timedelta(seconds=self.lease_seconds),
+                },
+                "$inc": {"followup_attempts": 1},
+            },
+        )
+        claimed = list(health_records_collection.find({"followup_claim": claim_id}))
+        for record in claimed:
+            self.claim_lag.record(max(0.0, (now - record["followup_date"]).total_seconds()))
+        self.metrics.incr("claimed", len(claimed))
+        return claimed
+
+    def _finish(self, record: Dict[str, Any], outcome: str, error: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        health_records_collection.update_one(
+            {"_id": record["_id"], "followup_claim": record["followup_claim"]},
+            {
+                "$set": {
+                    "followup_completed": True,
+                    "followup_completed_at": now,
+                    "followup_outcome": outcome,
+                    "followup_last_error": error,
+                },
+                "$unset": {"followup_lease_until": ""},
+            },
+        )
+        self.completion_lag.record(max(0.0, (now - record["followup_date"]).total_seconds()), ok=outcome == COMPLETED)
+        self.metrics.incr(outcome)
+
+    def _finish_batch(self, records: List[Dict[str, Any]], failures: Dict[Any, str]) -> None:
+        done = [r for r in records if r["_id"] not in failures]
+        if done:
+            now = datetime.utcnow()
+            health_records_collection.update_many(
+                {"_id": {"$in": [r["_id"] for r in done]}, "followup_claim": done[0]["followup_claim"]},
+                {
+                    "$set": {
+                        "followup_completed": True,
+                        "followup_completed_at": now,
+                        "followup_outcome": COMPLETED,
+                        "followup_last_error": None,
+                    },
+                    "$unset": {"followup_lease_until": ""},
+                },
+            )
+            for record in done:
+                self.completion_lag.record(max(0.0, (now - record["followup_date"]).total_seconds()))
+            self.metrics.incr(COMPLETED, len(done))
+        for record in records:
+            if record["_id"] in failures:
+                self._failed(record, failures[record["_id"]])
+
+    def _failed(self, record: Dict[str, Any], error: str, permanent: bool = False) -> None:
+        if permanent or record.get("followup_attempts", 1) >= self.max_attempts:
+            log.error(f"❌ Follow-up for record {record['_id']} gave up: {error}")
+            self._finish(record, FAILED, error)
+        else:
+            self._release(record, error)
+
+    def _release(self, record: Dict[str, Any], error: str) -> None:
+        attempts = record.get("followup_attempts", 1)
+        delay = min(3600.0, 60.0 * 2 ** (attempts - 1)) * (0.5 + random.random() / 2)
+        retry_at = datetime.utcnow() + timedelta(seconds=delay)
+        health_records_collection.update_one(
+            {"_id": record["_id"], "followup_claim": record["followup_claim"]},
+            {"$set": {"followup_lease_until": retry_at, "followup_last_error": error}},
+        )
+        self.queue.add(record["_id"], retry_at, self._priority(record))
+        self.metrics.incr("retries")
+        log.warning(f"⚠️ Follow-up for record {record['_id']} failed ({error}), retry in {delay:.0f}s")
+
+    # ========== PROCESSING ==========
+
+    @staticmethod
+    def _priority(record: Dict[str, Any]) -> int:
+        priority = record.get("followup_priority")
+        if priority is None:
+            priority = followup_priority(record.get("risk_level"), record.get("severity_score"))
+        return priority
+
+    @property
+    def round_size(self) -> int:
+        """Records claimed per round: a batch for the composer, `concurrency` for a handler"""
+        return self.batch_size if self.handler is None else min(self.batch_size, self.concurrency)
+
+    def _claim_due(self) -> List[Dict[str, Any]]:
+        batch = []
+        size = self.round_size
+        ids = self.queue.pop_due(size)
+        if ids:
+            batch = self._claim(ids)
+            self.metrics.incr("claimed_from_queue", len(batch))
+        if len(batch) < size:
+            swept = self._claim(limit=size - len(batch))
+            self.metrics.incr("claimed_by_sweep", len(swept))
+            batch += swept
+        batch.sort(key=self._priority, reverse=True)
+        return batch
+
+    async def _process(self, record: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            try:
+                await self.handler(record)
+            except Exception as e:
+                await asyncio.to_thread(self._failed, record, str(e))
+                return
+            await asyncio.to_thread(self._finish, record, COMPLETED)
+
+    async def run_once(self) -> int:
+        """Claim and process one batch; returns how many records were claimed"""
+        batch = await asyncio.to_thread(self._claim_due)
+        if not batch:
+            return 0
+        log.info(f"📅 Processing {len(batch)} due follow-ups")
+        sendable = []
+        for record in batch:
+            if record.get("telegram_id"):
+                sendable.append(record)
+            else:
+                await asyncio.to_thread(self._failed, record, "record has no telegram_id", True)
+        if self.handler is None:
+            failures = await asyncio.to_thread(self.composer.send, sendable)
+            await asyncio.to_thread(self._finish_batch, sendable, failures)
+        else:
+            await asyncio.gather(*(self._process(record) for record in sendable))
+        return len(batch)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                # Drain full rounds back to back, then wait for the next tick
+                while not self._stopping and await self.run_once() >= self.round_size:
+                    pass
+                await asyncio.to_thread(self.queue.maybe_reload)
+            except Exception as e:
+                log.error(f"❌ Follow-up scheduler tick failed: {e}")
+            self._wakeup.clear()
+            # Sleep until the next queued follow-up is due, at most one poll interval
+            until_next = self.queue.seconds_until_next()
+            timeout = self.poll_interval if until_next is None else min(self.poll_interval, until_next)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    # ========== LIFECYCLE ==========
+
+    async def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        await asyncio.to_thread(ensure_followup_indexes)
+        await asyncio.to_thread(backfill_followup_priority)
+        self.queue.on_earlier(self.wake)
+        await asyncio.to_thread(self.queue.load)
+        self._task = asyncio.create_task(self._run())
+        log.info(
+            f"📅 Follow-up scheduler started (batches of {self.batch_size}, "
+            f"{self.concurrency} concurrent, every {self.poll_interval:.0f}s)"
+        )
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Let in-flight follow-ups finish; leases cover anything cut off"""
+        self._stopping = True
+        self.queue.on_earlier(None)
+        if self._task is None:
+            return
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+        log.info("⏹️ Follow-up scheduler stopped")
+
+    def wake(self) -> None:
+        """Run a tick now (thread-safe)"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ========== INSPECTION ==========
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """Backlog, oldest due lag and claim/completion lag percentiles"""
+        now = datetime.utcnow()
+        pending = {"requires_followup": True, "followup_completed": {"$ne": True}}
+        due = health_records_collection.count_documents({**pending, "followup_date": {"$lte": now}})
+        in_flight = health_records_collection.count_documents({**pending, "followup_lease_until": {"$gte": now}})
+        oldest = health_records_collection.find_one(
+            {**pending, "followup_date": {"$lte": now}}, {"followup_date": 1}, sort=[("followup_date", 1)]
+        )
+        return {
+            "due": due,
+            "leased_or_backing_off": in_flight,
+            "oldest_due_seconds": round((now - oldest["followup_date"]).total_seconds(), 1) if oldest else 0.0,
+            "processing": get_recorder("followups").snapshot(),
+            "claim_lag": get_recorder("followup_claim_lag").snapshot(),
+            "completion_lag": get_recorder("followup_completion_lag").snapshot(),
+            "queue": get_followup_queue().stats(),
+        }
+
+
+# Process-wide scheduler (runs on the API's event loop)
+_scheduler_instance: Optional[FollowupScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+async def start_followup_scheduler() -> FollowupScheduler:
+    global _scheduler_instance
+    with _scheduler_lock:
+        if _scheduler_instance is None:
+            _scheduler_instance = FollowupScheduler()
+        scheduler = _scheduler_instance
+    await scheduler.start()
+    return scheduler
+
+
+async def stop_followup_scheduler() -> None:
+    global _scheduler_instance
+    with _scheduler_lock:
+        scheduler, _scheduler_instance = _scheduler_instance, None
+    if scheduler is not None:
+        await scheduler.stop()
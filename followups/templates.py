@@ -0,0 +1,252 @@
+# followups/templates.py
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils.symptoms import OTHER_SYMPTOM_ID, match_symptoms, record_symptom_ids, symptom_name
+
+LANGUAGES = ("en", "hi", "mr")
+
+HIGH, MODERATE, LOW = "high", "moderate", "low"
+
+# Reply outcomes the bot can answer without re-evaluation
+RECOVERED = "recovered"
+
+# ========== CHECK-IN TEMPLATES ==========
+# Pre-translated so a check-in never needs an LLM or a translation call.
+# Placeholders: {symptoms}, {hours_ago}, {days_ago}, {risk_level}
+
+CHECKIN_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "en": {
+        HIGH: (
+            "🏥 Health Check-In\n\n"
+            "Hello! We're following up on your health status.\n\n"
+            "📋 Last report: {hours_ago} hours ago\n"
+            "You reported: {symptoms}\n"
+            "Risk level: {risk_level}\n\n"
+            "How are you feeling now?\n"
+            "1. Are your symptoms better, same, or worse?\n"
+            "2. Any new symptoms?\n"
+            "3. Have you sought medical care?\n"
+            "4. Current temperature (if you had fever)?\n\n"
+            "Reply here with your update.\n"
+            "Emergency: Call 108/112"
+        ),
+        MODERATE: (
+            "👋 Health Check-In\n\n"
+            "Hi! Time for your scheduled health check.\n\n"
+            "📋 Last time you reported: {symptoms}\n\n"
+            "How are you feeling now? Are your symptoms improving? "
+            "Any concerns?\n\n"
+            "Please share a brief update. Thanks for keeping us informed! 🌟"
+        ),
+        LOW: (
+            "✅ Health Check-In\n\n"
+            "Hope you're feeling better!\n\n"
+            "You reported {symptoms} {days_ago} days ago.\n\n"
+            "Are you fully recovered? Please reply:\n"
+            "- Yes, feeling much better\n"
+            "- Still have some symptoms\n"
+            "- Need to report new concerns\n\n"
+            "Thank you! 🙏"
+        ),
+    },
+    "hi": {
+        HIGH: (
+            "🏥 स्वास्थ्य जांच\n\n"
+            "नमस्ते! हम आपके स्वास्थ्य की जानकारी ले रहे हैं।\n\n"
+            "📋 पिछली रिपोर्ट: {hours_ago} घंटे पहले\n"
+            "आपने बताया था: {symptoms}\n"
+            "जोखिम स्तर: {risk_level}\n\n"
+            "अब आप कैसा महसूस कर रहे हैं?\n"
+            "1. क्या लक्षण बेहतर हैं, वैसे ही हैं, या बदतर हैं?\n"
+            "2. कोई नया लक्षण?\n"
+            "3. क्या आपने डॉक्टर को दिखाया?\n"
+            "4. अभी का तापमान (अगर बुखार था)?\n\n"
+            "कृपया यहीं जवाब दें।\n"
+            "आपातकाल: 108/112 पर कॉल करें"
+        ),
+        MODERATE: (
+            "👋 स्वास्थ्य जांच\n\n"
+            "नमस्ते! आपकी निर्धारित स्वास्थ्य जांच का समय है।\n\n"
+            "📋 पिछली बार आपने बताया था: {symptoms}\n\n"
+            "अब आप कैसा महसूस कर रहे हैं? क्या लक्षणों में सुधार है? "
+            "कोई चिंता?\n\n"
+            "कृपया संक्षेप में बताएं। धन्यवाद! 🌟"
+        ),
+        LOW: (
+            "✅ स्वास्थ्य जांच\n\n"
+            "आशा है आप बेहतर महसूस कर रहे हैं!\n\n"
+            "आपने {days_ago} दिन पहले {symptoms} की जानकारी दी थी।\n\n"
+            "क्या आप पूरी तरह ठीक हो गए हैं? कृपया जवाब दें:\n"
+            "- हाँ, अब काफी बेहतर हूँ\n"
+            "- अभी भी कुछ लक्षण हैं\n"
+            "- नई समस्या बतानी है\n\n"
+            "धन्यवाद! 🙏"
+        ),
+    },
+    "mr": {
+        HIGH: (
+            "🏥 आरोग्य तपासणी\n\n"
+            "नमस्कार! आम्ही तुमच्या आरोग्याची विचारपूस करत आहोत.\n\n"
+            "📋 मागील नोंद: {hours_ago} तासांपूर्वी\n"
+            "तुम्ही सांगितले होते: {symptoms}\n"
+            "जोखीम पातळी: {risk_level}\n\n"
+            "आता तुम्हाला कसे वाटते?\n"
+            "1. लक्षणे कमी झाली, तशीच आहेत की वाढली?\n"
+            "2. काही नवीन लक्षणे?\n"
+            "3. तुम्ही डॉक्टरांना दाखवले का?\n"
+            "4. सध्याचे तापमान (ताप असल्यास)?\n\n"
+            "कृपया इथेच उत्तर द्या.\n"
+            "आपत्कालीन: 108/112 वर कॉल करा"
+        ),
+        MODERATE: (
+            "👋 आरोग्य तपासणी\n\n"
+            "नमस्कार! तुमच्या नियोजित आरोग्य तपासणीची वेळ झाली आहे.\n\n"
+            "📋 मागील वेळी तुम्ही सांगितले होते: {symptoms}\n\n"
+            "आता तुम्हाला कसे वाटते? लक्षणांमध्ये सुधारणा आहे का? "
+            "काही काळजी?\n\n"
+            "कृपया थोडक्यात कळवा. धन्यवाद! 🌟"
+        ),
+        LOW: (
+            "✅ आरोग्य तपासणी\n\n"
+            "आशा आहे की तुम्हाला बरे वाटत आहे!\n\n"
+            "तुम्ही {days_ago} दिवसांपूर्वी {symptoms} कळवले होते.\n\n"
+            "तुम्ही पूर्ण बरे झालात का? कृपया उत्तर द्या:\n"
+            "- हो, आता खूप बरे वाटते\n"
+            "- अजून काही लक्षणे आहेत\n"
+            "- नवीन तक्रार सांगायची आहे\n\n"
+            "धन्यवाद! 🙏"
+        ),
+    },
+}
+
+REPLY_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "en": {
+        RECOVERED: (
+            "✅ Great news! We're glad you're feeling better.\n\n"
+            "Keep resting and drinking fluids. If any symptoms come back, "
+            "just message us here. Stay well! 🌟"
+        ),
+    },
+    "hi": {
+        RECOVERED: (
+            "✅ बहुत अच्छी खबर! हमें खुशी है कि आप बेहतर महसूस कर रहे हैं।\n\n"
+            "आराम करते रहें और पानी पीते रहें। अगर कोई लक्षण फिर से हो, "
+            "तो यहीं संदेश भेजें। स्वस्थ रहें! 🌟"
+        ),
+    },
+    "mr": {
+        RECOVERED: (
+            "✅ छान बातमी! तुम्हाला बरे वाटत आहे याचा आनंद आहे.\n\n"
+            "विश्रांती घ्या आणि पाणी पीत राहा. कोणतेही लक्षण परत आल्यास "
+            "इथे संदेश पाठवा. काळजी घ्या! 🌟"
+        ),
+    },
+}
+
+RISK_LABELS: Dict[str, Dict[str, str]] = {
+    "en": {"LOW": "Low", "MODERATE": "Moderate", "HIGH": "High", "CRITICAL": "Critical"},
+    "hi": {"LOW": "कम", "MODERATE": "मध्यम", "HIGH": "उच्च", "CRITICAL": "गंभीर"},
+    "mr": {"LOW": "कमी", "MODERATE": "मध्यम", "HIGH": "उच्च", "CRITICAL": "गंभीर"},
+}
+
+# Symptom vocabulary IDs (utils/symptoms.py) → display name; English uses
+# the canonical vocabulary name
+SYMPTOM_LABELS: Dict[str, Dict[int, str]] = {
+    "hi": {
+        1: "बुखार", 2: "खांसी", 3: "सांस लेने में तकलीफ", 4: "गले में खराश", 5: "जुकाम",
+        6: "छींक", 7: "स्वाद या गंध न आना", 8: "सीने में दर्द", 9: "सिरदर्द", 10: "बदन दर्द",
+        11: "जोड़ों में दर्द", 12: "थकान", 13: "कंपकंपी", 14: "जी मिचलाना", 15: "उल्टी",
+        16: "दस्त", 17: "पेट दर्द", 18: "भूख न लगना", 19: "पानी की कमी", 20: "चकत्ते",
+        21: "आंखें लाल", 22: "रक्तस्राव", 23: "पीलिया", 24: "चक्कर", 25: "दौरा", 26: "बेहोशी",
+    },
+    "mr": {
+        1: "ताप", 2: "खोकला", 3: "श्वास घेण्यास त्रास", 4: "घसा खवखवणे", 5: "सर्दी",
+        6: "शिंका", 7: "चव किंवा वास न येणे", 8: "छातीत दुखणे", 9: "डोकेदुखी", 10: "अंगदुखी",
+        11: "सांधेदुखी", 12: "थकवा", 13: "थंडी वाजणे", 14: "मळमळ", 15: "उलटी",
+        16: "जुलाब", 17: "पोटदुखी", 18: "भूक न लागणे", 19: "निर्जलीकरण", 20: "पुरळ",
+        21: "डोळे लाल", 22: "रक्तस्त्राव", 23: "कावीळ", 24: "चक्कर", 25: "आकडी", 26: "बेशुद्ध",
+    },
+}
+
+_SYMPTOM_SEPARATOR = {"en": ", ", "hi": ", ", "mr": ", "}
+_NO_SYMPTOMS = {"en": "your symptoms", "hi": "आपके लक्षण", "mr": "तुमची लक्षणे"}
+
+
+def normalize_language(language: Optional[str]) -> str:
+    return language if language in LANGUAGES else "en"
+
+
+def risk_tier(risk_level: Optional[str]) -> str:
+    level = str(risk_level or "").upper()
+    if level in ("HIGH", "CRITICAL"):
+        return HIGH
+    if level in ("MODERATE", "MEDIUM"):
+        return MODERATE
+    return LOW
+
+
+def symptom_list(record: Dict[str, Any], language: str) -> str:
+    ids = record_symptom_ids(record)
+    if ids and OTHER_SYMPTOM_ID not in ids:
+        labels = SYMPTOM_LABELS.get(language, {})
+        names: List[str] = [labels.get(i) or symptom_name(i) or str(i) for i in ids]
+    else:
+        # Some symptoms were not in the vocabulary: quote what the user wrote
+        names = [str(s) for s in record.get("symptoms") or []]
+    return _SYMPTOM_SEPARATOR[language].join(names) or _NO_SYMPTOMS[language]
+
+
+def render_checkin(record: Dict[str, Any], language: Optional[str] = "en", now: Optional[datetime] = None) -> str:
+    """Check-in message for a due follow-up, filled from the health record"""
+    language = normalize_language(language)
+    now = now or datetime.utcnow()
+    reported_at = record.get("reported_at") or now
+    hours = max(0, int((now - reported_at).total_seconds() // 3600))
+    risk = str(record.get("risk_level") or "MODERATE").upper()
+    return CHECKIN_TEMPLATES[language][risk_tier(risk)].format(
+        symptoms=symptom_list(record, language),
+        hours_ago=hours,
+        days_ago=max(1, round(hours / 24)),
+        risk_level=RISK_LABELS[language].get(risk, risk.title()),
+    )
+
+
+def render_reply(outcome: str, language: Optional[str] = "en") -> str:
+    return REPLY_TEMPLATES[normalize_language(language)][outcome]
+
+
+# ========== REPLY CLASSIFICATION ==========
+# Deliberately conservative: only short, unambiguous "I'm fine" replies are
+# answered from a template; everything else goes to the triage crew. Bare
+# affirmatives ("yes", "हाँ") are not recovery - "yes, vomiting" is a report.
+
+_RECOVERED_PHRASES = (
+    "better", "recovered", "all good", "i am ok", "i'm ok", "im ok", "well now",
+    "theek", "thik", "behtar", "accha", "achha",
+    "ठीक", "बेहतर", "अच्छा",
+    "bara", "bare", "बरा", "बरी", "बरे",
+)
+_NEEDS_REVIEW_MARKERS = (
+    "not", "no ", "still", "worse", "new", "but", "pain", "fever", "help",
+    "nahi", "nahin", "नहीं", "नही", "अभी भी", "फिर", "बदतर", "नया", "लेकिन",
+    "नाही", "अजून", "पण", "वाढ", "नवीन",
+)
+_MAX_WORDS = 8
+
+
+def classify_reply(text: Optional[str]) -> Optional[str]:
+    """RECOVERED for a short recovery confirmation, else None (needs triage)"""
+    normalized = re.sub(r"\s+", " ", str(text or "").strip().lower())
+    if not normalized or len(normalized.split(" ")) > _MAX_WORDS:
+        return None
+    if match_symptoms(normalized):
+        # Any symptom mention, however brief, is re-evaluated by triage
+        return None
+    padded = f" {normalized} "
+    if any(marker in padded for marker in _NEEDS_REVIEW_MARKERS):
+        return None
+    if any(re.search(rf"(^|\W){re.escape(phrase)}($|\W)", normalized) for phrase in _RECOVERED_PHRASES):
+        return RECOVERED
+    return None
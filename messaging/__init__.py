@@ -0,0 +1,31 @@
+from .broadcast import BroadcastEngine, BroadcastProgress, get_broadcast_engine
+from .outbox import (
+    OutboxDispatcher,
+    enqueue_message,
+    enqueue_messages,
+    start_outbox_dispatcher,
+    stop_outbox_dispatcher,
+)
+from .client import (
+    SendResult,
+    TelegramAPIError,
+    TelegramClient,
+    close_telegram_client,
+    get_telegram_client,
+)
+
+__all__ = [
+    "BroadcastEngine",
+    "BroadcastProgress",
+    "get_broadcast_engine",
+    "OutboxDispatcher",
+    "enqueue_message",
+    "enqueue_messages",
+    "start_outbox_dispatcher",
+    "stop_outbox_dispatcher",
+    "SendResult",
+    "TelegramAPIError",
+    "TelegramClient",
+    "close_telegram_client",
+    "get_telegram_client",
+]
@@ -0,0 +1,266 @@
+# messaging/broadcast.py
+import asyncio
+import concurrent.futures
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel
+from pymongo import UpdateOne
+
+from config import settings
+from database import db
+from database.user_cache import get_user_cache
+from utils import log
+from utils.translation import translate_text_sync
+
+from .client import TelegramClient, get_telegram_client
+
+broadcast_jobs_collection = db["broadcast_jobs"]
+broadcast_deliveries_collection = db["broadcast_deliveries"]
+
+class BroadcastProgress(BaseModel):
+    """Snapshot of a broadcast job, read from its job record"""
+
+    job_id: str
+    status: str
+    total: int
+    sent: int = 0
+    failed: int = 0
+    pending: int = 0
+    languages: Dict[str, int] = {}
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    rate_per_second: Optional[float] = None
+
+    @classmethod
+    def from_doc(cls, doc: Dict) -> "BroadcastProgress":
+        sent, failed, total = doc.get("sent", 0), doc.get("failed", 0), doc.get("total", 0)
+        started, finished = doc.get("started_at"), doc.get("finished_at")
+        rate = None
+        if started:
+            elapsed = ((finished or datetime.utcnow()) - started).total_seconds()
+            rate = round((sent + failed) / elapsed, 2) if elapsed > 0 else None
+        return cls(
+            job_id=doc["_id"],
+            status=doc.get("status", "pending"),
+            total=total,
+            sent=sent,
+            failed=failed,
+            pending=max(0, total - sent - failed),
+            languages=doc.get("languages", {}),
+            created_at=doc.get("created_at"),
+            started_at=started,
+            finished_at=finished,
+            rate_per_second=rate,
+        )
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class BroadcastEngine:
+    """
+    Fan-out delivery of one message to many chats.
+
+    Recipients are grouped by preferred language and the message is
+    translated once per language. Each recipient gets a delivery row, so
+    an interrupted job resumes from whatever is still pending. Sends run
+    concurrently on the Telegram client's loop and are paced by its token
+    buckets; results are flushed to Mongo in batches.
+    """
+
+    def __init__(
+        self,
+        client: Optional[TelegramClient] = None,
+        concurrency: int = settings.BROADCAST_CONCURRENCY,
+        flush_interval: float = 1.0,
+    ):
+        self.client = client or get_telegram_client()
+        self.concurrency = concurrency
+        self.flush_interval = flush_interval
+        self._running: Dict[str, concurrent.futures.Future] = {}
+        self._ensure_indexes()
+
+    @staticmethod
+    def _ensure_indexes() -> None:
+        try:
+            broadcast_deliveries_collection.create_index([("job_id", 1), ("chat_id", 1)], unique=True)
+            broadcast_deliveries_collection.create_index([("job_id", 1), ("status", 1)])
+            broadcast_jobs_collection.create_index("status")
+        except Exception as e:
+            log.warning(f"⚠️ Could not create broadcast indexes: {e}")
+
+    # ========== JOB CREATION ==========
+
+    def create_job(self, chat_ids: Iterable, message: str, parse_mode: Optional[str] = "HTML") -> str:
+        """Resolve languages, translate each variant once and persist the job"""
+        recipients = list(dict.fromkeys(str(c).strip() for c in chat_ids if str(c).strip()))
+        languages = get_user_cache().get_languages(recipients)
+
+        by_language: Dict[str, int] = {}
+        for lang in languages.values():
+            by_language[lang] = by_language.get(lang, 0) + 1
+
+        variants = {}
+        for lang in by_language:
+            variants[lang] = message if lang == "en" else (translate_text_sync(message, lang) or message)
+
+        job_id = f"BC-{datetime.utcnow():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:6]}"
+        broadcast_jobs_collection.insert_one({
+            "_id": job_id,
+            "status": "pending",
+            "message": message,
+            "parse_mode": parse_mode,
+            "variants": variants,
+            "languages": by_language,
+            "total": len(recipients),
+            "sent": 0,
+            "failed": 0,
+            "created_at": datetime.utcnow(),
+        })
+        for chunk in _chunks(recipients, 1000):
+            broadcast_deliveries_collection.insert_many(
+                [
+                    {"job_id": job_id, "chat_id": chat_id, "language": languages[chat_id], "status": "pending"}
+                    for chat_id in chunk
+                ],
+                ordered=False,
+            )
+
+        log.info(f"📣 Broadcast {job_id} created: {len(recipients)} recipients, languages={by_language}")
+        return job_id
+
+    # ========== DELIVERY ==========
+
+    async def run(
+        self,
+        job_id: str,
+        on_progress: Optional[Callable[[BroadcastProgress], None]] = None,
+    ) -> BroadcastProgress:
+        """Deliver every pending recipient of a job; safe to call again to resume"""
+        job = await asyncio.to_thread(broadcast_jobs_collection.find_one, {"_id": job_id})
+        if not job:
+            raise ValueError(f"Unknown broadcast job: {job_id}")
+
+        pending = await asyncio.to_thread(
+            lambda: list(broadcast_deliveries_collection.find(
+                {"job_id": job_id, "status": "pending"},
+                {"chat_id": 1, "language": 1},
+            ))
+        )
+        await asyncio.to_thread(
+            broadcast_jobs_collection.update_one,
+            {"_id": job_id},
+            {"$set": {"status": "running", "started_at": job.get("started_at") or datetime.utcnow()}},
+        )
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for delivery in pending:
+            queue.put_nowait(delivery)
+        results: List[Dict] = []
+        counters = {"sent": 0, "failed": 0}
+        variants, parse_mode = job["variants"], job.get("parse_mode")
+
+        async def worker():
+            while True:
+                try:
+                    delivery = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                text = variants.get(delivery["language"]) or job["message"]
+                result = await self.client.send_message(delivery["chat_id"], text, parse_mode=parse_mode)
+                outcome = "sent" if result.ok else "failed"
+                counters[outcome] += 1
+                results.append({
+                    "_id": delivery["_id"],
+                    "status": outcome,
+                    "attempts": result.attempts,
+                    "error": result.error,
+                    "permanent": result.permanent,
+                    "message_id": result.message_id,
+                    "finished_at": datetime.utcnow(),
+                })
+
+        async def flush():
+            if not results:
+                return
+            batch = results[:]
+            del results[:]
+            sent = sum(1 for r in batch if r["status"] == "sent")
+            operations = [UpdateOne({"_id": r.pop("_id")}, {"$set": r}) for r in batch]
+            await asyncio.to_thread(broadcast_deliveries_collection.bulk_write, operations, ordered=False)
+            await asyncio.to_thread(
+                broadcast_jobs_collection.update_one,
+                {"_id": job_id},
+                {"$inc": {"sent": sent, "failed": len(batch) - sent}},
+            )
+            if on_progress:
+                on_progress(await asyncio.to_thread(self.progress, job_id))
+
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, len(pending)) or 1)]
+        done = asyncio.ensure_future(asyncio.gather(*workers))
+        started = time.perf_counter()
+        while not done.done():
+            await asyncio.wait({done}, timeout=self.flush_interval)
+            await flush()
+        await done
+
+        finished = datetime.utcnow()
+        await asyncio.to_thread(
+            broadcast_jobs_collection.update_one,
+            {"_id": job_id},
+            {"$set": {"status": "completed", "finished_at": finished}},
+        )
+        elapsed = time.perf_counter() - started
+        log.info(
+            f"✅ Broadcast {job_id} finished: {counters['sent']} sent, "
+            f"{counters['failed']} failed in {elapsed:.1f}s"
+        )
+        return await asyncio.to_thread(self.progress, job_id)
+
+    def submit(self, job_id: str) -> concurrent.futures.Future:
+        """Start (or resume) a job on the client's loop and return immediately"""
+        future = self._running.get(job_id)
+        if future is None or future.done():
+            future = self._running[job_id] = self.client.submit(self.run(job_id))
+        return future
+
+    def run_sync(self, job_id: str, wait: Optional[float] = None) -> BroadcastProgress:
+        """Start a job and wait up to `wait` seconds; the job keeps running after that"""
+        future = self.submit(job_id)
+        try:
+            return future.result(timeout=wait)
+        except concurrent.futures.TimeoutError:
+            return self.progress(job_id)
+
+    @staticmethod
+    def progress(job_id: str) -> Optional[BroadcastProgress]:
+        doc = broadcast_jobs_collection.find_one({"_id": job_id}, {"variants": 0, "message": 0})
+        return BroadcastProgress.from_doc(doc) if doc else None
+
+    def resume_unfinished(self) -> List[str]:
+        """Resume jobs left pending or running by a previous process"""
+        job_ids = [d["_id"] for d in broadcast_jobs_collection.find({"status": {"$in": ["pending", "running"]}}, {"_id": 1})]
+        for job_id in job_ids:
+            log.info(f"🔁 Resuming broadcast {job_id}")
+            self.submit(job_id)
+        return job_ids
+
+
+# Process-wide engine
+_engine_instance: Optional[BroadcastEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_broadcast_engine() -> BroadcastEngine:
+    global _engine_instance
+    with _engine_lock:
+        if _engine_instance is None:
+            _engine_instance = BroadcastEngine()
+        return _engine_instance
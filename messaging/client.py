@@ -0,0 +1,274 @@
+# messaging/client.py
+import asyncio
+import concurrent.futures
+import random
+import threading
+import time
+from typing import Any, Coroutine, Dict, Optional
+
+import httpx
+from pydantic import BaseModel
+
+from config import settings
+from utils import log
+from utils.metrics import LatencyRecorder, get_recorder
+
+from .ratelimit import TelegramRateLimiter
+
+
+class TelegramAPIError(Exception):
+    """A Bot API call that failed for good (after retries, or not retryable)"""
+
+    def __init__(self, description: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(description)
+        self.description = description
+        self.status = status
+        self.retry_after = retry_after
+        self.attempts = 1
+
+    @property
+    def permanent(self) -> bool:
+        """Bad request / blocked bot / missing chat: retrying will not help"""
+        return self.status in (400, 401, 403, 404)
+
+
+class SendResult(BaseModel):
+    """Outcome of a single sendMessage call"""
+
+    ok: bool
+    chat_id: str
+    message_id: Optional[int] = None
+    attempts: int = 1
+    latency_ms: float = 0.0
+    error: Optional[str] = None
+    permanent: bool = False
+
+
+class _LoopThread:
+    """
+    Event loop on a daemon thread that owns the HTTP pool. Sync callers
+    (CrewAI tools, which run inside crew.kickoff on whatever thread called
+    it) and async callers (handlers on the FastAPI loop) both submit their
+    coroutines here, so there is one pool and no cross-loop sharing.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                ready = threading.Event()
+                loop = asyncio.new_event_loop()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    ready.set()
+                    loop.run_forever()
+
+                threading.Thread(target=run, name=self._name, daemon=True).start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Block the calling thread until `coro` finishes on the loop thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def run_async(self, coro: Coroutine) -> Any:
+        """Await `coro` on the loop thread from another event loop"""
+        if asyncio.get_running_loop() is self._loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+
+class TelegramClient:
+    """
+    Bot API client over a persistent pooled HTTP/1.1 session.
+
+    Every call gets a timeout; 429s wait for the `retry_after` Telegram
+    returns, 5xx and network errors back off exponentially, and 4xx
+    errors fail immediately. Messages pass through the global and
+    per-chat token buckets, and a 429 pauses the global bucket so
+    concurrent senders back off together. Latency of each call
+    (including retries) is recorded under `telegram.<method>`.
+    """
+
+    def __init__(
+        self,
+        token: str = settings.TELEGRAM_BOT_TOKEN,
+        base_url: str = settings.TELEGRAM_API_BASE,
+        timeout: float = settings.TELEGRAM_TIMEOUT_SECONDS,
+        max_retries: int = settings.TELEGRAM_MAX_RETRIES,
+        pool_size: int = settings.TELEGRAM_POOL_SIZE,
+    ):
+        self._url = f"{base_url.rstrip('/')}/bot{token}"
+        self._timeout = timeout
+        self.max_retries = max_retries
+        self._pool_size = pool_size
+        self._http: Optional[httpx.AsyncClient] = None
+        self._runner = _LoopThread("telegram-client")
+        self.limiter = TelegramRateLimiter()
+
+    def _session(self) -> httpx.AsyncClient:
+        # Only ever touched from the loop thread
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(self._timeout, connect=min(self._timeout, 5.0)),
+                limits=httpx.Limits(
+                    max_connections=self._pool_size,
+                    max_keepalive_connections=self._pool_size,
+                    keepalive_expiry=60.0,
+                ),
+            )
+        return self._http
+
+    @staticmethod
+    def metrics(method: str) -> LatencyRecorder:
+        return get_recorder(f"telegram.{method}")
+
+    # ========== CORE (runs on the loop thread) ==========
+
+    async def _call(self, method: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        recorder = self.metrics(method)
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = await self._session().post(f"{self._url}/{method}", json=payload)
+                body = response.json() if response.content else {}
+                if response.status_code == 200 and body.get("ok"):
+                    recorder.record(time.perf_counter() - start)
+                    result = body.get("result") or {}
+                    return {"result": result, "attempts": attempt}
+
+                retry_after = (body.get("parameters") or {}).get("retry_after")
+                error = TelegramAPIError(
+                    body.get("description") or f"HTTP {response.status_code}",
+                    status=response.status_code,
+                    retry_after=retry_after,
+                )
+            except (httpx.TimeoutException, httpx.TransportError, ValueError) as e:
+                error = TelegramAPIError(f"{type(e).__name__}: {e}")
+
+            if error.permanent or attempt > self.max_retries:
+                recorder.record(time.perf_counter() - start, ok=False)
+                error.attempts = attempt
+                raise error
+
+            if error.status == 429:
+                recorder.incr("rate_limited")
+                delay = float(error.retry_after or 1)
+                self.limiter.pause(delay)
+            else:
+                delay = min(30.0, 0.5 * 2 ** (attempt - 1)) * (0.5 + random.random())
+            recorder.incr("retries")
+            log.warning(f"⚠️ Telegram {method} failed ({error.description}), retry {attempt} in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _send_message(
+        self,
+        chat_id: str,
+        text: str,
+        parse_mode: Optional[str] = "HTML",
+        **extra: Any,
+    ) -> SendResult:
+        payload = {"chat_id": chat_id, "text": text, **extra}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+
+        start = time.perf_counter()
+        await self.limiter.acquire(chat_id)
+        try:
+            try:
+                response = await self._call("sendMessage", payload)
+            except TelegramAPIError as e:
+                # LLM output often contains stray '<' or '&'; resend as plain text
+                if not (parse_mode and e.status == 400 and "parse entities" in e.description):
+                    raise
+                payload.pop("parse_mode")
+                response = await self._call("sendMessage", payload)
+        except TelegramAPIError as e:
+            return SendResult(
+                ok=False,
+                chat_id=str(chat_id),
+                attempts=e.attempts,
+                latency_ms=round((time.perf_counter() - start) * 1000, 2),
+                error=e.description,
+                permanent=e.permanent,
+            )
+
+        return SendResult(
+            ok=True,
+            chat_id=str(chat_id),
+            message_id=response["result"].get("message_id"),
+            attempts=response["attempts"],
+            latency_ms=round((time.perf_counter() - start) * 1000, 2),
+        )
+
+    async def _close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # ========== ASYNC FACADE (handlers) ==========
+
+    async def call(self, method: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Raw Bot API call; raises TelegramAPIError on failure"""
+        response = await self._runner.run_async(self._call(method, payload))
+        return response["result"]
+
+    async def send_message(self, chat_id: str, text: str, parse_mode: Optional[str] = "HTML", **extra: Any) -> SendResult:
+        return await self._runner.run_async(self._send_message(chat_id, text, parse_mode, **extra))
+
+    async def aclose(self) -> None:
+        await self._runner.run_async(self._close())
+        self._runner.stop()
+
+    # ========== SYNC FACADE (CrewAI tools, scheduler jobs) ==========
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the client's loop without waiting for it"""
+        return asyncio.run_coroutine_threadsafe(coro, self._runner.loop)
+
+    def call_sync(self, method: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return self._runner.run(self._call(method, payload))["result"]
+
+    def send_message_sync(self, chat_id: str, text: str, parse_mode: Optional[str] = "HTML", **extra: Any) -> SendResult:
+        return self._runner.run(self._send_message(chat_id, text, parse_mode, **extra))
+
+    def close(self) -> None:
+        self._runner.run(self._close())
+        self._runner.stop()
+
+
+# Process-wide client (one pool per process)
+_client_instance: Optional[TelegramClient] = None
+_client_lock = threading.Lock()
+
+
+def get_telegram_client() -> TelegramClient:
+    global _client_instance
+    with _client_lock:
+        if _client_instance is None:
+            _client_instance = TelegramClient()
+        return _client_instance
+
+
+async def close_telegram_client() -> None:
+    global _client_instance
+    with _client_lock:
+        client, _client_instance = _client_instance, None
+    if client is not None:
+        await client.aclose()
+        log.info("✅ Telegram client closed")
@@ -0,0 +1,375 @@
+# messaging/outbox.py
+import asyncio
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from config import settings
+from database import db
+from utils import log
+from utils.metrics import get_recorder
+
+from .client import TelegramClient, get_telegram_client
+
+outbox_collection = db["outbox"]
+
+PENDING, SENDING, SENT, DEAD = "pending", "sending", "sent", "dead"
+
+
+def _ensure_indexes() -> None:
+    try:
+        outbox_collection.create_index("idempotency_key", unique=True)
+        outbox_collection.create_index([("status", 1), ("next_attempt_at", 1)])
+        outbox_collection.create_index([("status", 1), ("chat_id", 1), ("created_at", 1)])
+        # Claims only look at chat heads; at most one head per chat
+        outbox_collection.create_index([("is_head", 1), ("status", 1), ("next_attempt_at", 1)])
+        outbox_collection.create_index([("is_head", 1), ("status", 1), ("lease_until", 1)])
+        outbox_collection.create_index(
+            "chat_id",
+            unique=True,
+            partialFilterExpression={"is_head": True},
+            name="chat_id_head",
+        )
+        # Delivered messages are kept for a week for auditing
+        outbox_collection.create_index("sent_at", expireAfterSeconds=7 * 24 * 3600)
+    except Exception as e:
+        log.warning(f"⚠️ Could not create outbox indexes: {e}")
+
+
+def default_idempotency_key(chat_id: str) -> str:
+    """
+    A fresh key per message: identical texts are legitimate replies.
+    Callers that need de-duplication pass their own key instead (e.g. the
+    follow-up composer uses the record ID).
+    """
+    return f"{chat_id}:{uuid.uuid4().hex}"
+
+
+def _promote_head(chat_id: str) -> None:
+    """
+    Flag the oldest undelivered message of a chat as its head, the only
+    one that can be claimed. A no-op while the chat already has a head;
+    the partial unique index on chat_id settles concurrent promotions.
+    """
+    oldest = outbox_collection.find_one(
+        {"chat_id": chat_id, "status": {"$in": [PENDING, SENDING]}},
+        {"is_head": 1},
+        sort=[("created_at", 1), ("_id", 1)],
+    )
+    if oldest is None or oldest.get("is_head"):
+        return
+    try:
+        outbox_collection.update_one(
+            {"_id": oldest["_id"], "status": {"$in": [PENDING, SENDING]}},
+            {"$set": {"is_head": True}},
+        )
+    except DuplicateKeyError:
+        pass
+
+
+def _promote_heads(chat_ids) -> None:
+    for chat_id in set(chat_ids):
+        _promote_head(chat_id)
+
+
+def enqueue_message(
+    chat_id: str,
+    text: str,
+    parse_mode: Optional[str] = "HTML",
+    idempotency_key: Optional[str] = None,
+    source: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Persist an outbound message and wake the workers. Returns the outbox
+    entry; an existing entry is returned when the key was already used.
+    """
+    chat_id = str(chat_id)
+    key = idempotency_key or default_idempotency_key(chat_id)
+    now = datetime.utcnow()
+    entry = {
+        "idempotency_key": key,
+        "chat_id": chat_id,
+        "text": text,
+        "parse_mode": parse_mode,
+        "source": source,
+        "status": PENDING,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        "is_head": False,
+    }
+    try:
+        outbox_collection.insert_one(entry)
+    except DuplicateKeyError:
+        get_recorder("outbox").incr("duplicates")
+        log.info(f"♻️ Outbox message for {chat_id} already queued (key={key})")
+        return outbox_collection.find_one({"idempotency_key": key})
+
+    _promote_head(chat_id)
+    get_recorder("outbox").incr("enqueued")
+    if _dispatcher_instance is not None:
+        _dispatcher_instance.wake()
+    return entry
+
+
+def enqueue_messages(messages: List[Dict[str, Any]], source: Optional[str] = None) -> int:
+    """
+    Persist many outbound messages in one write. Each item needs `chat_id`
+    and `text` and may set `parse_mode` (default HTML) and
+    `idempotency_key`. Returns how many were newly queued; items whose key
+    was already used are skipped.
+    """
+    if not messages:
+        return 0
+    now = datetime.utcnow()
+    entries = []
+    for message in messages:
+        chat_id, text = str(message["chat_id"]), message["text"]
+        parse_mode = message.get("parse_mode", "HTML")
+        entries.append({
+            "idempotency_key": message.get("idempotency_key") or default_idempotency_key(chat_id),
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": parse_mode,
+            "source": message.get("source", source),
+            "status": PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            "is_head": False,
+        })
+    try:
+        queued = len(outbox_collection.insert_many(entries, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != 11000 for error in errors):
+            raise
+        queued = e.details.get("nInserted", len(entries) - len(errors))
+        get_recorder("outbox").incr("duplicates", len(errors))
+
+    _promote_heads(entry["chat_id"] for entry in entries)
+    get_recorder("outbox").incr("enqueued", queued)
+    if queued and _dispatcher_instance is not None:
+        _dispatcher_instance.wake()
+    return queued
+
+
+class OutboxDispatcher:
+    """
+    Async workers draining the outbox on the Telegram client's loop.
+
+    A worker claims one due message at a time with a lease, so a crashed
+    process only delays its in-flight messages until the lease expires.
+    Only the oldest undelivered message of each chat is flagged `is_head`
+    and claimable, so a chat's messages go out one at a time and in order,
+    retries included, and a claim is a single indexed update. The next
+    message is promoted once the head is sent or dead-lettered.
+    Transient failures are retried with exponential backoff and jitter;
+    permanent Telegram errors and messages out of attempts are moved to
+    the dead-letter state instead of being dropped.
+    """
+
+    def __init__(
+        self,
+        client: Optional[TelegramClient] = None,
+        workers: int = settings.OUTBOX_WORKERS,
+        max_attempts: int = settings.OUTBOX_MAX_ATTEMPTS,
+        lease_seconds: int = settings.OUTBOX_LEASE_SECONDS,
+        poll_interval: float = 1.0,
+    ):
+        self.client = client or get_telegram_client()
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.metrics = get_recorder("outbox")
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        _ensure_indexes()
+
+    # ========== LIFECYCLE ==========
+
+    @staticmethod
+    def _backfill_heads() -> None:
+        """Promote heads for chats queued before head flags existed"""
+        headless = outbox_collection.distinct(
+            "chat_id",
+            {"status": {"$in": [PENDING, SENDING]}, "is_head": {"$exists": False}},
+        )
+        _promote_heads(headless)
+        if headless:
+            log.info(f"📮 Promoted outbox heads for {len(headless)} chats")
+
+    async def _start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    def start(self) -> None:
+        self._backfill_heads()
+        self.client.submit(self._start()).result()
+        log.info(f"📮 Outbox dispatcher started with {self.workers} workers")
+
+    async def _stop(self, timeout: float) -> None:
+        self._stopping = True
+        self._wakeup.set()
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        self._tasks = []
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Let in-flight sends finish; unsent messages stay in the outbox"""
+        if self._tasks:
+            self.client.submit(self._stop(timeout)).result()
+        log.info("⏹️ Outbox dispatcher stopped")
+
+    def wake(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ========== DELIVERY ==========
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        lease = {
+            "$set": {"status": SENDING, "lease_until": now + timedelta(seconds=self.lease_seconds)},
+            "$inc": {"attempts": 1},
+        }
+        # Due chat heads first, then heads whose worker lost its lease
+        for due, sort in (
+            ({"status": PENDING, "next_attempt_at": {"$lte": now}}, "next_attempt_at"),
+            ({"status": SENDING, "lease_until": {"$lt": now}}, "lease_until"),
+        ):
+            message = outbox_collection.find_one_and_update(
+                {"is_head": True, **due},
+                lease,
+                sort=[(sort, 1)],
+                return_document=ReturnDocument.AFTER,
+            )
+            if message is not None:
+                return message
+        return None
+
+    def _backoff(self, attempts: int) -> float:
+        delay = settings.OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1)
+        return min(settings.OUTBOX_BACKOFF_MAX_SECONDS, delay) * (0.5 + random.random() / 2)
+
+    async def _deliver(self, message: Dict[str, Any]) -> None:
+        result = await self.client.send_message(message["chat_id"], message["text"], parse_mode=message.get("parse_mode"))
+        now = datetime.utcnow()
+
+        if result.ok:
+            update = {"status": SENT, "sent_at": now, "message_id": result.message_id, "last_error": None, "is_head": False}
+            self.metrics.record((now - message["created_at"]).total_seconds())
+            self.metrics.incr("sent")
+        elif result.permanent or message["attempts"] >= self.max_attempts:
+            update = {"status": DEAD, "dead_at": now, "last_error": result.error, "is_head": False}
+            self.metrics.record((now - message["created_at"]).total_seconds(), ok=False)
+            self.metrics.incr("dead")
+            log.error(f"☠️ Outbox message {message['_id']} to {message['chat_id']} dead-lettered: {result.error}")
+        else:
+            delay = self._backoff(message["attempts"])
+            update = {"status": PENDING, "next_attempt_at": now + timedelta(seconds=delay), "last_error": result.error}
+            self.metrics.incr("retries")
+            log.warning(f"⚠️ Outbox message {message['_id']} failed ({result.error}), retry in {delay:.0f}s")
+
+        await asyncio.to_thread(
+            outbox_collection.update_one,
+            {"_id": message["_id"]},
+            {"$set": update, "$unset": {"lease_until": ""}},
+        )
+        if update["status"] in (SENT, DEAD):
+            # The chat's next message becomes claimable
+            await asyncio.to_thread(_promote_head, message["chat_id"])
+
+    async def _worker(self, number: int) -> None:
+        while not self._stopping:
+            try:
+                message = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                log.error(f"❌ Outbox worker {number} could not claim: {e}")
+                message = None
+
+            if message is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._deliver(message)
+            except Exception as e:
+                # Lease expiry hands the message to another worker
+                log.error(f"❌ Outbox worker {number} failed on {message['_id']}: {e}")
+
+    # ========== INSPECTION ==========
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """Counts per status, pending lag and delivery metrics"""
+        counts = {PENDING: 0, SENDING: 0, SENT: 0, DEAD: 0}
+        for doc in outbox_collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[doc["_id"]] = doc["count"]
+
+        oldest = outbox_collection.find_one(
+            {"status": {"$in": [PENDING, SENDING]}},
+            {"created_at": 1},
+            sort=[("created_at", 1)],
+        )
+        lag = (datetime.utcnow() - oldest["created_at"]).total_seconds() if oldest else 0.0
+
+        since = datetime.utcnow() - timedelta(minutes=5)
+        recent = outbox_collection.count_documents({"status": SENT, "sent_at": {"$gte": since}})
+        return {
+            "counts": counts,
+            "oldest_pending_seconds": round(lag, 1),
+            "sent_per_minute": round(recent / 5, 2),
+            "delivery": get_recorder("outbox").snapshot(),
+        }
+
+    @staticmethod
+    def requeue_dead(ids: Optional[List[Any]] = None) -> int:
+        """Move dead-lettered messages back to pending with a fresh attempt budget"""
+        query: Dict[str, Any] = {"status": DEAD}
+        if ids:
+            query["_id"] = {"$in": ids}
+        chat_ids = outbox_collection.distinct("chat_id", query)
+        result = outbox_collection.update_many(
+            query,
+            {"$set": {"status": PENDING, "attempts": 0, "next_attempt_at": datetime.utcnow()}},
+        )
+        _promote_heads(chat_ids)
+        return result.modified_count
+
+
+# Process-wide dispatcher (workers run in the API process)
+_dispatcher_instance: Optional[OutboxDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def start_outbox_dispatcher() -> OutboxDispatcher:
+    global _dispatcher_instance
+    with _dispatcher_lock:
+        if _dispatcher_instance is None:
+            _dispatcher_instance = OutboxDispatcher()
+            _dispatcher_instance.start()
+        return _dispatcher_instance
+
+
+def stop_outbox_dispatcher() -> None:
+    global _dispatcher_instance
+    with _dispatcher_lock:
+        dispatcher, _dispatcher_instance = _dispatcher_instance, None
+    if dispatcher is not None:
+        dispatcher.stop()
@@ -0,0 +1,73 @@
+# messaging/ratelimit.py
+import asyncio
+import time
+from typing import Dict, Optional
+
+from config import settings
+
+
+class TokenBucket:
+    """Async token bucket; not thread-safe, use from a single event loop"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Drain the bucket so nothing is released for `seconds` (e.g. after a 429)"""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class TelegramRateLimiter:
+    """
+    Telegram's documented limits: ~30 messages/second per bot overall and
+    about one message/second to any single chat. Per-chat buckets are
+    created lazily and pruned once they refill.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = settings.TELEGRAM_GLOBAL_RATE,
+        per_chat_rate: float = settings.TELEGRAM_PER_CHAT_RATE,
+        max_chats: int = 10_000,
+    ):
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_chat_rate = per_chat_rate
+        self.max_chats = max_chats
+        self._chats: Dict[str, TokenBucket] = {}
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.max_chats:
+                self._chats = {k: b for k, b in self._chats.items() if not b.full}
+            bucket = self._chats[chat_id] = TokenBucket(self.per_chat_rate, capacity=1.0)
+        return bucket
+
+    async def acquire(self, chat_id: str) -> None:
+        await self._chat_bucket(str(chat_id)).acquire()
+        await self.global_bucket.acquire()
+
+    def pause(self, seconds: float) -> None:
+        self.global_bucket.pause(seconds)
@@ -5,6 +5,8 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+import os
+import requests
 import networkx as nx
 from pyvis.network import Network
 import streamlit.components.v1 as components
@@ -60,6 +62,22 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# =============================================================================
+# LIVE SURVEILLANCE SNAPSHOT
+# =============================================================================
+API_URL = os.getenv("SWASTHAI_API_URL", "http://localhost:8000")
+ADMIN_KEY = os.getenv("SWASTHAI_ADMIN_KEY", "")
+
+@st.cache_data(ttl=30)
+def load_surveillance_snapshot():
+    """Latest surveillance snapshot from the API (None if it is not reachable)"""
+    try:
+        response = requests.get(f"{API_URL}/surveillance", timeout=5)
+        response.raise_for_status()
+        return response.json()
+    except requests.RequestException:
+        return None
+
 # =============================================================================
 # DUMMY DATA GENERATORS
 # =============================================================================
@@ -329,6 +347,27 @@ if selected == "🏠 Overview":
 elif selected == "📊 Surveillance":
     st.markdown('<div class="main-header">📊 Disease Surveillance Dashboard</div>', unsafe_allow_html=True)
     
+    # Live snapshot (computed by the scheduled analysis, not per viewer)
+    live = load_surveillance_snapshot()
+    if live and live.get("snapshot"):
+        snapshot, freshness = live["snapshot"], live["freshness"]
+        st.subheader("📡 Live Surveillance Snapshot")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Reports", snapshot["total_reports"], help=f"Last {snapshot['window_hours']}h")
+        col2.metric("Anomalies", len(snapshot["anomalies"]))
+        col3.metric("Escalations", len(snapshot["escalations"]))
+        col4.metric("Snapshot", f"v{freshness['version']}", f"{freshness['age_seconds'] / 60:.0f} min old",
+                    delta_color="inverse" if freshness["stale"] else "off")
+        if ADMIN_KEY and st.button("🔄 Refresh now"):
+            with st.spinner("Running surveillance analysis..."):
+                requests.post(f"{API_URL}/surveillance/refresh", headers={"X-Admin-Key": ADMIN_KEY}, timeout=300)
+            load_surveillance_snapshot.clear()
+            st.rerun()
+        for syndrome in snapshot["syndromes"]:
+            if syndrome["elevated"]:
+                st.markdown(f'<div class="alert-box">⚠ <strong>{syndrome["syndrome"].title()} syndrome:</strong> {syndrome["count"]} reports vs {syndrome["expected_count"]} expected at the baseline rate</div>', unsafe_allow_html=True)
+        st.markdown("---")
+    
     surv_data = generate_surveillance_data()
     symptom_data = generate_symptom_distribution()
     
@@ -0,0 +1,18 @@
+from .pipeline import (
+    AuthoritySubmission,
+    ReportingPipeline,
+    get_reporting_pipeline,
+    new_submission_id,
+    stop_reporting_pipeline,
+)
+from .submission_log import SubmissionLog, get_submission_log
+
+__all__ = [
+    "AuthoritySubmission",
+    "ReportingPipeline",
+    "get_reporting_pipeline",
+    "new_submission_id",
+    "stop_reporting_pipeline",
+    "SubmissionLog",
+    "get_submission_log",
+]
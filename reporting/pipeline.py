@@ -0,0 +1,269 @@
+# reporting/pipeline.py
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+from bson import ObjectId
+from pydantic import BaseModel, Field
+from pymongo import UpdateOne
+
+from config import settings
+from database import db
+from utils import log
+from utils.metrics import get_recorder
+
+from .submission_log import get_submission_log
+
+authority_submissions_collection = db["authority_submissions"]
+
+PENDING, SENDING, DELIVERED, FAILED = "pending", "sending", "delivered", "failed"
+
+MOCK_RESPONSE = "Alert received and logged. Investigation team will be notified."
+
+
+def new_submission_id() -> str:
+    """Unique across processes and within the same second (ObjectId counter)"""
+    return f"SUB-{datetime.utcnow():%Y%m%d}-{ObjectId()}"
+
+
+class AuthoritySubmission(BaseModel):
+    """One structured alert report for the health authority"""
+
+    submission_id: str = Field(default_factory=new_submission_id)
+    alert_type: str
+    severity: str
+    location: str
+    case_count: int = 0
+    symptoms: List[str] = []
+    summary: str = ""
+    reported_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ReportingPipeline:
+    """
+    Queues authority submissions in Mongo and delivers them in batches.
+
+    A background thread claims up to `batch_size` pending submissions
+    every `interval` seconds (sooner when the batch fills), POSTs them as
+    one payload to AUTHORITY_ENDPOINT and records the per-submission
+    receipts. Failed batches go back to pending with exponential backoff;
+    the authority de-duplicates by submission ID, so retries are safe.
+    Without an endpoint, batches are acknowledged locally (mock mode).
+    """
+
+    def __init__(
+        self,
+        endpoint: Optional[str] = settings.AUTHORITY_ENDPOINT,
+        batch_size: int = settings.REPORTING_BATCH_SIZE,
+        interval: float = settings.REPORTING_BATCH_INTERVAL_SECONDS,
+        max_attempts: int = settings.REPORTING_MAX_ATTEMPTS,
+        http_client: Optional[httpx.Client] = None,
+    ):
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = max(60, int(settings.REPORTING_TIMEOUT_SECONDS * 4))
+        self.metrics = get_recorder("authority_reporting")
+        self._http = http_client or httpx.Client(timeout=settings.REPORTING_TIMEOUT_SECONDS)
+        self._queued = 0
+        self._queued_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._ensure_indexes()
+
+    @staticmethod
+    def _ensure_indexes() -> None:
+        try:
+            authority_submissions_collection.create_index([("status", 1), ("next_attempt_at", 1)])
+            authority_submissions_collection.create_index("batch_id")
+        except Exception as e:
+            log.warning(f"⚠️ Could not create authority submission indexes: {e}")
+
+    # ========== QUEUEING ==========
+
+    def submit(self, submission: AuthoritySubmission) -> str:
+        """Queue a submission and return its ID immediately"""
+        now = datetime.utcnow()
+        doc = submission.model_dump()
+        authority_submissions_collection.insert_one({
+            "_id": submission.submission_id,
+            **doc,
+            "status": PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "queued_at": now,
+        })
+        get_submission_log().append({**doc, "status": "queued", "timestamp": now.isoformat()})
+        self.metrics.incr("queued")
+        with self._queued_lock:
+            self._queued += 1
+            if self._queued >= self.batch_size:
+                self._queued = 0
+                self._wakeup.set()
+        return submission.submission_id
+
+    # ========== BATCHING ==========
+
+    def _claim(self) -> List[Dict[str, Any]]:
+        now = datetime.utcnow()
+        due = {"$or": [
+            {"status": PENDING, "next_attempt_at": {"$lte": now}},
+            {"status": SENDING, "lease_until": {"$lt": now}},
+        ]}
+        ids = [d["_id"] for d in authority_submissions_collection.find(due, {"_id": 1}).sort("queued_at", 1).limit(self.batch_size)]
+        if not ids:
+            return []
+        batch_id = f"BATCH-{ObjectId()}"
+        # Re-check the state in the update so two processes never claim the same row
+        authority_submissions_collection.update_many(
+            {"_id": {"$in": ids}, **due},
+            {
+                "$set": {"status": SENDING, "batch_id": batch_id, "lease_until": now + timedelta(seconds=self.lease_seconds)},
+                "$inc": {"attempts": 1},
+            },
+        )
+        return list(authority_submissions_collection.find({"batch_id": batch_id, "status": SENDING}))
+
+    def _payload(self, batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+        fields = AuthoritySubmission.model_fields
+        return {
+            "batch_id": batch[0]["batch_id"],
+            "source": settings.APP_NAME,
+            "generated_at": datetime.utcnow().isoformat(),
+            "submissions": [
+                {**{k: d[k] for k in fields if k in d}, "reported_at": d["reported_at"].isoformat()}
+                for d in batch
+            ],
+        }
+
+    def _post(self, payload: Dict[str, Any]) -> Dict[str, str]:
+        """Submission ID → authority reference"""
+        if not self.endpoint:
+            return {s["submission_id"]: MOCK_RESPONSE for s in payload["submissions"]}
+        response = self._http.post(self.endpoint, json=payload)
+        response.raise_for_status()
+        body = response.json()
+        return {r["submission_id"]: r.get("reference", "") for r in body.get("accepted", [])}
+
+    def _backoff(self, attempts: int) -> float:
+        delay = settings.REPORTING_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1)
+        return min(900.0, delay) * (0.5 + random.random() / 2)
+
+    def flush(self) -> int:
+        """Send one batch; returns how many submissions were delivered"""
+        batch = self._claim()
+        if not batch:
+            return 0
+        batch_id = batch[0]["batch_id"]
+        start = time.perf_counter()
+        try:
+            receipts = self._post(self._payload(batch))
+        except Exception as e:
+            self.metrics.record(time.perf_counter() - start, ok=False)
+            self._failed(batch, str(e))
+            return 0
+        self.metrics.record(time.perf_counter() - start)
+
+        now = datetime.utcnow()
+        delivered = [d["_id"] for d in batch if d["_id"] in receipts]
+        if delivered:
+            authority_submissions_collection.bulk_write([
+                UpdateOne(
+                    {"_id": submission_id},
+                    {"$set": {"status": DELIVERED, "delivered_at": now, "authority_response": receipts[submission_id]},
+                     "$unset": {"lease_until": ""}},
+                )
+                for submission_id in delivered
+            ], ordered=False)
+        rejected = [d for d in batch if d["_id"] not in receipts]
+        if rejected:
+            self._failed(rejected, "not acknowledged by authority")
+        self.metrics.incr("delivered", len(delivered))
+        log.info(f"🏛️ Authority batch {batch_id}: {len(delivered)}/{len(batch)} submissions delivered")
+        return len(delivered)
+
+    def _failed(self, batch: List[Dict[str, Any]], error: str) -> None:
+        now = datetime.utcnow()
+        for doc in batch:
+            if doc["attempts"] >= self.max_attempts:
+                update = {"status": FAILED, "failed_at": now, "last_error": error}
+                self.metrics.incr("failed")
+            else:
+                delay = self._backoff(doc["attempts"])
+                update = {"status": PENDING, "next_attempt_at": now + timedelta(seconds=delay), "last_error": error}
+                self.metrics.incr("retries")
+            authority_submissions_collection.update_one(
+                {"_id": doc["_id"]}, {"$set": update, "$unset": {"lease_until": ""}}
+            )
+        log.warning(f"⚠️ Authority batch {batch[0].get('batch_id')} failed for {len(batch)} submissions: {error}")
+
+    # ========== LIFECYCLE ==========
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # Drain full batches back to back, then wait for the next tick
+                while self.flush() >= self.batch_size:
+                    pass
+            except Exception as e:
+                log.error(f"❌ Authority reporting loop error: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="authority-reporting", daemon=True)
+        self._thread.start()
+        mode = self.endpoint or "mock mode"
+        log.info(f"🏛️ Authority reporting started ({mode}, batches of {self.batch_size} every {self.interval}s)")
+
+    def stop(self) -> None:
+        """Stop the loop after one last flush; undelivered rows stay pending"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=settings.REPORTING_TIMEOUT_SECONDS + 5)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception as e:
+            log.warning(f"⚠️ Final authority flush failed: {e}")
+        self._http.close()
+        log.info("⏹️ Authority reporting stopped")
+
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        counts = {PENDING: 0, SENDING: 0, DELIVERED: 0, FAILED: 0}
+        for doc in authority_submissions_collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[doc["_id"]] = doc["count"]
+        return {"counts": counts, "delivery": get_recorder("authority_reporting").snapshot()}
+
+
+# Process-wide pipeline
+_pipeline_instance: Optional[ReportingPipeline] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_reporting_pipeline() -> ReportingPipeline:
+    """Shared pipeline; its delivery loop starts on first use"""
+    global _pipeline_instance
+    with _pipeline_lock:
+        if _pipeline_instance is None:
+            _pipeline_instance = ReportingPipeline()
+            _pipeline_instance.start()
+        return _pipeline_instance
+
+
+def stop_reporting_pipeline() -> None:
+    global _pipeline_instance
+    with _pipeline_lock:
+        pipeline, _pipeline_instance = _pipeline_instance, None
+    if pipeline is not None:
+        pipeline.stop()
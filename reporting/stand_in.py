@@ -0,0 +1,114 @@
+# reporting/stand_in.py
+"""
+Local stand-in for the health authority's batch reporting API, for tests
+and load runs:
+
+    uvicorn reporting.stand_in:app --port 8099
+
+then set AUTHORITY_ENDPOINT=http://127.0.0.1:8099/api/v1/reports/batch.
+STAND_IN_FAILURE_RATE (0-1) and STAND_IN_LATENCY_MS inject faults.
+"""
+import asyncio
+import os
+import random
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+
+class SubmissionIn(BaseModel):
+    submission_id: str
+    alert_type: str
+    severity: str
+    location: str
+    case_count: int = 0
+    symptoms: List[str] = []
+    summary: str = ""
+    reported_at: datetime
+
+
+class BatchIn(BaseModel):
+    batch_id: str
+    source: str
+    generated_at: datetime
+    submissions: List[SubmissionIn]
+
+
+class Receipt(BaseModel):
+    submission_id: str
+    reference: str
+    duplicate: bool = False
+
+
+class BatchOut(BaseModel):
+    batch_id: str
+    accepted: List[Receipt]
+    received_at: datetime
+
+
+app = FastAPI(title="Health Authority (stand-in)")
+
+# Submission ID → stored submission; the real API is idempotent on this key
+_received: Dict[str, Dict] = {}
+_stats = {"batches": 0, "submissions": 0, "duplicates": 0, "injected_failures": 0, "started": time.time()}
+
+
+def _fault_settings():
+    return float(os.getenv("STAND_IN_FAILURE_RATE", "0")), float(os.getenv("STAND_IN_LATENCY_MS", "0"))
+
+
+@app.post("/api/v1/reports/batch", response_model=BatchOut)
+async def receive_batch(batch: BatchIn) -> BatchOut:
+    failure_rate, latency_ms = _fault_settings()
+    if latency_ms:
+        await asyncio.sleep(latency_ms / 1000)
+    if failure_rate and random.random() < failure_rate:
+        _stats["injected_failures"] += 1
+        raise HTTPException(status_code=503, detail="Injected failure")
+
+    receipts = []
+    for submission in batch.submissions:
+        existing = _received.get(submission.submission_id)
+        if existing is None:
+            reference = f"IDSP-{len(_received) + 1:08d}"
+            _received[submission.submission_id] = {**submission.model_dump(), "reference": reference}
+            _stats["submissions"] += 1
+        else:
+            reference = existing["reference"]
+            _stats["duplicates"] += 1
+        receipts.append(Receipt(submission_id=submission.submission_id, reference=reference, duplicate=existing is not None))
+    _stats["batches"] += 1
+    return BatchOut(batch_id=batch.batch_id, accepted=receipts, received_at=datetime.utcnow())
+
+
+@app.post("/api/v1/reports")
+async def receive_one(submission: SubmissionIn) -> Receipt:
+    """Single-submission endpoint, used as the unbatched baseline in benchmarks"""
+    batch = BatchIn(batch_id=f"single-{submission.submission_id}", source="single", generated_at=datetime.utcnow(), submissions=[submission])
+    return (await receive_batch(batch)).accepted[0]
+
+
+@app.get("/api/v1/reports/{submission_id}")
+async def get_report(submission_id: str) -> Dict:
+    report = _received.get(submission_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Unknown submission")
+    return report
+
+
+@app.get("/stats")
+async def stats() -> Dict:
+    elapsed = time.time() - _stats["started"]
+    return {**_stats, "stored": len(_received), "submissions_per_second": round(_stats["submissions"] / elapsed, 1)}
+
+
+@app.post("/reset")
+async def reset(failure_rate: Optional[float] = None) -> Dict:
+    _received.clear()
+    _stats.update(batches=0, submissions=0, duplicates=0, injected_failures=0, started=time.time())
+    if failure_rate is not None:
+        os.environ["STAND_IN_FAILURE_RATE"] = str(failure_rate)
+    return {"status": "reset"}
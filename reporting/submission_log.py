@@ -0,0 +1,183 @@
+# reporting/submission_log.py
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import portalocker
+
+from config import settings
+from utils import log
+from utils.metrics import get_recorder
+
+
+class SubmissionLog:
+    """
+    Append-only JSONL log of authority submissions.
+
+    Each submission is one line appended under an exclusive file lock, so
+    several processes can share the file and the cost of a submission does
+    not depend on how many came before. Durability uses group commit:
+    writers that arrive while an fsync is running wait for the next one,
+    so a burst of submissions shares a single fsync.
+
+    Lookups by submission ID go through an in-memory offset index that is
+    built on first use and extended incrementally when the file grows.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or settings.DATA_DIR / "mock_gov_submissions.jsonl")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.metrics = get_recorder("submission_log")
+        self._write_lock = threading.Lock()
+        self._sync_cond = threading.Condition()
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+        self._index: Dict[str, int] = {}
+        self._indexed_to = 0
+        self._index_lock = threading.Lock()
+        self._file = open(self.path, "ab")
+        self._migrate_legacy()
+
+    def _migrate_legacy(self) -> None:
+        """One-time import of the old whole-file JSON array"""
+        legacy = self.path.with_suffix(".json")
+        if not legacy.exists():
+            return
+        migrated = 0
+        with self._write_lock:
+            # Held across the whole import so only one process migrates
+            portalocker.lock(self._file, portalocker.LOCK_EX)
+            try:
+                self._file.seek(0, os.SEEK_END)
+                if not legacy.exists() or self._file.tell() > 0:
+                    return
+                try:
+                    with open(legacy, "r", encoding="utf-8") as f:
+                        submissions = json.load(f)
+                except (OSError, ValueError) as e:
+                    log.warning(f"⚠️ Could not read legacy submissions file {legacy}: {e}")
+                    return
+                for submission in submissions:
+                    self._file.write((json.dumps(submission, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                legacy.rename(legacy.with_suffix(".json.migrated"))
+                migrated = len(submissions)
+            finally:
+                portalocker.unlock(self._file)
+        log.info(f"📦 Migrated {migrated} submissions from {legacy.name}")
+
+    # ========== WRITES ==========
+
+    def append(self, submission: Dict[str, Any], durable: bool = True) -> int:
+        """Append one submission; returns its byte offset in the log"""
+        line = (json.dumps(submission, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        start = time.perf_counter()
+        with self._write_lock:
+            portalocker.lock(self._file, portalocker.LOCK_EX)
+            try:
+                self._file.seek(0, os.SEEK_END)
+                offset = self._file.tell()
+                self._file.write(line)
+                self._file.flush()
+            finally:
+                portalocker.unlock(self._file)
+            self._written += 1
+            sequence = self._written
+
+        submission_id = submission.get("submission_id")
+        if submission_id:
+            with self._index_lock:
+                self._index[submission_id] = offset
+        if durable:
+            self._sync(sequence)
+        self.metrics.record(time.perf_counter() - start)
+        return offset
+
+    def _sync(self, sequence: int) -> None:
+        with self._sync_cond:
+            while self._synced < sequence:
+                if self._syncing:
+                    self._sync_cond.wait()
+                    continue
+                # Become the leader: one fsync covers everything written so far
+                self._syncing = True
+                target = self._written
+                self._sync_cond.release()
+                try:
+                    os.fsync(self._file.fileno())
+                finally:
+                    # Wake waiters even if the fsync failed; one of them retries as leader
+                    self._sync_cond.acquire()
+                    self._syncing = False
+                    self._sync_cond.notify_all()
+                self._synced = max(self._synced, target)
+                self.metrics.incr("fsyncs")
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    # ========== READS ==========
+
+    def _scan(self) -> None:
+        """Index lines appended since the last scan (including other processes')"""
+        with self._index_lock, open(self.path, "rb") as f:
+            f.seek(self._indexed_to)
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break  # EOF or a line still being written
+                try:
+                    submission_id = json.loads(line).get("submission_id")
+                except ValueError:
+                    log.warning(f"⚠️ Skipping corrupt submission log line at offset {offset}")
+                    submission_id = None
+                if submission_id:
+                    self._index.setdefault(submission_id, offset)
+                self._indexed_to = f.tell()
+
+    def get(self, submission_id: str) -> Optional[Dict[str, Any]]:
+        """Submission by ID, or None"""
+        with self._index_lock:
+            offset = self._index.get(submission_id)
+        if offset is None:
+            self._scan()
+            with self._index_lock:
+                offset = self._index.get(submission_id)
+            if offset is None:
+                return None
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.endswith(b"\n"):
+                    yield json.loads(line)
+
+    def __len__(self) -> int:
+        self._scan()
+        with self._index_lock:
+            return len(self._index)
+
+
+# Process-wide log
+_log_instance: Optional[SubmissionLog] = None
+_log_lock = threading.Lock()
+
+
+def get_submission_log() -> SubmissionLog:
+    global _log_instance
+    with _log_lock:
+        if _log_instance is None:
+            _log_instance = SubmissionLog()
+        return _log_instance
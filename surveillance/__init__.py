@@ -0,0 +1,26 @@
+from .analysis import SurveillanceReport, run_surveillance_analysis
+from .snapshot import SurveillanceSnapshotCache, get_snapshot_cache, get_surveillance_snapshot
+from .syndromes import SYNDROMES, SymptomCorrelation, compute_correlations
+from .windows import WINDOWS, MultiWindowCounts, load_multi_window_counts
+from .state import (
+    SurveillanceState,
+    get_surveillance_state,
+    refresh_surveillance_state,
+)
+
+__all__ = [
+    "SurveillanceReport",
+    "run_surveillance_analysis",
+    "SurveillanceSnapshotCache",
+    "get_snapshot_cache",
+    "get_surveillance_snapshot",
+    "SYNDROMES",
+    "SymptomCorrelation",
+    "compute_correlations",
+    "WINDOWS",
+    "MultiWindowCounts",
+    "load_multi_window_counts",
+    "SurveillanceState",
+    "get_surveillance_state",
+    "refresh_surveillance_state",
+]
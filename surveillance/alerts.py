@@ -0,0 +1,264 @@
+# surveillance/alerts.py
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from config import settings
+from database import alerts_collection, surveillance_logs_collection
+from utils import log
+from utils.locations import canonical_location_name
+from utils.metrics import get_recorder
+from utils.symptoms import OTHER_SYMPTOM_ID, normalize_symptoms
+
+SEVERITY_RANK = {"low": 0, "moderate": 1, "medium": 1, "high": 2, "critical": 3}
+
+# Delivery channels tracked separately, so logging an alert does not
+# suppress its (first) submission to the authority. SURVEILLANCE marks
+# anomalies already handed to the alert agent by the scheduled analysis.
+ALERT, AUTHORITY, SURVEILLANCE = "alert", "authority", "surveillance"
+
+NEW, ESCALATION, SUPPRESSED = "new", "escalation", "suppressed"
+
+
+def severity_rank(severity: Optional[str]) -> int:
+    return SEVERITY_RANK.get(str(severity or "").strip().lower(), 1)
+
+
+def alert_key(location: Optional[str], symptoms: Optional[Iterable[str]]) -> str:
+    """Stable signature of an alert: canonical location + sorted symptom IDs"""
+    place = canonical_location_name(location) if location else "Unknown"
+    symptoms = [s for s in (symptoms or []) if s]
+    ids = sorted(set(normalize_symptoms(symptoms)) - {OTHER_SYMPTOM_ID})
+    # Unrecognised symptom text still has to dedupe against itself
+    if not ids and symptoms:
+        ids = sorted({str(s).strip().lower() for s in symptoms})
+    return f"{place}|{','.join(str(i) for i in ids) or '*'}"
+
+
+@dataclass
+class _Mark:
+    rank: int
+    case_count: int
+    at: datetime
+    alert_id: Optional[str] = None
+
+
+@dataclass
+class AlertDecision:
+    action: str
+    key: str
+    reason: str
+    previous_id: Optional[str] = None
+    previous_at: Optional[datetime] = None
+    channel: str = ALERT
+    # Mark recorded by check() and the one it replaced, for rollback()
+    _mark: Optional[_Mark] = field(default=None, repr=False)
+    _replaced: Optional[_Mark] = field(default=None, repr=False)
+
+    @property
+    def allowed(self) -> bool:
+        return self.action != SUPPRESSED
+
+
+class AlertIndex:
+    """
+    Correlates alerts by (location, symptom set) and decides, before any
+    write or network call, whether a new one is worth raising.
+
+    Within the suppression window an alert for the same signature is only
+    raised again when it escalates: higher severity, or the case count
+    grew by ALERT_CASE_ESCALATION_FACTOR. Resolving an alert
+    (`is_resolved` / `resolved_at` on the alerts collection) clears it.
+    The index is in memory and rebuilt from unresolved alerts and
+    escalated surveillance runs in the window, refreshed periodically so
+    other processes' alerts count too.
+
+    An allowed check() records its mark straight away, so concurrent
+    callers cannot both pass; callers roll it back with rollback() when
+    the write or submission it guarded fails.
+    """
+
+    def __init__(
+        self,
+        window_hours: float = settings.ALERT_SUPPRESSION_HOURS,
+        case_factor: float = settings.ALERT_CASE_ESCALATION_FACTOR,
+        refresh_seconds: int = 60,
+    ):
+        self.window = timedelta(hours=window_hours)
+        self.case_factor = case_factor
+        self.refresh_interval = timedelta(seconds=refresh_seconds)
+        self.metrics = get_recorder("alert_dedup")
+        self._marks: Dict[Tuple[str, str], _Mark] = {}
+        self._lock = threading.Lock()
+        self._refreshed_at: Optional[datetime] = None
+        try:
+            alerts_collection.create_index([("alert_key", 1), ("is_resolved", 1), ("created_at", -1)])
+            surveillance_logs_collection.create_index("escalated_at", sparse=True)
+        except Exception as e:
+            log.warning(f"⚠️ Could not create alert index: {e}")
+
+    # ========== BACKING STORE ==========
+
+    def _refresh(self, now: datetime) -> None:
+        if self._refreshed_at and now - self._refreshed_at < self.refresh_interval:
+            return
+        since = self._refreshed_at or now - self.window
+        try:
+            active = list(alerts_collection.find(
+                {"alert_key": {"$exists": True}, "is_resolved": {"$ne": True}, "created_at": {"$gte": now - self.window}},
+                {"alert_key": 1, "severity": 1, "case_count": 1, "created_at": 1, "sent_to_authorities": 1},
+            ))
+            resolved = alerts_collection.distinct("alert_key", {"is_resolved": True, "resolved_at": {"$gte": since}})
+            escalated = list(surveillance_logs_collection.find(
+                {"escalated_at": {"$gte": now - self.window}},
+                {"escalated": 1, "escalated_at": 1},
+            ))
+        except Exception as e:
+            log.warning(f"⚠️ Alert index refresh failed: {e}")
+            return
+
+        with self._lock:
+            for key in resolved:
+                self._marks.pop((key, ALERT), None)
+                self._marks.pop((key, AUTHORITY), None)
+            for doc in active:
+                mark = _Mark(severity_rank(doc.get("severity")), int(doc.get("case_count") or 0), doc["created_at"], str(doc["_id"]))
+                channels = (ALERT, AUTHORITY) if doc.get("sent_to_authorities") else (ALERT,)
+                for channel in channels:
+                    current = self._marks.get((doc["alert_key"], channel))
+                    if current is None or current.at < mark.at:
+                        self._marks[(doc["alert_key"], channel)] = mark
+            for doc in escalated:
+                for item in doc.get("escalated") or []:
+                    mark = _Mark(severity_rank(item.get("severity")), int(item.get("case_count") or 0), doc["escalated_at"], str(doc["_id"]))
+                    current = self._marks.get((item["alert_key"], SURVEILLANCE))
+                    if current is None or current.at < mark.at:
+                        self._marks[(item["alert_key"], SURVEILLANCE)] = mark
+            self._refreshed_at = now
+
+    # ========== DECISIONS ==========
+
+    def _decide(self, key: str, rank: int, case_count: int, channel: str, now: datetime) -> AlertDecision:
+        mark = self._marks.get((key, channel))
+        if mark is None or now - mark.at >= self.window:
+            return AlertDecision(NEW, key, "no active alert for this signature", channel=channel)
+        if rank > mark.rank:
+            return AlertDecision(ESCALATION, key, "severity increased", mark.alert_id, mark.at, channel)
+        if mark.case_count and case_count >= mark.case_count * self.case_factor:
+            return AlertDecision(
+                ESCALATION, key, f"cases grew from {mark.case_count} to {case_count}", mark.alert_id, mark.at, channel
+            )
+        return AlertDecision(
+            SUPPRESSED, key, f"already alerted at {mark.at:%Y-%m-%d %H:%M} UTC without escalation",
+            mark.alert_id, mark.at, channel,
+        )
+
+    def check(
+        self,
+        location: Optional[str],
+        symptoms: Optional[Iterable[str]],
+        severity: Optional[str],
+        case_count: int = 0,
+        channel: str = ALERT,
+        alert_id: Optional[str] = None,
+    ) -> AlertDecision:
+        """Decide and, when allowed, record the alert on `channel`"""
+        now = datetime.utcnow()
+        self._refresh(now)
+        key = alert_key(location, symptoms)
+        rank, case_count = severity_rank(severity), int(case_count or 0)
+
+        with self._lock:
+            decision = self._decide(key, rank, case_count, channel, now)
+            if decision.allowed:
+                decision._replaced = self._marks.get((key, channel))
+                decision._mark = _Mark(rank, case_count, now, alert_id)
+                self._marks[(key, channel)] = decision._mark
+
+        self.metrics.incr(decision.action)
+        if not decision.allowed:
+            log.info(f"🔕 Suppressed duplicate {channel} for {key}: {decision.reason}")
+        return decision
+
+    def peek(
+        self,
+        location: Optional[str],
+        symptoms: Optional[Iterable[str]],
+        severity: Optional[str],
+        case_count: int = 0,
+        channel: str = ALERT,
+    ) -> AlertDecision:
+        """What check() would decide, without recording anything"""
+        now = datetime.utcnow()
+        self._refresh(now)
+        with self._lock:
+            return self._decide(alert_key(location, symptoms), severity_rank(severity), int(case_count or 0), channel, now)
+
+    def rollback(self, decision: AlertDecision) -> None:
+        """Undo the mark of an allowed check() whose write or submission failed"""
+        if decision._mark is None:
+            return
+        with self._lock:
+            slot = (decision.key, decision.channel)
+            if self._marks.get(slot) is decision._mark:
+                if decision._replaced is not None:
+                    self._marks[slot] = decision._replaced
+                else:
+                    self._marks.pop(slot, None)
+        self.metrics.incr("rolled_back")
+        log.info(f"↩️ Rolled back {decision.channel} mark for {decision.key}")
+
+    def attach(self, key: str, alert_id: str, channel: str = ALERT) -> None:
+        """Link the recorded mark to the alert document once it has an ID"""
+        with self._lock:
+            mark = self._marks.get((key, channel))
+            if mark is not None:
+                mark.alert_id = alert_id
+
+    def mark_submitted(self, key: str) -> None:
+        """Flag the active alert for `key` as sent to the authority"""
+        with self._lock:
+            mark = self._marks.get((key, ALERT))
+        if mark and mark.alert_id:
+            from bson import ObjectId
+            alert_id = ObjectId(mark.alert_id) if ObjectId.is_valid(mark.alert_id) else mark.alert_id
+            alerts_collection.update_one({"_id": alert_id}, {"$set": {"sent_to_authorities": True}})
+
+    def resolve(self, location: Optional[str], symptoms: Optional[Iterable[str]]) -> int:
+        """Resolve active alerts for a signature; the next one is raised as new"""
+        key = alert_key(location, symptoms)
+        result = alerts_collection.update_many(
+            {"alert_key": key, "is_resolved": {"$ne": True}},
+            {"$set": {"is_resolved": True, "resolved_at": datetime.utcnow()}},
+        )
+        with self._lock:
+            self._marks.pop((key, ALERT), None)
+            self._marks.pop((key, AUTHORITY), None)
+        log.info(f"✅ Resolved {result.modified_count} alerts for {key}")
+        return result.modified_count
+
+    def active(self) -> Dict[str, Dict]:
+        """Active alert signatures with their last severity and time"""
+        now = datetime.utcnow()
+        self._refresh(now)
+        names = {rank: name for name, rank in SEVERITY_RANK.items() if name != "medium"}
+        with self._lock:
+            return {
+                key: {"severity": names[mark.rank], "case_count": mark.case_count, "at": mark.at, "alert_id": mark.alert_id}
+                for (key, channel), mark in self._marks.items()
+                if channel == ALERT and now - mark.at < self.window
+            }
+
+
+# Process-wide index
+_index_instance: Optional[AlertIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_alert_index() -> AlertIndex:
+    global _index_instance
+    with _index_lock:
+        if _index_instance is None:
+            _index_instance = AlertIndex()
+        return _index_instance
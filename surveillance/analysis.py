@@ -0,0 +1,211 @@
+# surveillance/analysis.py
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from config import settings
+from database import SurveillanceLog, surveillance_logs_collection
+from utils import log
+from utils.metrics import get_recorder
+from utils.symptoms import symptom_id
+
+from .alerts import SURVEILLANCE, get_alert_index
+from .detectors import run_detectors, summarize_detections
+from .series import load_daily_rollup_series
+from .snapshot import get_snapshot_cache
+from .state import refresh_surveillance_state
+from .syndromes import compute_correlations
+from .windows import load_multi_window_counts
+
+MAX_LOGGED_ANOMALIES = 50
+MAX_SUMMARY_ESCALATIONS = 10
+
+
+def needs_escalation(anomaly: Dict[str, Any]) -> bool:
+    """Same rule the run_outbreak_detectors tool reports as escalation_required"""
+    return len(anomaly["detectors"]) >= 2 or anomaly["severity"] == "high"
+
+
+@dataclass
+class SurveillanceReport:
+    log_id: str
+    window_start: datetime
+    window_end: datetime
+    total_reports: int
+    anomalies: List[Dict[str, Any]]
+    escalations: List[Dict[str, Any]] = field(default_factory=list)
+    suppressed: int = 0
+    syndromes: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def escalation(self) -> bool:
+        return bool(self.escalations)
+
+    def summary(self) -> str:
+        """Compact, LLM-ready description of what needs escalating"""
+        lines = [
+            f"Surveillance window {self.window_start:%Y-%m-%d %H:%M} to {self.window_end:%Y-%m-%d %H:%M} UTC: "
+            f"{self.total_reports} reports, {len(self.anomalies)} anomalous series, "
+            f"{len(self.escalations)} need escalation ({self.suppressed} already alerted)."
+        ]
+        for a in self.escalations[:MAX_SUMMARY_ESCALATIONS]:
+            lines.append(
+                f"- {a['location']} / {a['symptom']}: {a['observed']:.0f} cases today vs "
+                f"{a['expected']:.1f} expected; severity {a['severity']}; "
+                f"detectors {', '.join(a['detectors'])}; {a['decision']}"
+            )
+            if a.get("windows"):
+                recent = ", ".join(f"{w} {n}" for w, n in a["windows"].items())
+                lines.append(f"  recent cases: {recent}")
+        if len(self.escalations) > MAX_SUMMARY_ESCALATIONS:
+            lines.append(f"- … and {len(self.escalations) - MAX_SUMMARY_ESCALATIONS} more")
+        for s in self.syndromes:
+            if s["elevated"]:
+                lines.append(
+                    f"- {s['syndrome']} syndrome ({' + '.join(s['symptoms'])}): "
+                    f"{s['count']} reports vs {s['expected_count']:.1f} expected at the "
+                    f"{settings.SYNDROME_BASELINE_DAYS}-day baseline rate"
+                )
+        return "\n".join(lines)
+
+
+def run_surveillance_analysis(
+    time_window_hours: float = settings.SPIKE_WINDOW_HOURS,
+    baseline_days: int = settings.DETECTOR_BASELINE_DAYS,
+    detectors=("ewma", "cusum", "poisson"),
+) -> SurveillanceReport:
+    """
+    One surveillance pass in code: windowed counts from the sliding-window
+    state, the statistical detectors over every (location, symptom)
+    series, and de-duplication of escalations against active alerts.
+    The run is recorded as a SurveillanceLog and published as the latest
+    surveillance snapshot; no LLM is involved.
+    """
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    state = refresh_surveillance_state()
+
+    # Daily detector matrix summed from the hourly rollups, not raw records
+    matrix = load_daily_rollup_series(days=int(baseline_days) + 1, end=now)
+    anomalies = summarize_detections(run_detectors(matrix, detectors))
+    # 1h…7d counts for every series from one read of the hourly rollups,
+    # so escalations show whether a spike is still building
+    windows = load_multi_window_counts(end=now)
+    syndromes = compute_correlations(state, time_window_hours)[0].syndromes()
+
+    # Anything already escalated for the same signature is not narrated
+    # again; the mark itself is only recorded by record_escalation(), once
+    # the escalation has actually gone out
+    alerts = get_alert_index()
+    escalations, suppressed = [], 0
+    for anomaly in filter(needs_escalation, anomalies):
+        decision = alerts.peek(
+            anomaly["location"], [anomaly["symptom"]], anomaly["severity"],
+            int(anomaly["observed"]), channel=SURVEILLANCE,
+        )
+        if decision.allowed:
+            escalations.append({
+                **anomaly,
+                "alert_key": decision.key,
+                "decision": decision.reason,
+                "windows": windows.get(anomaly["location"], symptom_id(anomaly["symptom"]) or -1),
+            })
+        else:
+            suppressed += 1
+
+    window_start = now - timedelta(hours=time_window_hours)
+    duration = time.perf_counter() - start
+    entry = SurveillanceLog(
+        run_at=now,
+        window_start=window_start,
+        window_end=now,
+        total_reports=state.total_reports(time_window_hours),
+        symptom_counts=state.symptom_counts(time_window_hours),
+        location_counts=state.location_counts(time_window_hours),
+        anomalies_detected=anomalies[:MAX_LOGGED_ANOMALIES],
+        analysis_details={
+            "series_analyzed": len(matrix),
+            "baseline_days": int(baseline_days),
+            "detectors": list(detectors),
+            "escalations": len(escalations),
+            "suppressed_duplicates": suppressed,
+            "hotspots": windows.top("24h", 10, totals=True),
+            "syndromes": syndromes,
+            "duration_ms": round(duration * 1000, 1),
+        },
+    )
+    log_id = surveillance_logs_collection.insert_one(entry.model_dump(by_alias=True, exclude_none=True)).inserted_id
+    get_recorder("surveillance_analysis").record(duration)
+    try:
+        get_snapshot_cache().publish({
+            "computed_at": now,
+            "log_id": str(log_id),
+            "window_start": window_start,
+            "window_end": now,
+            "window_hours": time_window_hours,
+            "total_reports": entry.total_reports,
+            "symptom_counts": entry.symptom_counts,
+            "location_counts": entry.location_counts,
+            "anomalies": entry.anomalies_detected,
+            "escalations": escalations,
+            "suppressed_duplicates": suppressed,
+            "syndromes": syndromes,
+            "hotspots": entry.analysis_details["hotspots"],
+        })
+    except Exception as e:
+        # Readers keep the previous version; the log entry is already written
+        log.error(f"❌ Could not publish surveillance snapshot: {e}")
+
+    log.info(
+        f"📊 Surveillance: {entry.total_reports} reports in {time_window_hours}h, "
+        f"{len(anomalies)} anomalies, {len(escalations)} to escalate, {suppressed} duplicates skipped "
+        f"({duration * 1000:.0f}ms)"
+    )
+    return SurveillanceReport(
+        log_id=str(log_id),
+        window_start=window_start,
+        window_end=now,
+        total_reports=entry.total_reports,
+        anomalies=anomalies,
+        escalations=escalations,
+        suppressed=suppressed,
+        syndromes=syndromes,
+    )
+
+
+def record_escalation(
+    log_id: str,
+    narrative: str,
+    escalations: Optional[List[Dict[str, Any]]] = None,
+    alert_id: Optional[str] = None,
+) -> None:
+    """
+    Attach a successful escalation to its surveillance log entry and mark
+    its signatures as escalated. The marks are persisted on the entry, so
+    restarts and other workers rebuild them in the alert index.
+    """
+    now = datetime.utcnow()
+    escalations = escalations or []
+    _id = ObjectId(log_id) if ObjectId.is_valid(log_id) else log_id
+    surveillance_logs_collection.update_one(
+        {"_id": _id},
+        {"$set": {
+            "alert_triggered": True,
+            "alert_id": alert_id,
+            "escalated": [
+                {"alert_key": e["alert_key"], "severity": e["severity"], "case_count": int(e["observed"])}
+                for e in escalations
+            ],
+            "escalated_at": now,
+            "analysis_details.narrative": narrative[:4000],
+        }},
+    )
+    alerts = get_alert_index()
+    for e in escalations:
+        alerts.check(
+            e["location"], [e["symptom"]], e["severity"], int(e["observed"]),
+            channel=SURVEILLANCE, alert_id=str(log_id),
+        )
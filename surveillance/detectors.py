@@ -0,0 +1,268 @@
+# surveillance/detectors.py
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+import numpy as np
+from pydantic import BaseModel
+
+from config import settings
+from utils import log
+
+from .series import SeriesMatrix
+
+
+class DetectionResult(BaseModel):
+    """Common result schema for all detectors"""
+
+    detector: str
+    location: Optional[str] = None
+    symptom: Optional[str] = None
+    observed: float
+    expected: float
+    upper_bound: float
+    score: float
+    is_anomaly: bool
+    severity: str = "low"
+
+
+def _baseline_stats(history: np.ndarray):
+    """Per-row mean and standard deviation with a Poisson floor for sparse series"""
+    mean = history.mean(axis=1)
+    std = history.std(axis=1, ddof=1) if history.shape[1] > 1 else np.zeros(len(history))
+    return mean, np.maximum(std, np.sqrt(np.maximum(mean, 1.0)))
+
+
+def _current_fraction(matrix: SeriesMatrix) -> float:
+    """Elapsed share of the current period, floored at an hour so early counts don't explode"""
+    return float(min(1.0, max(matrix.current_fraction, 1 / 24)))
+
+
+def _full_period(observed: np.ndarray, mean: np.ndarray, fraction: float) -> np.ndarray:
+    """Full-period count with the same standardized deviation as a partial one"""
+    return mean + (observed - fraction * mean) / np.sqrt(fraction)
+
+
+def _partial_period(value: np.ndarray, mean: np.ndarray, fraction: float) -> np.ndarray:
+    """Inverse of `_full_period`: map a full-period bound back onto the partial count"""
+    return fraction * mean + np.sqrt(fraction) * (value - mean)
+
+
+def _severity(observed: np.ndarray, expected: np.ndarray, upper: np.ndarray, alarm: np.ndarray):
+    """Map how far the observation clears the alarm bound to low/moderate/high"""
+    span = np.maximum(upper - expected, 1e-9)
+    exceedance = (observed - expected) / span
+    return np.where(alarm & (exceedance >= 2.0), "high", np.where(alarm, "moderate", "low"))
+
+
+def _results(
+    detector: str,
+    keys: List[Hashable],
+    observed: np.ndarray,
+    expected: np.ndarray,
+    upper: np.ndarray,
+    score: np.ndarray,
+    min_count: int,
+    anomalies_only: bool,
+) -> List[DetectionResult]:
+    alarm = (observed > upper) & (observed >= min_count)
+    severity = _severity(observed, expected, upper, alarm)
+    rows = np.flatnonzero(alarm) if anomalies_only else range(len(keys))
+    results = []
+    for i in rows:
+        key = keys[i]
+        location, symptom = key if isinstance(key, tuple) else (None, key)
+        results.append(DetectionResult(
+            detector=detector,
+            location=location,
+            symptom=symptom,
+            observed=float(observed[i]),
+            expected=round(float(expected[i]), 2),
+            upper_bound=round(float(upper[i]), 2),
+            score=round(float(score[i]), 2),
+            is_anomaly=bool(alarm[i]),
+            severity=str(severity[i]),
+        ))
+    return results
+
+
+# ========== DETECTORS ==========
+
+def ewma_detector(
+    matrix: SeriesMatrix,
+    lam: float = 0.3,
+    limit: float = 3.0,
+    min_count: int = settings.DETECTOR_MIN_COUNT,
+    anomalies_only: bool = False,
+) -> List[DetectionResult]:
+    """
+    EWMA control chart. The smoothed statistic is compared with
+    mean + limit·σ·sqrt(λ/(2-λ)) from the history columns.
+    """
+    history, observed = matrix.counts[:, :-1], matrix.counts[:, -1]
+    mean, std = _baseline_stats(history)
+    fraction = _current_fraction(matrix)
+
+    ewma = mean.copy()
+    for t in range(history.shape[1]):
+        ewma = lam * history[:, t] + (1 - lam) * ewma
+
+    sigma = std * np.sqrt(lam / (2 - lam))
+    ucl = mean + limit * sigma
+    current = lam * _full_period(observed, mean, fraction) + (1 - lam) * ewma
+
+    # Smallest count today that pushes the EWMA over its control limit
+    upper = _partial_period((ucl - (1 - lam) * ewma) / lam, mean, fraction)
+    score = (current - mean) / sigma
+    return _results("ewma", matrix.keys, observed, fraction * mean, upper, score, min_count, anomalies_only)
+
+
+def cusum_detector(
+    matrix: SeriesMatrix,
+    k: float = 0.5,
+    h: float = 4.0,
+    min_count: int = settings.DETECTOR_MIN_COUNT,
+    anomalies_only: bool = False,
+) -> List[DetectionResult]:
+    """
+    Upper one-sided CUSUM on standardized counts with reference value k
+    and decision interval h (both in standard deviations).
+    """
+    history, observed = matrix.counts[:, :-1], matrix.counts[:, -1]
+    mean, std = _baseline_stats(history)
+    fraction = _current_fraction(matrix)
+
+    cusum = np.zeros(len(matrix.keys))
+    for t in range(history.shape[1]):
+        cusum = np.maximum(0.0, cusum + (history[:, t] - mean) / std - k)
+
+    current = np.maximum(0.0, cusum + (_full_period(observed, mean, fraction) - mean) / std - k)
+    upper = _partial_period(mean + std * (h + k - cusum), mean, fraction)
+    return _results("cusum", matrix.keys, observed, fraction * mean, upper, current, min_count, anomalies_only)
+
+
+def _fit_poisson_glm(design: np.ndarray, counts: np.ndarray, iterations: int = 25) -> np.ndarray:
+    """
+    Fit log-linear Poisson GLMs for every row of `counts` in one batch of
+    IRLS steps. Returns coefficients with shape (series, parameters).
+    """
+    n_series, n_params = counts.shape[0], design.shape[1]
+    ridge = 1e-4 * np.eye(n_params)
+
+    beta = np.zeros((n_series, n_params))
+    beta[:, 0] = np.log(counts.mean(axis=1) + 0.5)
+
+    for _ in range(iterations):
+        eta = np.clip(beta @ design.T, -20.0, 20.0)
+        mu = np.exp(eta)
+        z = eta + (counts - mu) / mu
+        xtwx = np.einsum("tp,st,tq->spq", design, mu, design) + ridge
+        xtwz = np.einsum("tp,st->sp", design, mu * z)
+        updated = np.linalg.solve(xtwx, xtwz[..., None])[..., 0]
+        if np.allclose(updated, beta, atol=1e-6):
+            beta = updated
+            break
+        beta = updated
+    return beta
+
+
+def _glm_design(weekdays: np.ndarray, trend: Optional[np.ndarray] = None) -> np.ndarray:
+    """Intercept, day-of-week dummies (Monday as reference) and optional trend"""
+    columns = [np.ones(len(weekdays))]
+    columns += [(weekdays == day).astype(float) for day in range(1, 7)]
+    if trend is not None:
+        columns.append(trend)
+    return np.column_stack(columns)
+
+
+def poisson_detector(
+    matrix: SeriesMatrix,
+    z: float = 2.58,
+    trend: bool = False,
+    min_count: int = settings.DETECTOR_MIN_COUNT,
+    anomalies_only: bool = False,
+) -> List[DetectionResult]:
+    """
+    Farrington-style Poisson baseline: a log-linear GLM with day-of-week
+    terms is fitted to the history of each series, overdispersion is
+    estimated from Pearson residuals, and the alarm bound uses the 2/3-power
+    transform so it stays sensible at low counts. A partial current day is
+    compared against its elapsed share of the expected count.
+    """
+    history, observed = matrix.counts[:, :-1], matrix.counts[:, -1]
+    n_periods = matrix.counts.shape[1]
+
+    time = np.arange(n_periods, dtype=float) / n_periods if trend else None
+    design = _glm_design(matrix.weekdays, time)
+    fit_design, current_design = design[:-1], design[-1]
+
+    # Only series with history need a fit; others keep a zero baseline
+    active = history.sum(axis=1) > 0
+    expected = np.zeros(len(matrix.keys))
+    phi = np.ones(len(matrix.keys))
+    if active.any():
+        beta = _fit_poisson_glm(fit_design, history[active])
+        fitted = np.exp(np.clip(beta @ fit_design.T, -20.0, 20.0))
+        pearson = ((history[active] - fitted) ** 2 / fitted).sum(axis=1)
+        dof = max(1, fit_design.shape[0] - fit_design.shape[1])
+        phi[active] = np.maximum(1.0, pearson / dof)
+        expected[active] = np.exp(np.clip(beta @ current_design, -20.0, 20.0))
+
+    expected *= _current_fraction(matrix)
+    mu = np.maximum(expected, 1e-3)
+    upper = (mu ** (2 / 3) + z * (2 / 3) * np.sqrt(phi) * mu ** (1 / 6)) ** 1.5
+    score = (observed - mu) / np.sqrt(phi * mu)
+    return _results("poisson", matrix.keys, observed, expected, upper, score, min_count, anomalies_only)
+
+
+DETECTORS: Dict[str, Callable[..., List[DetectionResult]]] = {
+    "ewma": ewma_detector,
+    "cusum": cusum_detector,
+    "poisson": poisson_detector,
+}
+
+
+def run_detectors(
+    matrix: SeriesMatrix,
+    detectors: Iterable[str] = ("ewma", "cusum", "poisson"),
+    anomalies_only: bool = True,
+) -> List[DetectionResult]:
+    """Run the named detectors over every series in the matrix"""
+    if len(matrix) == 0 or matrix.counts.shape[1] < 3:
+        return []
+
+    results: List[DetectionResult] = []
+    for name in detectors:
+        detector = DETECTORS.get(name)
+        if detector is None:
+            log.warning(f"Unknown detector: {name}")
+            continue
+        results.extend(detector(matrix, anomalies_only=anomalies_only))
+    return sorted(results, key=lambda r: r.score, reverse=True)
+
+
+def summarize_detections(results: List[DetectionResult]) -> List[Dict]:
+    """
+    Collapse per-detector results into one entry per series, listing which
+    detectors fired. Series flagged by more detectors come first.
+    """
+    merged: Dict[tuple, Dict] = {}
+    for result in results:
+        if not result.is_anomaly:
+            continue
+        entry = merged.setdefault((result.location, result.symptom), {
+            "location": result.location,
+            "symptom": result.symptom,
+            "observed": result.observed,
+            "expected": result.expected,
+            "detectors": [],
+            "max_score": result.score,
+            "severity": result.severity,
+        })
+        entry["detectors"].append(result.detector)
+        entry["max_score"] = max(entry["max_score"], result.score)
+        if result.severity == "high":
+            entry["severity"] = "high"
+    return sorted(
+        merged.values(),
+        key=lambda e: (len(e["detectors"]), e["max_score"]),
+        reverse=True,
+    )
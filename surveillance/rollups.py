@@ -0,0 +1,55 @@
+# surveillance/rollups.py
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from database import db
+from utils import log
+from utils.locations import record_location_name
+from utils.symptoms import record_symptom_ids
+
+# One document per (hour, location, symptom) with running counts. Written
+# alongside every health record; long-range queries read these instead of
+# scanning raw records.
+hourly_rollups_collection = db["health_rollups_hourly"]
+
+# symptom_id used for the per-location "all records" row, so case totals
+# are not double counted for records with several symptoms
+ALL_SYMPTOMS = 0
+
+
+def hour_of(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def ensure_rollup_indexes() -> None:
+    try:
+        hourly_rollups_collection.create_index(
+            [("hour", 1), ("location", 1), ("symptom_id", 1)],
+            name="rollup_key",
+            unique=True,
+        )
+        hourly_rollups_collection.create_index([("location_id", 1), ("hour", 1)])
+    except Exception as e:
+        log.warning(f"⚠️ Could not create rollup indexes: {e}")
+
+
+def rollup_increments(record: Dict[str, Any]) -> List[Tuple[Dict, Dict, Dict]]:
+    """
+    (filter, $inc, $setOnInsert) upserts that account one health record in
+    the hourly rollups: one row per symptom plus the ALL_SYMPTOMS row.
+    """
+    hour = hour_of(record.get("reported_at") or datetime.utcnow())
+    location = record_location_name(record)
+    risk = str(record.get("risk_level") or "UNKNOWN").upper()
+    inc = {"count": 1, f"risk.{risk}": 1}
+    if record.get("has_fever"):
+        inc["fever"] = 1
+    on_insert = {
+        "location_id": record.get("location_id"),
+        "district": record.get("district"),
+        "geohash": record.get("geohash"),
+    }
+    return [
+        ({"hour": hour, "location": location, "symptom_id": symptom_id}, inc, on_insert)
+        for symptom_id in [ALL_SYMPTOMS, *sorted(set(record_symptom_ids(record)))]
+    ]
@@ -0,0 +1,307 @@
+# surveillance/scan.py
+import json
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from config import settings
+from utils import log
+from utils.locations import gazetteer_adjacency
+
+from .series import load_location_time_counts
+
+class ScanCluster(BaseModel):
+    """A space-time cylinder flagged by the permutation scan"""
+
+    center: str
+    locations: List[str]
+    start: datetime
+    end: datetime
+    observed: int
+    expected: float
+    relative_risk: float
+    llr: float
+    p_value: float
+
+
+def load_adjacency() -> Dict[str, List[str]]:
+    """Load the adjacency table from DATA_DIR if present, else derive it from the gazetteer"""
+    path = settings.DATA_DIR / "location_adjacency.json"
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            log.error(f"❌ Could not read {path}: {e}")
+    return gazetteer_adjacency(settings.LOCATION_NEIGHBOUR_RADIUS_KM)
+
+
+def _symmetric(adjacency: Dict[str, Iterable[str]]) -> Dict[str, List[str]]:
+    """Case-insensitive, symmetric copy of an adjacency table"""
+    graph: Dict[str, List[str]] = {}
+    for location, neighbours in adjacency.items():
+        a = location.strip().casefold()
+        for neighbour in neighbours:
+            b = neighbour.strip().casefold()
+            for x, y in ((a, b), (b, a)):
+                links = graph.setdefault(x, [])
+                if y not in links:
+                    links.append(y)
+    return graph
+
+
+def _xlogy(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    out = np.zeros_like(x, dtype=np.float64)
+    mask = x > 0
+    out[mask] = x[mask] * np.log(y[mask])
+    return out
+
+
+def _log_likelihood_ratio(observed: np.ndarray, expected: np.ndarray, total: float) -> np.ndarray:
+    """Poisson GLR for each cylinder; zero where there is no excess"""
+    expected = np.maximum(expected, 1e-12)
+    rest = total - observed
+    llr = _xlogy(observed, observed / expected) + _xlogy(rest, rest / np.maximum(total - expected, 1e-12))
+    return np.where(observed > expected, llr, 0.0)
+
+
+def _window_sums(counts: np.ndarray, max_window: int) -> np.ndarray:
+    """Column w holds each row's sum over the last w + 1 periods"""
+    recent = counts[:, ::-1][:, :max_window]
+    return np.cumsum(recent, axis=1)
+
+
+def _replicate_max_llr(
+    location_idx: np.ndarray,
+    period_idx: np.ndarray,
+    shape: Tuple[int, int],
+    zones: np.ndarray,
+    max_window: int,
+    expected: np.ndarray,
+    valid: np.ndarray,
+    total: float,
+    seed: int,
+    replications: int,
+) -> np.ndarray:
+    """
+    Monte Carlo replicates under the space-time permutation null: case
+    periods are shuffled across cases, which keeps both margins fixed, so
+    expected counts are unchanged and only the observed counts move.
+    """
+    rng = np.random.default_rng(seed)
+    n_locations, n_periods = shape
+    maxima = np.zeros(replications)
+    periods = period_idx.copy()
+    for r in range(replications):
+        rng.shuffle(periods)
+        counts = np.bincount(location_idx * n_periods + periods, minlength=n_locations * n_periods)
+        sums = _window_sums(counts.reshape(n_locations, n_periods), max_window)
+        observed = zones @ sums
+        llr = _log_likelihood_ratio(observed, expected, total)
+        maxima[r] = llr[valid].max() if valid.any() else 0.0
+    return maxima
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+    return _pool
+
+
+def shutdown_scan_pool() -> None:
+    """Stop the Monte Carlo worker processes"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+class SpaceTimeScan:
+    """
+    Prospective space-time permutation scan statistic (Kulldorff 2005).
+
+    Candidate cylinders are every zone grown from a center location along
+    the adjacency graph (up to `max_zone_size` locations), crossed with every
+    time window ending in the latest period (up to `max_window` periods).
+    Zones are precomputed per location set and reused across runs.
+    """
+
+    def __init__(
+        self,
+        adjacency: Optional[Dict[str, Iterable[str]]] = None,
+        max_zone_size: int = settings.SCAN_MAX_ZONE_SIZE,
+        max_window: int = settings.SCAN_MAX_WINDOW,
+        replications: int = settings.SCAN_REPLICATIONS,
+        workers: int = settings.SCAN_WORKERS,
+    ):
+        self.graph = _symmetric(adjacency if adjacency is not None else load_adjacency())
+        self.max_zone_size = max_zone_size
+        self.max_window = max_window
+        self.replications = replications
+        self.workers = workers or os.cpu_count() or 1
+        self._zone_cache: Dict[Tuple[str, ...], Tuple[np.ndarray, List[Tuple[int, ...]]]] = {}
+
+    def build_zones(self, locations: Sequence[str]) -> Tuple[np.ndarray, List[Tuple[int, ...]]]:
+        """
+        Zone membership matrix (zones × locations) and member indices.
+        Each location seeds a breadth-first walk over the adjacency graph;
+        every prefix of that walk is a candidate zone.
+        """
+        key = tuple(locations)
+        cached = self._zone_cache.get(key)
+        if cached is not None:
+            return cached
+
+        position = {name.casefold(): i for i, name in enumerate(locations)}
+        seen = set()
+        members: List[Tuple[int, ...]] = []
+        for center in locations:
+            order: List[int] = []
+            queue = deque([center.casefold()])
+            visited = {center.casefold()}
+            while queue and len(order) < self.max_zone_size:
+                name = queue.popleft()
+                if name in position:
+                    order.append(position[name])
+                    zone = tuple(sorted(order))
+                    if zone not in seen:
+                        seen.add(zone)
+                        members.append(tuple(order))
+                for neighbour in self.graph.get(name, []):
+                    if neighbour not in visited:
+                        visited.add(neighbour)
+                        queue.append(neighbour)
+
+        zones = np.zeros((len(members), len(locations)), dtype=np.float64)
+        for z, zone in enumerate(members):
+            zones[z, list(zone)] = 1.0
+
+        if len(self._zone_cache) >= 8:
+            self._zone_cache.clear()
+        self._zone_cache[key] = (zones, members)
+        log.info(f"🗺️ Precomputed {len(members)} scan zones for {len(locations)} locations")
+        return zones, members
+
+    def _null_maxima(self, counts, zones, max_window, expected, valid, total) -> np.ndarray:
+        rows, cols = np.nonzero(counts)
+        repeats = counts[rows, cols]
+        location_idx = np.repeat(rows, repeats)
+        period_idx = np.repeat(cols, repeats)
+        args = (location_idx, period_idx, counts.shape, zones, max_window, expected, valid, total)
+
+        seeds = np.random.SeedSequence().generate_state(self.workers)
+        chunks = np.array_split(np.arange(self.replications), self.workers)
+        jobs = [(int(seed), len(chunk)) for seed, chunk in zip(seeds, chunks) if len(chunk)]
+
+        if self.workers == 1 or len(jobs) == 1:
+            return np.concatenate([_replicate_max_llr(*args, seed, n) for seed, n in jobs])
+
+        pool = _get_pool(self.workers)
+        futures = [pool.submit(_replicate_max_llr, *args, seed, n) for seed, n in jobs]
+        return np.concatenate([f.result() for f in futures])
+
+    def scan(
+        self,
+        locations: Sequence[str],
+        counts: np.ndarray,
+        period_ends: Sequence[datetime],
+        alpha: float = 0.05,
+        max_clusters: int = 5,
+    ) -> List[ScanCluster]:
+        """Return significant, spatially non-overlapping clusters, strongest first"""
+        counts = np.asarray(counts, dtype=np.int64)
+        total = float(counts.sum())
+        if total < 2 or counts.shape[1] < 2:
+            return []
+
+        order = np.argsort(locations)
+        locations = [locations[i] for i in order]
+        counts = counts[order]
+
+        zones, members = self.build_zones(locations)
+        max_window = min(self.max_window, counts.shape[1] - 1)
+
+        # Expected counts under no space-time interaction: mu_zd = C_z * C_d / C
+        location_totals = counts.sum(axis=1).astype(np.float64)
+        period_totals = counts.sum(axis=0).astype(np.float64)
+        window_totals = np.cumsum(period_totals[::-1][:max_window])
+        expected = np.outer(zones @ location_totals, window_totals) / total
+
+        observed = zones @ _window_sums(counts, max_window)
+        llr = _log_likelihood_ratio(observed, expected, total)
+
+        # Cylinders covering more than half of all cases are not clusters
+        valid = expected <= 0.5 * total
+        llr = np.where(valid, llr, 0.0)
+        if not (llr > 0).any():
+            return []
+
+        maxima = self._null_maxima(counts, zones, max_window, expected, valid, total)
+
+        clusters: List[ScanCluster] = []
+        used = set()
+        for flat in np.argsort(llr, axis=None)[::-1]:
+            z, w = np.unravel_index(flat, llr.shape)
+            if llr[z, w] <= 0 or len(clusters) >= max_clusters:
+                break
+            if used.intersection(members[z]):
+                continue
+            p_value = (1 + int((maxima >= llr[z, w]).sum())) / (len(maxima) + 1)
+            if p_value > alpha:
+                break
+
+            used.update(members[z])
+            clusters.append(ScanCluster(
+                center=locations[members[z][0]],
+                locations=[locations[i] for i in members[z]],
+                start=period_ends[-(w + 2)],
+                end=period_ends[-1],
+                observed=int(observed[z, w]),
+                expected=round(float(expected[z, w]), 2),
+                relative_risk=round(float(observed[z, w] / max(expected[z, w], 1e-12)), 2),
+                llr=round(float(llr[z, w]), 3),
+                p_value=round(p_value, 4),
+            ))
+
+        if clusters:
+            log.warning(f"🚨 Space-time scan found {len(clusters)} significant clusters")
+        return clusters
+
+
+_scan_instance: Optional[SpaceTimeScan] = None
+
+
+def get_space_time_scan() -> SpaceTimeScan:
+    """Get the SpaceTimeScan singleton (keeps its precomputed zones across runs)"""
+    global _scan_instance
+    if _scan_instance is None:
+        _scan_instance = SpaceTimeScan()
+    return _scan_instance
+
+
+def run_space_time_scan(
+    periods: int = settings.SCAN_STUDY_PERIODS,
+    period_hours: int = 24,
+    symptom: Optional[str] = None,
+    alpha: float = 0.05,
+) -> List[ScanCluster]:
+    """Load (location, period) counts from Mongo and scan them"""
+    locations, counts, period_ends = load_location_time_counts(
+        periods=periods, period_hours=period_hours, symptom=symptom
+    )
+    if not locations:
+        return []
+    return get_space_time_scan().scan(locations, counts, period_ends, alpha=alpha)
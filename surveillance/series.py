@@ -0,0 +1,243 @@
+# surveillance/series.py
+import re
+from datetime import datetime, timedelta
+from itertools import chain
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from pymongo.collection import Collection
+
+from database.retention import archived_records
+from utils import log
+from utils.locations import canonical_location_name, location_query, record_location_name
+from utils.symptoms import normalize_symptoms, query_symptom_ids, record_symptom_ids, symptom_name
+
+from .rollups import ALL_SYMPTOMS, hourly_rollups_collection
+from .timeseries import surveillance_source
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+class SeriesMatrix:
+    """
+    Dense per-series count matrix: one row per (location, symptom) series,
+    one column per period, oldest first. `period_ends[i]` is the end of
+    column i, so the last column is the current period. `current_fraction`
+    is how much of that period had elapsed at load time (1.0 when complete).
+    """
+
+    def __init__(
+        self,
+        keys: List[Hashable],
+        counts: np.ndarray,
+        period_ends: List[datetime],
+        current_fraction: float = 1.0,
+    ):
+        self.keys = keys
+        self.counts = counts
+        self.period_ends = period_ends
+        self.current_fraction = current_fraction
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def weekdays(self) -> np.ndarray:
+        """Day of week (Mon=0) for each column, from the last second of the period"""
+        return np.array([(end - timedelta(seconds=1)).weekday() for end in self.period_ends])
+
+    def row(self, key: Hashable) -> Optional[np.ndarray]:
+        try:
+            return self.counts[self.keys.index(key)]
+        except ValueError:
+            return None
+
+
+def _archived_ages(
+    start: datetime,
+    end: datetime,
+    period_ms: int,
+    location: Optional[str] = None,
+) -> Iterator[Tuple[Dict, int]]:
+    """Archived records in [start, end) with their age in periods before `end`"""
+    for record in archived_records(start, end, location):
+        age_ms = (end - record["reported_at"]).total_seconds() * 1000
+        yield record, int(age_ms // period_ms)
+
+
+def _day_boundary(end: datetime) -> Tuple[datetime, float]:
+    """Next UTC midnight after `end`, and the elapsed share of the day containing `end`"""
+    boundary = datetime(end.year, end.month, end.day) + timedelta(days=1)
+    return boundary, (end - (boundary - timedelta(days=1))).total_seconds() * 1000 / DAY_MS
+
+
+def _daily_matrix(
+    groups: Iterable[Dict],
+    days: int,
+    boundary: datetime,
+    current_fraction: float,
+) -> SeriesMatrix:
+    """Assemble (location, symptom, day) count groups into a daily SeriesMatrix"""
+    index: Dict[Tuple[str, str], int] = {}
+    cells: List[Tuple[int, int, int]] = []
+    for doc in groups:
+        symptom = doc["_id"]["symptom"]
+        symptom_ids = (symptom,) if isinstance(symptom, int) else normalize_symptoms([str(symptom)])
+        column = int(doc["_id"]["day"])
+        if not 0 <= column < days:
+            continue
+        for symptom_id in symptom_ids:
+            key = (canonical_location_name(doc["_id"]["location"]), symptom_name(symptom_id))
+            row = index.setdefault(key, len(index))
+            cells.append((row, column, doc["count"]))
+
+    counts = np.zeros((len(index), days), dtype=np.float64)
+    for row, column, count in cells:
+        counts[row, column] += count
+
+    period_ends = [boundary - timedelta(days=days - 1 - i) for i in range(days)]
+    log.info(f"📊 Loaded {len(index)} daily series over {days} days")
+    return SeriesMatrix(list(index.keys()), counts, period_ends, current_fraction)
+
+
+def load_daily_series(
+    days: int,
+    end: Optional[datetime] = None,
+    location: Optional[str] = None,
+    source: Optional[Collection] = None,
+) -> SeriesMatrix:
+    """
+    Load daily (location, symptom) counts for the last `days` UTC calendar
+    days, ending with the day that contains `end` (default now).
+
+    The last column only covers midnight up to `end`; the fraction of the
+    day it spans is kept on the matrix so detectors can scale their
+    expectations instead of reading a quiet morning as a drop.
+    """
+    end = end or datetime.utcnow()
+    boundary, current_fraction = _day_boundary(end)
+    start = boundary - timedelta(days=days)
+
+    match = {"reported_at": {"$gte": start, "$lt": end}}
+    if location:
+        match["location"] = location_query(location)
+
+    pipeline = [
+        {"$match": match},
+        {"$project": {
+            "location": {"$ifNull": ["$location", "Unknown"]},
+            # Records written before symptom IDs existed fall back to raw text
+            "symptom": {"$ifNull": ["$symptom_ids", "$symptoms"]},
+            "day": {"$floor": {"$divide": [{"$subtract": ["$reported_at", start]}, DAY_MS]}},
+        }},
+        {"$unwind": "$symptom"},
+        {"$group": {
+            "_id": {"location": "$location", "symptom": "$symptom", "day": "$day"},
+            "count": {"$sum": 1},
+        }},
+    ]
+
+    groups = (source if source is not None else surveillance_source()).aggregate(pipeline, allowDiskUse=True)
+    if source is None:
+        # Long baselines may reach past the hot window into the archive
+        groups = chain(groups, (
+            {"_id": {"location": record_location_name(r), "symptom": symptom, "day": (r["reported_at"] - start) // timedelta(days=1)}, "count": 1}
+            for r in archived_records(start, end, location)
+            for symptom in record_symptom_ids(r)
+        ))
+    return _daily_matrix(groups, days, boundary, current_fraction)
+
+
+def load_daily_rollup_series(
+    days: int,
+    end: Optional[datetime] = None,
+    location: Optional[str] = None,
+) -> SeriesMatrix:
+    """
+    The matrix of `load_daily_series`, summed per UTC day from the hourly
+    rollups instead of raw records. Rollups are never archived and hold
+    one row per (hour, location, symptom), so long baselines stay cheap.
+    """
+    end = end or datetime.utcnow()
+    boundary, current_fraction = _day_boundary(end)
+    start = boundary - timedelta(days=days)
+
+    match = {"hour": {"$gte": start, "$lt": end}, "symptom_id": {"$ne": ALL_SYMPTOMS}}
+    if location:
+        match["location"] = location_query(location)
+
+    groups = hourly_rollups_collection.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "location": "$location",
+                "symptom": "$symptom_id",
+                "day": {"$floor": {"$divide": [{"$subtract": ["$hour", start]}, DAY_MS]}},
+            },
+            "count": {"$sum": "$count"},
+        }},
+    ], allowDiskUse=True)
+    return _daily_matrix(groups, days, boundary, current_fraction)
+
+
+def load_location_time_counts(
+    periods: int,
+    period_hours: int = 24,
+    end: Optional[datetime] = None,
+    symptom: Optional[str] = None,
+    source: Optional[Collection] = None,
+) -> Tuple[List[str], np.ndarray, List[datetime]]:
+    """
+    Load report counts per (location, period) for the last `periods`
+    periods of `period_hours`, aligned to `end`. Optionally restricted to
+    reports mentioning `symptom`.
+
+    Returns (locations, counts[location, period], period_ends).
+    """
+    end = end or datetime.utcnow()
+    period_ms = period_hours * 60 * 60 * 1000
+    start = end - timedelta(hours=periods * period_hours)
+
+    match = {"reported_at": {"$gte": start, "$lt": end}}
+    if symptom:
+        symptom_ids = list(query_symptom_ids(symptom))
+        raw = {"$regex": f"^\\s*{re.escape(symptom.strip())}\\s*$", "$options": "i"}
+        match["$or"] = [
+            {"symptom_ids": {"$in": symptom_ids}},
+            {"symptom_ids": {"$exists": False}, "symptoms": raw},
+        ]
+
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "location": {"$ifNull": ["$location", "Unknown"]},
+                "age": {"$floor": {"$divide": [{"$subtract": [end, "$reported_at"]}, period_ms]}},
+            },
+            "count": {"$sum": 1},
+        }},
+    ]
+
+    groups = (source if source is not None else surveillance_source()).aggregate(pipeline, allowDiskUse=True)
+    if source is None:
+        wanted = set(query_symptom_ids(symptom)) if symptom else None
+        groups = chain(groups, (
+            {"_id": {"location": record_location_name(r), "age": age}, "count": 1}
+            for r, age in _archived_ages(start, end, period_ms)
+            if wanted is None or wanted.intersection(record_symptom_ids(r))
+        ))
+
+    index: Dict[str, int] = {}
+    cells: List[Tuple[int, int, int]] = []
+    for doc in groups:
+        row = index.setdefault(canonical_location_name(doc["_id"]["location"]), len(index))
+        column = periods - 1 - int(doc["_id"]["age"])
+        if 0 <= column < periods:
+            cells.append((row, column, doc["count"]))
+
+    counts = np.zeros((len(index), periods), dtype=np.int64)
+    for row, column, count in cells:
+        counts[row, column] += count
+
+    period_ends = [end - timedelta(hours=period_hours * (periods - 1 - i)) for i in range(periods)]
+    return list(index.keys()), counts, period_ends
@@ -0,0 +1,124 @@
+# surveillance/snapshot.py
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+
+from config import settings
+from database import db
+from utils import log
+from utils.metrics import get_recorder
+
+# Single document holding the latest published snapshot
+surveillance_snapshot_collection = db["surveillance_snapshot"]
+SNAPSHOT_ID = "latest"
+
+
+class SurveillanceSnapshotCache:
+    """
+    Latest surveillance results (aggregates, anomalies, escalations,
+    syndromes, hotspots) as one versioned document.
+
+    Each analysis run publishes a new version, persisted to Mongo with an
+    atomic version bump so every process agrees on the ordering. Readers
+    (agents, /stats, the dashboard) get the in-memory copy; it is
+    re-read from Mongo at most every `reload_seconds`, which is how
+    processes that did not run the analysis pick up new versions.
+    """
+
+    def __init__(self, reload_seconds: float = settings.SURVEILLANCE_SNAPSHOT_RELOAD_SECONDS):
+        self.reload_seconds = reload_seconds
+        self.metrics = get_recorder("surveillance_snapshot")
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._loaded_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    # ========== PUBLISHING ==========
+
+    def publish(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a freshly computed snapshot as the next version"""
+        doc = surveillance_snapshot_collection.find_one_and_update(
+            {"_id": SNAPSHOT_ID},
+            {"$set": {**snapshot, "published_at": datetime.utcnow()}, "$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        with self._lock:
+            if self._snapshot is None or doc["version"] >= self._snapshot.get("version", 0):
+                self._snapshot = doc
+                self._loaded_at = datetime.utcnow()
+        self.metrics.incr("published")
+        log.info(f"📸 Surveillance snapshot v{doc['version']} published")
+        return doc
+
+    # ========== READS ==========
+
+    def _reload(self, now: datetime) -> None:
+        try:
+            doc = surveillance_snapshot_collection.find_one({"_id": SNAPSHOT_ID})
+        except Exception as e:
+            log.warning(f"⚠️ Could not reload surveillance snapshot: {e}")
+            doc = None
+        with self._lock:
+            if doc is not None and (self._snapshot is None or doc["version"] > self._snapshot.get("version", 0)):
+                self._snapshot = doc
+            self._loaded_at = now
+        self.metrics.incr("reloads")
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        """Latest snapshot (None before the first analysis run)"""
+        now = datetime.utcnow()
+        loaded_at = self._loaded_at
+        if loaded_at is None or (now - loaded_at).total_seconds() >= self.reload_seconds:
+            self._reload(now)
+        self.metrics.incr("reads")
+        return self._snapshot
+
+    def freshness(self, snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Version, computation time and age; stale after two missed scheduled runs"""
+        snapshot = snapshot if snapshot is not None else self.current()
+        if snapshot is None:
+            return {"version": None, "computed_at": None, "age_seconds": None, "stale": True}
+        age = (datetime.utcnow() - snapshot["computed_at"]).total_seconds()
+        return {
+            "version": snapshot["version"],
+            "computed_at": snapshot["computed_at"],
+            "age_seconds": round(age, 1),
+            "stale": age > 2 * settings.SURVEILLANCE_INTERVAL_MINUTES * 60,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Headline figures for /stats"""
+        snapshot = self.current()
+        result = self.freshness(snapshot)
+        if snapshot is not None:
+            result.update({
+                "window_hours": snapshot["window_hours"],
+                "total_reports": snapshot["total_reports"],
+                "anomalies": len(snapshot["anomalies"]),
+                "escalations": len(snapshot["escalations"]),
+                "elevated_syndromes": [s["syndrome"] for s in snapshot["syndromes"] if s["elevated"]],
+            })
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.freshness(), "activity": self.metrics.snapshot()}
+
+
+# Process-wide cache
+_cache_instance: Optional[SurveillanceSnapshotCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_snapshot_cache() -> SurveillanceSnapshotCache:
+    global _cache_instance
+    with _cache_lock:
+        if _cache_instance is None:
+            _cache_instance = SurveillanceSnapshotCache()
+        return _cache_instance
+
+
+def get_surveillance_snapshot() -> Optional[Dict[str, Any]]:
+    """Latest surveillance snapshot, or None before the first analysis run"""
+    return get_snapshot_cache().current()
@@ -0,0 +1,419 @@
+# surveillance/state.py
+import threading
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from bson import Binary
+
+from config import settings
+from database import db
+from utils import log
+from utils.locations import GAZETTEER_VERSION, location_geohash, record_location_name
+from utils.symptoms import VOCABULARY_VERSION, record_symptom_ids, symptom_name
+
+from .syndromes import record_syndromes, symptom_pairs
+from .timeseries import surveillance_source
+
+# Single checkpoint document for the sliding-window state
+surveillance_state_collection = db["surveillance_state"]
+CHECKPOINT_ID = "sliding_window"
+# Bump when the set of ring matrices changes so old checkpoints are rebuilt
+STATE_LAYOUT_VERSION = 3
+
+EPOCH = datetime(1970, 1, 1)
+DAY_MINUTES = 24 * 60
+
+
+def bucket_of(timestamp: datetime, bucket_minutes: int) -> int:
+    """Absolute bucket index (since epoch) for a naive UTC timestamp"""
+    return int((timestamp - EPOCH).total_seconds() // (bucket_minutes * 60))
+
+
+def bucket_start(bucket: int, bucket_minutes: int) -> datetime:
+    """Start time of an absolute bucket index"""
+    return EPOCH + timedelta(minutes=bucket * bucket_minutes)
+
+
+class _RingMatrix:
+    """
+    Ring buffers of per-bucket counts, one row per series.
+
+    All rows share the same head bucket, so advancing time clears whole
+    columns at once. A running total per row keeps full-window sums O(1).
+    """
+
+    def __init__(self, n_buckets: int):
+        self.n_buckets = n_buckets
+        self.head: Optional[int] = None
+        self.keys: List[Hashable] = []
+        self.index: Dict[Hashable, int] = {}
+        self._counts = np.zeros((16, n_buckets), dtype=np.int32)
+        self._totals = np.zeros(16, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self._counts[: len(self.keys)]
+
+    @property
+    def totals(self) -> np.ndarray:
+        return self._totals[: len(self.keys)]
+
+    def row(self, key: Hashable) -> int:
+        """Return the row for a series, allocating it on first use"""
+        row = self.index.get(key)
+        if row is not None:
+            return row
+
+        row = len(self.keys)
+        if row == self._counts.shape[0]:
+            capacity = row * 2
+            counts = np.zeros((capacity, self.n_buckets), dtype=np.int32)
+            counts[:row] = self._counts
+            totals = np.zeros(capacity, dtype=np.int64)
+            totals[:row] = self._totals
+            self._counts, self._totals = counts, totals
+
+        self.keys.append(key)
+        self.index[key] = row
+        return row
+
+    def advance(self, bucket: int) -> None:
+        """Move the head forward, expiring buckets that fall out of the window"""
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+
+        rows = len(self.keys)
+        if bucket - self.head >= self.n_buckets:
+            self._counts[:rows] = 0
+            self._totals[:rows] = 0
+        else:
+            slots = [b % self.n_buckets for b in range(self.head + 1, bucket + 1)]
+            self._totals[:rows] -= self._counts[:rows, slots].sum(axis=1)
+            self._counts[:rows, slots] = 0
+        self.head = bucket
+
+    def add(self, key: Hashable, bucket: int, count: int = 1) -> bool:
+        """Add a count to a series bucket; returns False if it is already expired"""
+        self.advance(bucket)
+        if bucket <= self.head - self.n_buckets:
+            return False
+        row = self.row(key)
+        self._counts[row, bucket % self.n_buckets] += count
+        self._totals[row] += count
+        return True
+
+    def window(self, n_buckets: Optional[int] = None) -> np.ndarray:
+        """Per-row sums over the most recent n buckets (full window by default)"""
+        if n_buckets is None or n_buckets >= self.n_buckets or self.head is None:
+            return self.totals.copy()
+        slots = [b % self.n_buckets for b in range(self.head - n_buckets + 1, self.head + 1)]
+        return self.counts[:, slots].sum(axis=1, dtype=np.int64)
+
+    def to_doc(self) -> Dict[str, Any]:
+        """Serialize for the Mongo checkpoint (counts are zlib-compressed)"""
+        return {
+            "head": self.head,
+            "keys": [list(k) if isinstance(k, tuple) else k for k in self.keys],
+            "counts": Binary(zlib.compress(np.ascontiguousarray(self.counts).tobytes())),
+        }
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any], n_buckets: int) -> "_RingMatrix":
+        matrix = cls(n_buckets)
+        keys = [tuple(k) if isinstance(k, list) else k for k in doc.get("keys", [])]
+        counts = np.frombuffer(zlib.decompress(doc["counts"]), dtype=np.int32)
+        counts = counts.reshape(len(keys), n_buckets)
+        for key in keys:
+            matrix.row(key)
+        matrix._counts[: len(keys)] = counts
+        matrix._totals[: len(keys)] = counts.sum(axis=1, dtype=np.int64)
+        matrix.head = doc.get("head")
+        return matrix
+
+
+class SurveillanceState:
+    """
+    Incremental sliding-window surveillance counts.
+
+    Keeps ring buffers of per-bucket counts per (location, symptom), per
+    location (report totals), per co-occurring symptom pair (location, a, b)
+    and per matched syndrome (location, syndrome). Pairs are only stored
+    once seen, so the co-occurrence matrices stay sparse. Report and
+    syndrome counts are also kept per UTC day over `baseline_days`, the
+    history syndrome rates are compared against.
+
+    Each refresh only reads records written since the last watermark. The
+    watermark follows `inserted_at` (stamped when the batcher writes), not
+    `reported_at`, so records that reach Mongo late - after a batcher
+    retry, or from a worker with a skewed clock - are still counted in
+    their own bucket. The last `ingest_overlap` before the watermark is
+    re-read on every refresh and de-duplicated by _id. The state is
+    checkpointed to Mongo so a restart resumes without rescanning the
+    whole window. The checkpoint records which collection it was built
+    from; when `surveillance_source()` changes (the time-series layout is
+    switched on or off) the state is rebuilt instead of mixing sources.
+    """
+
+    def __init__(
+        self,
+        bucket_minutes: int = settings.SURVEILLANCE_BUCKET_MINUTES,
+        window_hours: int = settings.SPIKE_WINDOW_HOURS,
+        ingest_overlap_seconds: int = settings.SURVEILLANCE_INGEST_OVERLAP_SECONDS,
+        baseline_days: int = settings.SYNDROME_BASELINE_DAYS,
+    ):
+        self.ingest_overlap = timedelta(seconds=ingest_overlap_seconds)
+        self.bucket_minutes = bucket_minutes
+        self.window_hours = window_hours
+        self.n_buckets = max(1, (window_hours * 60) // bucket_minutes)
+        self.baseline_days = max(1, baseline_days)
+        self._lock = threading.RLock()
+        self._reset(surveillance_source().name)
+
+    def _reset(self, source: str) -> None:
+        """Empty every ring buffer so the next refresh reloads from `source`"""
+        with self._lock:
+            self.source = source
+            self.series = _RingMatrix(self.n_buckets)
+            self.reports = _RingMatrix(self.n_buckets)
+            self.pairs = _RingMatrix(self.n_buckets)
+            self.syndromes = _RingMatrix(self.n_buckets)
+            self.daily_reports = _RingMatrix(self.baseline_days)
+            self.daily_syndromes = _RingMatrix(self.baseline_days)
+            self.watermark: Optional[datetime] = None
+            # _id → inserted_at for records inside the overlap window
+            self._recent: Dict[Any, datetime] = {}
+
+    # ========== RECORD INGESTION ==========
+
+    @staticmethod
+    def _location_key(record: Dict[str, Any]) -> str:
+        return record_location_name(record)
+
+    @staticmethod
+    def _symptom_keys(record: Dict[str, Any]) -> Iterable[int]:
+        return record_symptom_ids(record)
+
+    def ingest(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Apply records not seen before to the ring buffers"""
+        applied = 0
+        with self._lock:
+            for record in records:
+                record_id = record.get("_id")
+                reported_at = record.get("reported_at")
+                if record_id in self._recent or not isinstance(reported_at, datetime):
+                    continue
+                # Records written before inserted_at was stamped fall back to reported_at
+                inserted_at = record.get("inserted_at") or reported_at
+                self._recent[record_id] = inserted_at
+                if self.watermark is None or inserted_at > self.watermark:
+                    self.watermark = inserted_at
+
+                bucket = bucket_of(reported_at, self.bucket_minutes)
+                location = self._location_key(record)
+                symptoms = list(self._symptom_keys(record))
+                syndromes = record_syndromes(symptoms)
+                counted = False
+                if self.reports.add(location, bucket):
+                    for symptom in symptoms:
+                        self.series.add((location, symptom), bucket)
+                    for a, b in symptom_pairs(symptoms):
+                        self.pairs.add((location, a, b), bucket)
+                    for syndrome in syndromes:
+                        self.syndromes.add((location, syndrome), bucket)
+                    counted = True
+                day = bucket_of(reported_at, DAY_MINUTES)
+                if self.daily_reports.add(location, day):
+                    for syndrome in syndromes:
+                        self.daily_syndromes.add((location, syndrome), day)
+                    counted = True
+                applied += counted
+        return applied
+
+    def _prune_recent(self) -> None:
+        if self.watermark is None:
+            return
+        cutoff = self.watermark - self.ingest_overlap
+        self._recent = {k: t for k, t in self._recent.items() if t >= cutoff}
+
+    def refresh(self, now: Optional[datetime] = None) -> int:
+        """Pull records written since the watermark and advance the window to now"""
+        now = now or datetime.utcnow()
+        head = bucket_of(now, self.bucket_minutes)
+        fields = {"reported_at": 1, "inserted_at": 1, "location": 1, "symptoms": 1, "symptom_ids": 1}
+        source = surveillance_source()
+        with self._lock:
+            if source.name != self.source:
+                log.warning(f"⚠️ Surveillance source changed from {self.source} to {source.name}, rebuilding")
+                self._reset(source.name)
+            if self.watermark is None:
+                # First load: everything reported inside the window and the baseline days
+                window_start = min(
+                    bucket_start(head - self.n_buckets + 1, self.bucket_minutes),
+                    bucket_start(bucket_of(now, DAY_MINUTES) - self.baseline_days + 1, DAY_MINUTES),
+                )
+                cursor = source.find({"reported_at": {"$gte": window_start}}, fields)
+                applied = self.ingest(cursor)
+                if self.watermark is None:
+                    self.watermark = now
+            else:
+                since = self.watermark - self.ingest_overlap
+                cursor = source.find({"inserted_at": {"$gte": since}}, fields).sort("inserted_at", 1)
+                applied = self.ingest(cursor)
+            self._prune_recent()
+
+            for matrix in (self.series, self.reports, self.pairs, self.syndromes):
+                matrix.advance(head)
+            for matrix in (self.daily_reports, self.daily_syndromes):
+                matrix.advance(bucket_of(now, DAY_MINUTES))
+
+        if applied:
+            log.info(f"📈 Surveillance state updated with {applied} new records")
+        return applied
+
+    # ========== WINDOW QUERIES ==========
+
+    def _buckets_for(self, hours: Optional[float]) -> Optional[int]:
+        if hours is None:
+            return None
+        return max(1, int(hours * 60) // self.bucket_minutes)
+
+    def series_counts(self, hours: Optional[float] = None) -> Dict[Tuple[str, int], int]:
+        """Counts per (location, symptom ID) over the last `hours` (full window by default)"""
+        with self._lock:
+            sums = self.series.window(self._buckets_for(hours))
+            return {key: int(c) for key, c in zip(self.series.keys, sums) if c}
+
+    def pair_counts(self, hours: Optional[float] = None) -> Dict[Tuple[str, int, int], int]:
+        """Reports per (location, symptom ID, symptom ID) pair, smaller ID first"""
+        with self._lock:
+            sums = self.pairs.window(self._buckets_for(hours))
+            return {key: int(c) for key, c in zip(self.pairs.keys, sums) if c}
+
+    def syndrome_counts(self, hours: Optional[float] = None) -> Dict[Tuple[str, str], int]:
+        """Reports matching each syndrome per (location, syndrome)"""
+        with self._lock:
+            sums = self.syndromes.window(self._buckets_for(hours))
+            return {key: int(c) for key, c in zip(self.syndromes.keys, sums) if c}
+
+    def symptom_counts(self, hours: Optional[float] = None) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for (_, symptom_id), count in self.series_counts(hours).items():
+            symptom = symptom_name(symptom_id)
+            counts[symptom] = counts.get(symptom, 0) + count
+        return counts
+
+    def location_counts(self, hours: Optional[float] = None) -> Dict[str, int]:
+        with self._lock:
+            sums = self.reports.window(self._buckets_for(hours))
+            return {key: int(c) for key, c in zip(self.reports.keys, sums) if c}
+
+    def baseline_counts(self) -> Tuple[Dict[str, int], Dict[Tuple[str, str], int]]:
+        """Reports per location and per (location, syndrome) over the baseline days"""
+        with self._lock:
+            reports = {key: int(c) for key, c in zip(self.daily_reports.keys, self.daily_reports.totals) if c}
+            syndromes = {key: int(c) for key, c in zip(self.daily_syndromes.keys, self.daily_syndromes.totals) if c}
+            return reports, syndromes
+
+    def total_reports(self, hours: Optional[float] = None) -> int:
+        return sum(self.location_counts(hours).values())
+
+    def geohash_counts(self, precision: int = 4, hours: Optional[float] = None) -> Dict[str, int]:
+        """Report totals rolled up to geohash cells; unresolved locations are skipped"""
+        counts: Dict[str, int] = {}
+        for location, count in self.location_counts(hours).items():
+            geohash = location_geohash(location)
+            if geohash:
+                cell = geohash[:precision]
+                counts[cell] = counts.get(cell, 0) + count
+        return counts
+
+    # ========== CHECKPOINTING ==========
+
+    def checkpoint(self) -> None:
+        """Persist the ring buffers and watermark to Mongo"""
+        with self._lock:
+            doc = {
+                "bucket_minutes": self.bucket_minutes,
+                "n_buckets": self.n_buckets,
+                "baseline_days": self.baseline_days,
+                "layout_version": STATE_LAYOUT_VERSION,
+                "vocabulary_version": VOCABULARY_VERSION,
+                "gazetteer_version": GAZETTEER_VERSION,
+                "source": self.source,
+                "watermark": self.watermark,
+                "recent_ids": [[k, t] for k, t in self._recent.items()],
+                "series": self.series.to_doc(),
+                "reports": self.reports.to_doc(),
+                "pairs": self.pairs.to_doc(),
+                "syndromes": self.syndromes.to_doc(),
+                "daily_reports": self.daily_reports.to_doc(),
+                "daily_syndromes": self.daily_syndromes.to_doc(),
+                "updated_at": datetime.utcnow(),
+            }
+        surveillance_state_collection.replace_one({"_id": CHECKPOINT_ID}, doc, upsert=True)
+
+    def restore(self) -> bool:
+        """Load the last checkpoint; returns False if none matches this configuration"""
+        doc = surveillance_state_collection.find_one({"_id": CHECKPOINT_ID})
+        if not doc:
+            return False
+        if (
+            doc.get("bucket_minutes") != self.bucket_minutes
+            or doc.get("n_buckets") != self.n_buckets
+            or doc.get("baseline_days") != self.baseline_days
+            or doc.get("layout_version", 1) != STATE_LAYOUT_VERSION
+            or doc.get("vocabulary_version") != VOCABULARY_VERSION
+            or doc.get("gazetteer_version") != GAZETTEER_VERSION
+        ):
+            log.warning("⚠️ Surveillance checkpoint has a different layout, rebuilding")
+            return False
+        if doc.get("source") != self.source:
+            log.warning(f"⚠️ Surveillance checkpoint was built from {doc.get('source')}, rebuilding from {self.source}")
+            return False
+
+        with self._lock:
+            self.series = _RingMatrix.from_doc(doc["series"], self.n_buckets)
+            self.reports = _RingMatrix.from_doc(doc["reports"], self.n_buckets)
+            self.pairs = _RingMatrix.from_doc(doc["pairs"], self.n_buckets)
+            self.syndromes = _RingMatrix.from_doc(doc["syndromes"], self.n_buckets)
+            self.daily_reports = _RingMatrix.from_doc(doc["daily_reports"], self.baseline_days)
+            self.daily_syndromes = _RingMatrix.from_doc(doc["daily_syndromes"], self.baseline_days)
+            self.watermark = doc.get("watermark")
+            self._recent = {k: t for k, t in doc.get("recent_ids", [])}
+        log.info(f"✅ Surveillance state restored (watermark={self.watermark})")
+        return True
+
+
+# Process-wide state
+_state_instance: Optional[SurveillanceState] = None
+_state_lock = threading.Lock()
+
+
+def get_surveillance_state() -> SurveillanceState:
+    """Get the SurveillanceState singleton, restoring it from the last checkpoint"""
+    global _state_instance
+    with _state_lock:
+        if _state_instance is None:
+            state = SurveillanceState()
+            try:
+                state.restore()
+            except Exception as e:
+                log.error(f"❌ Could not restore surveillance state: {e}")
+            _state_instance = state
+    return _state_instance
+
+
+def refresh_surveillance_state() -> SurveillanceState:
+    """Apply new records to the shared state and checkpoint it"""
+    state = get_surveillance_state()
+    state.refresh()
+    state.checkpoint()
+    return state
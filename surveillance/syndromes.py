@@ -0,0 +1,203 @@
+# surveillance/syndromes.py
+import math
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from utils.locations import canonical_location_name
+from utils.symptoms import SYMPTOM_NAMES, SYMPTOM_VOCABULARY, symptom_id, symptom_name
+
+# Syndrome name → symptoms that must all be reported together
+SYNDROME_DEFINITIONS: Dict[str, Tuple[str, ...]] = {
+    "respiratory": ("fever", "cough", "breathing difficulty"),
+    "gastrointestinal": ("fever", "vomiting", "diarrhea"),
+    "vector-borne": ("fever", "rash", "joint pain"),
+}
+
+SYNDROMES: Dict[str, Tuple[int, ...]] = {
+    name: tuple(symptom_id(s) for s in symptoms) for name, symptoms in SYNDROME_DEFINITIONS.items()
+}
+
+# Matrix size: symptom IDs index rows/columns directly
+N_SYMPTOMS = max(sid for sid, _, _, _ in SYMPTOM_VOCABULARY) + 1
+
+
+def symptom_pairs(symptom_ids: Iterable[int]) -> List[Tuple[int, int]]:
+    """Unordered symptom pairs in a report, smaller ID first"""
+    return list(combinations(sorted(set(symptom_ids)), 2))
+
+
+def record_syndromes(symptom_ids: Iterable[int]) -> List[str]:
+    """Syndromes whose symptoms all appear in one report"""
+    present = set(symptom_ids)
+    return [name for name, ids in SYNDROMES.items() if present.issuperset(ids)]
+
+
+def cooccurrence_matrix(
+    pair_counts: Dict[Tuple[int, int], int],
+    symptom_counts: Dict[int, int],
+) -> np.ndarray:
+    """
+    Symmetric (symptom × symptom) report counts: the diagonal holds reports
+    per symptom, off-diagonal cells reports mentioning both symptoms.
+    """
+    matrix = np.zeros((N_SYMPTOMS, N_SYMPTOMS), dtype=np.int64)
+    if pair_counts:
+        pairs = np.array(list(pair_counts.keys()))
+        values = np.array(list(pair_counts.values()), dtype=np.int64)
+        np.add.at(matrix, (pairs[:, 0], pairs[:, 1]), values)
+        np.add.at(matrix, (pairs[:, 1], pairs[:, 0]), values)
+    for sid, count in symptom_counts.items():
+        matrix[sid, sid] = count
+    return matrix
+
+
+def lift_matrix(matrix: np.ndarray, reports: int) -> np.ndarray:
+    """
+    Observed / expected co-occurrence under independence:
+    lift[a, b] = N · n_ab / (n_a · n_b). Zero where either symptom is absent.
+    """
+    marginals = np.diag(matrix).astype(np.float64)
+    expected = np.outer(marginals, marginals) / max(reports, 1)
+    lift = np.zeros_like(expected)
+    np.divide(matrix, expected, out=lift, where=expected > 0)
+    return lift
+
+
+class SymptomCorrelation:
+    """
+    Co-occurrence statistics for one location (or all) over one window.
+
+    Built from the pair and single-symptom counts kept by SurveillanceState,
+    so a query costs one small dense matrix per location rather than a
+    scan of the underlying reports. Syndrome counts are compared with the
+    same location's syndrome rate over the baseline days before the window.
+    """
+
+    def __init__(
+        self,
+        location: Optional[str],
+        reports: int,
+        matrix: np.ndarray,
+        syndrome_counts: Dict[str, int],
+        baseline_reports: int = 0,
+        baseline_syndrome_counts: Optional[Dict[str, int]] = None,
+    ):
+        self.location = location
+        self.reports = reports
+        self.matrix = matrix
+        self.syndrome_counts = syndrome_counts
+        self.baseline_reports = baseline_reports
+        self.baseline_syndrome_counts = baseline_syndrome_counts or {}
+        self.lift = lift_matrix(matrix, reports)
+
+    def pairs(self, min_count: int = settings.DETECTOR_MIN_COUNT, limit: int = 10) -> List[Dict[str, Any]]:
+        """Symptom pairs seen at least `min_count` times, strongest lift first"""
+        upper = np.triu(self.matrix, k=1)
+        rows, cols = np.nonzero(upper >= max(1, min_count))
+        order = np.argsort(-self.lift[rows, cols], kind="stable")[:limit]
+        result = []
+        for i in order:
+            a, b = int(rows[i]), int(cols[i])
+            lift = float(self.lift[a, b])
+            result.append({
+                "symptoms": [symptom_name(a), symptom_name(b)],
+                "co_occurrence_count": int(self.matrix[a, b]),
+                "expected_count": round(float(self.matrix[a, a] * self.matrix[b, b]) / max(self.reports, 1), 2),
+                "lift": round(lift, 2),
+                "pmi": round(math.log2(lift), 2) if lift > 0 else None,
+                "elevated": lift >= settings.SYNDROME_LIFT_THRESHOLD,
+            })
+        return result
+
+    def syndromes(self) -> List[Dict[str, Any]]:
+        """
+        Reports matching each syndrome against the count expected at the
+        baseline syndrome rate. The rate carries one pseudo-report, so a
+        syndrome never seen before still needs several reports to stand out
+        and a location without history is never elevated.
+        """
+        result = []
+        for name in SYNDROMES:
+            observed = self.syndrome_counts.get(name, 0)
+            rate = (self.baseline_syndrome_counts.get(name, 0) + 1) / (self.baseline_reports + 1)
+            expected = self.reports * rate
+            ratio = observed / expected if expected > 0 else 0.0
+            result.append({
+                "syndrome": name,
+                "symptoms": list(SYNDROME_DEFINITIONS[name]),
+                "count": int(observed),
+                "expected_count": round(expected, 2),
+                "baseline_rate": round(rate, 4),
+                "lift": round(ratio, 2),
+                "elevated": observed >= settings.DETECTOR_MIN_COUNT and ratio >= settings.SYNDROME_LIFT_THRESHOLD,
+            })
+        return result
+
+    def to_dict(self, min_count: int = settings.DETECTOR_MIN_COUNT, limit: int = 10) -> Dict[str, Any]:
+        return {
+            "location": self.location,
+            "reports": int(self.reports),
+            "syndromes": self.syndromes(),
+            "pairs": self.pairs(min_count, limit),
+        }
+
+
+def compute_correlations(
+    state,
+    hours: Optional[float] = None,
+    location: Optional[str] = None,
+    per_location: bool = False,
+) -> List[SymptomCorrelation]:
+    """
+    Correlation statistics from a SurveillanceState window: one entry for
+    `location` (or all locations pooled), or one per location with reports
+    when `per_location` is set.
+    """
+    reports = state.location_counts(hours)
+    series = state.series_counts(hours)
+    pairs = state.pair_counts(hours)
+    syndromes = state.syndrome_counts(hours)
+    daily_reports, daily_syndromes = state.baseline_counts()
+
+    if location:
+        # State keys are canonical names, as in load_daily_series
+        groups = [canonical_location_name(location)]
+    elif per_location:
+        groups = sorted(reports, key=reports.get, reverse=True)
+    else:
+        groups = [None]
+
+    results = []
+    for group in groups:
+        keep = (lambda loc: True) if group is None else (lambda loc, g=group: loc == g)
+        symptom_counts: Dict[int, int] = {}
+        for (loc, sid), count in series.items():
+            if keep(loc) and sid in SYMPTOM_NAMES:
+                symptom_counts[sid] = symptom_counts.get(sid, 0) + count
+        pair_counts: Dict[Tuple[int, int], int] = {}
+        for (loc, a, b), count in pairs.items():
+            if keep(loc):
+                pair_counts[(a, b)] = pair_counts.get((a, b), 0) + count
+        syndrome_counts: Dict[str, int] = {}
+        for (loc, name), count in syndromes.items():
+            if keep(loc):
+                syndrome_counts[name] = syndrome_counts.get(name, 0) + count
+
+        # The daily counts include the window itself; the baseline is what came before
+        total = sum(c for loc, c in reports.items() if keep(loc))
+        baseline_reports = max(0, sum(c for loc, c in daily_reports.items() if keep(loc)) - total)
+        baseline_syndromes: Dict[str, int] = {}
+        for (loc, name), count in daily_syndromes.items():
+            if keep(loc):
+                baseline_syndromes[name] = baseline_syndromes.get(name, 0) + count
+        for name, count in syndrome_counts.items():
+            baseline_syndromes[name] = max(0, baseline_syndromes.get(name, 0) - count)
+
+        results.append(SymptomCorrelation(
+            group, total, cooccurrence_matrix(pair_counts, symptom_counts), syndrome_counts,
+            baseline_reports, baseline_syndromes,
+        ))
+    return results
@@ -0,0 +1,141 @@
+# surveillance/timeseries.py
+"""
+Opt-in time-series layout for surveillance reads.
+
+With HEALTH_TIMESERIES_ENABLED, every health record is also written as a
+slim event to a MongoDB time-series collection (timeField `reported_at`,
+metaField `location`). The windowed aggregations in surveillance/ read
+from it, while the full clinical record stays in `health_records`.
+
+Backfill existing records with:
+
+    python -m surveillance.timeseries --migrate [--since 2025-01-01] [--restart]
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, CollectionInvalid
+
+from config import settings
+from database import db, health_records_collection
+from database.write_batcher import unwritten
+from utils import log
+from utils.locations import record_location_name
+from utils.symptoms import record_symptom_ids
+
+# Measurement fields copied from a health record onto its event
+EVENT_FIELDS = ("location_id", "district", "geohash", "risk_level", "severity_score", "has_fever")
+
+# Backfill progress, kept apart from the events so live writes don't move it
+migration_state_collection = db["migration_state"]
+MIGRATION_ID = "health_timeseries"
+
+
+def timeseries_collection() -> Collection:
+    return db[settings.HEALTH_TIMESERIES_COLLECTION]
+
+
+def surveillance_source() -> Collection:
+    """Collection the window aggregations read from"""
+    if settings.HEALTH_TIMESERIES_ENABLED:
+        return timeseries_collection()
+    return health_records_collection
+
+
+def ensure_timeseries_collection(name: Optional[str] = None, target=None) -> Collection:
+    """Create the time-series collection if it does not exist yet"""
+    target = target if target is not None else db
+    name = name or settings.HEALTH_TIMESERIES_COLLECTION
+    try:
+        target.create_collection(
+            name,
+            timeseries={"timeField": "reported_at", "metaField": "location", "granularity": "hours"},
+        )
+        log.info(f"🗂️ Created time-series collection {name}")
+    except CollectionInvalid:
+        pass
+    target[name].create_index([("location", 1), ("reported_at", 1)])
+    target[name].create_index([("symptom_ids", 1), ("reported_at", 1)])
+    target[name].create_index("inserted_at")
+    return target[name]
+
+
+def event_from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Surveillance-relevant slice of a health record; shares its _id"""
+    event = {
+        "_id": record["_id"],
+        "reported_at": record.get("reported_at") or datetime.utcnow(),
+        "location": record_location_name(record),
+        "symptom_ids": record_symptom_ids(record),
+    }
+    for field in EVENT_FIELDS:
+        if record.get(field) is not None:
+            event[field] = record[field]
+    return event
+
+
+def migrate(since: Optional[datetime] = None, batch_size: int = 10_000, restart: bool = False) -> int:
+    """
+    Copy health records into the time-series collection. Safe to re-run
+    and to run while live writes flow: progress is kept in its own marker
+    (last copied health record _id), and events already present - copied
+    live by write_health_record or by an earlier attempt - are skipped.
+    """
+    target = ensure_timeseries_collection()
+    marker = None if restart else migration_state_collection.find_one({"_id": MIGRATION_ID})
+
+    query: Dict[str, Any] = {"reported_at": {"$gte": since} if since else {"$exists": True}}
+    if marker and marker.get("last_id") is not None:
+        query["_id"] = {"$gt": marker["last_id"]}
+        log.info(f"🚚 Resuming time-series migration after {marker['last_id']} ({marker.get('copied', 0)} copied)")
+
+    copied, batch, started = 0, [], time.perf_counter()
+
+    def write(records):
+        events = unwritten(target, [event_from_record(r) for r in records])
+        inserted_at = datetime.utcnow()
+        for event in events:
+            event["inserted_at"] = inserted_at
+        if events:
+            try:
+                target.insert_many(events, ordered=False)
+            except BulkWriteError as e:
+                log.warning(f"⚠️ {len(e.details.get('writeErrors', []))} events failed to copy")
+        migration_state_collection.update_one(
+            {"_id": MIGRATION_ID},
+            {"$set": {"last_id": records[-1]["_id"], "updated_at": datetime.utcnow()}, "$inc": {"copied": len(events)}},
+            upsert=True,
+        )
+        return len(events)
+
+    cursor = health_records_collection.find(query).sort("_id", 1).batch_size(batch_size)
+    for record in cursor:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            copied += write(batch)
+            batch = []
+            log.info(f"🚚 Copied {copied} records ({copied / (time.perf_counter() - started):.0f}/s)")
+    if batch:
+        copied += write(batch)
+
+    migration_state_collection.update_one(
+        {"_id": MIGRATION_ID}, {"$set": {"completed_at": datetime.utcnow()}}, upsert=True
+    )
+    log.info(f"✅ Time-series migration done: {copied} records in {time.perf_counter() - started:.1f}s")
+    return copied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--migrate", action="store_true", help="backfill events from health_records")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only copy records reported after this")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress and start from the beginning")
+    args = parser.parse_args()
+    if args.migrate:
+        migrate(args.since, args.batch_size, args.restart)
+    else:
+        ensure_timeseries_collection()
@@ -0,0 +1,124 @@
+# surveillance/windows.py
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils import log
+from utils.symptoms import symptom_name
+
+from .rollups import ALL_SYMPTOMS, hour_of, hourly_rollups_collection
+
+# Window label → length in hours
+WINDOWS: Dict[str, int] = {"1h": 1, "6h": 6, "12h": 12, "24h": 24, "7d": 168}
+
+
+class MultiWindowCounts:
+    """
+    Counts for every (location, symptom ID) series over several trailing
+    windows at once. `counts[i, j]` is series `keys[i]` over `windows[j]`;
+    symptom ID ALL_SYMPTOMS (0) rows are per-location report totals.
+
+    Windows are whole hours ending with the current (partial) hour, so
+    "1h" is the hour in progress and "24h" the last 24 hourly buckets.
+    """
+
+    def __init__(self, keys: List[Tuple[str, int]], windows: Sequence[str], counts: np.ndarray, end: datetime):
+        self.keys = keys
+        self.windows = tuple(windows)
+        self.counts = counts
+        self.end = end
+        self._rows = {key: i for i, key in enumerate(keys)}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def column(self, window: str) -> np.ndarray:
+        return self.counts[:, self.windows.index(window)]
+
+    def get(self, location: str, symptom_id: int = ALL_SYMPTOMS) -> Dict[str, int]:
+        """Window label → count for one series (zeros if unseen)"""
+        row = self._rows.get((location, symptom_id))
+        values = self.counts[row] if row is not None else np.zeros(len(self.windows))
+        return {window: int(v) for window, v in zip(self.windows, values)}
+
+    def rate_ratio(self, window: str, baseline: str = "7d") -> np.ndarray:
+        """Per-hour rate in `window` relative to the `baseline` window (1.0 = usual)"""
+        hours, base_hours = WINDOWS[window], WINDOWS[baseline]
+        recent = self.column(window) / hours
+        usual = np.maximum(self.column(baseline) / base_hours, 1.0 / base_hours)
+        return recent / usual
+
+    def top(self, window: str = "24h", limit: int = 10, totals: bool = False) -> List[Dict[str, Any]]:
+        """Largest series in `window`; symptom series by default, location totals with totals=True"""
+        column = self.column(window)
+        rows = [i for i, (_, s) in enumerate(self.keys) if (s == ALL_SYMPTOMS) == totals and column[i] > 0]
+        rows.sort(key=lambda i: column[i], reverse=True)
+        return [self._series(i) for i in rows[:limit]]
+
+    def _series(self, row: int) -> Dict[str, Any]:
+        location, symptom_id = self.keys[row]
+        return {
+            "location": location,
+            "symptom": symptom_name(symptom_id) if symptom_id != ALL_SYMPTOMS else None,
+            "counts": {w: int(v) for w, v in zip(self.windows, self.counts[row])},
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact, JSON-friendly form: one list of counts per series"""
+        return {
+            "end": self.end.isoformat(),
+            "windows": list(self.windows),
+            "series": [
+                [location, symptom_name(s) if s != ALL_SYMPTOMS else None, *map(int, row)]
+                for (location, s), row in zip(self.keys, self.counts)
+            ],
+        }
+
+
+def prefix_window_sums(hourly: np.ndarray, hours: Sequence[int]) -> np.ndarray:
+    """
+    Trailing sums over several window lengths from one cumulative sum:
+    hourly[:, -1] is the newest hour, result[:, j] sums the last hours[j].
+    """
+    n = hourly.shape[1]
+    prefix = np.zeros((hourly.shape[0], n + 1), dtype=hourly.dtype)
+    np.cumsum(hourly, axis=1, out=prefix[:, 1:])
+    starts = np.array([max(0, n - h) for h in hours])
+    return prefix[:, [n]] - prefix[:, starts]
+
+
+def load_multi_window_counts(
+    windows: Sequence[str] = tuple(WINDOWS),
+    end: Optional[datetime] = None,
+    location: Optional[str] = None,
+) -> MultiWindowCounts:
+    """
+    Every (location, symptom) series over all `windows` from a single read
+    of the hourly rollups covering the longest window.
+    """
+    end = end or datetime.utcnow()
+    hours = [WINDOWS[w] for w in windows]
+    span = max(hours)
+    head = hour_of(end)
+    first = head - timedelta(hours=span - 1)
+
+    query: Dict[str, Any] = {"hour": {"$gte": first, "$lte": head}}
+    if location:
+        query["location"] = location
+    cursor = hourly_rollups_collection.find(query, {"_id": 0, "hour": 1, "location": 1, "symptom_id": 1, "count": 1})
+
+    index: Dict[Hashable, int] = {}
+    rows, columns, values = [], [], []
+    for doc in cursor:
+        key = (doc["location"], int(doc["symptom_id"]))
+        rows.append(index.setdefault(key, len(index)))
+        columns.append(span - 1 - int((head - doc["hour"]).total_seconds() // 3600))
+        values.append(doc.get("count", 0))
+
+    hourly = np.zeros((len(index), span), dtype=np.int64)
+    if rows:
+        np.add.at(hourly, (np.array(rows), np.array(columns)), np.array(values, dtype=np.int64))
+    counts = prefix_window_sums(hourly, hours)
+    log.info(f"📊 Multi-window counts for {len(index)} series ({', '.join(windows)})")
+    return MultiWindowCounts(list(index.keys()), windows, counts, end)
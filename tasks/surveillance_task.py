@@ -80,6 +80,9 @@ def create_surveillance_task(
     
     **Method 2: Geographic Clustering Detection**
     
+    Use scan_space_time_clusters tool (space-time permutation scan over
+    neighbouring locations; clusters come with p-values).
+    
     For each location with reports:
     - Compare to mean case count across all locations
     - Flag locations with count > (mean + 2.5 × std_dev)
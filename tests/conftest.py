@@ -0,0 +1,17 @@
+# tests/conftest.py
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Settings refuse to load without a bot token; tests never reach Telegram
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "test-token")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def mongo():
+    """In-memory Mongo database for modules that read or write collections"""
+    mongomock = pytest.importorskip("mongomock")
+    return mongomock.MongoClient().db
@@ -0,0 +1,96 @@
+# tests/test_alert_index.py
+from datetime import datetime, timedelta
+
+import pytest
+
+import surveillance.alerts as alerts
+from surveillance.alerts import (
+    ALERT,
+    AUTHORITY,
+    ESCALATION,
+    NEW,
+    SUPPRESSED,
+    SURVEILLANCE,
+    AlertIndex,
+    alert_key,
+)
+
+
+@pytest.fixture
+def index(mongo, monkeypatch):
+    monkeypatch.setattr(alerts, "alerts_collection", mongo.alerts)
+    monkeypatch.setattr(alerts, "surveillance_logs_collection", mongo.surveillance_logs)
+    return AlertIndex(window_hours=24, case_factor=2.0, refresh_seconds=0)
+
+
+def test_alert_key_is_order_and_spelling_insensitive():
+    assert alert_key("pune", ["cough", "Fever"]) == alert_key("Pune", ["bukhar", "khansi"])
+    assert alert_key("Dadar, Mumbai", ["fever"]) != alert_key("Mumbai", ["fever"])
+    assert alert_key(None, []) == "Unknown|*"
+
+
+def test_duplicates_are_suppressed_until_they_escalate(index):
+    assert index.check("Pune", ["fever"], "moderate", 10).action == NEW
+    assert index.check("pune", ["Fever"], "moderate", 12).action == SUPPRESSED
+
+    grown = index.check("Pune", ["fever"], "moderate", 20)
+    assert grown.action == ESCALATION and "cases grew" in grown.reason
+    assert index.check("Pune", ["fever"], "high", 20).reason == "severity increased"
+    assert index.check("Pune", ["fever"], "high", 25).action == SUPPRESSED
+
+
+def test_channels_are_tracked_separately(index):
+    assert index.check("Pune", ["fever"], "high", 10).allowed
+    assert index.check("Pune", ["fever"], "high", 10, channel=AUTHORITY).allowed
+    assert index.check("Pune", ["fever"], "high", 10, channel=SURVEILLANCE).allowed
+    assert not index.check("Pune", ["fever"], "high", 10, channel=AUTHORITY).allowed
+
+
+def test_peek_records_nothing(index):
+    assert index.peek("Pune", ["fever"], "high", 10).action == NEW
+    assert index.check("Pune", ["fever"], "high", 10).action == NEW
+
+
+def test_rollback_restores_the_previous_mark(index):
+    first = index.check("Pune", ["fever"], "moderate", 10)
+    index.attach(first.key, "alert-1")
+
+    failed = index.check("Pune", ["fever"], "high", 10)
+    assert failed.action == ESCALATION
+    index.rollback(failed)
+
+    # Back to the moderate mark: the escalation may be raised again
+    retry = index.check("Pune", ["fever"], "high", 10)
+    assert retry.action == ESCALATION and retry.previous_id == "alert-1"
+
+    index.rollback(index.check("Mumbai", ["cough"], "high", 5))
+    assert index.check("Mumbai", ["cough"], "high", 5).action == NEW
+
+
+def test_marks_are_rebuilt_from_the_database(index, mongo):
+    now = datetime.utcnow()
+    mongo.alerts.insert_one({
+        "alert_key": alert_key("Pune", ["fever"]), "severity": "HIGH", "case_count": 10,
+        "is_resolved": False, "sent_to_authorities": True, "created_at": now - timedelta(hours=1),
+    })
+    mongo.surveillance_logs.insert_one({
+        "escalated_at": now - timedelta(hours=1),
+        "escalated": [{"alert_key": alert_key("Pune", ["cough"]), "severity": "moderate", "case_count": 4}],
+    })
+    fresh = AlertIndex(window_hours=24, case_factor=2.0, refresh_seconds=0)
+    assert fresh.peek("Pune", ["fever"], "high", 10).action == SUPPRESSED
+    assert fresh.peek("Pune", ["fever"], "high", 10, channel=AUTHORITY).action == SUPPRESSED
+    assert fresh.peek("Pune", ["cough"], "moderate", 4, channel=SURVEILLANCE).action == SUPPRESSED
+    assert fresh.peek("Pune", ["cough"], "moderate", 4, channel=ALERT).action == NEW
+
+
+def test_resolve_clears_the_signature(index, mongo):
+    decision = index.check("Pune", ["fever"], "high", 10)
+    mongo.alerts.insert_one({
+        "alert_key": decision.key, "severity": "HIGH", "case_count": 10,
+        "is_resolved": False, "created_at": datetime.utcnow(),
+    })
+    assert decision.key in index.active()
+    assert index.resolve("Pune", ["fever"]) == 1
+    assert decision.key not in index.active()
+    assert index.check("Pune", ["fever"], "high", 10).action == NEW
@@ -0,0 +1,90 @@
+# tests/test_detectors.py
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from surveillance.detectors import (
+    cusum_detector,
+    ewma_detector,
+    poisson_detector,
+    run_detectors,
+    summarize_detections,
+)
+from surveillance.series import SeriesMatrix
+
+# Monday midnight, so period i ends on weekday i % 7
+START = datetime(2026, 9, 21)
+KEYS = [("Pune", "fever"), ("Mumbai", "cough")]
+
+
+def weekly_matrix(days: int = 29, current_fraction: float = 1.0, seed: int = 7) -> SeriesMatrix:
+    """Weekday/weekend pattern (10 vs 2 reports) with Poisson noise"""
+    rng = np.random.default_rng(seed)
+    period_ends = [START + timedelta(days=i + 1) for i in range(days)]
+    rates = np.array([10.0 if (end - timedelta(seconds=1)).weekday() < 5 else 2.0 for end in period_ends])
+    counts = rng.poisson(rates, (len(KEYS), days)).astype(float)
+    return SeriesMatrix(list(KEYS), counts, period_ends, current_fraction)
+
+
+def test_weekdays_follow_period_ends():
+    matrix = weekly_matrix(days=8)
+    assert list(matrix.weekdays) == [0, 1, 2, 3, 4, 5, 6, 0]
+
+
+def test_poisson_baseline_uses_day_of_week():
+    matrix = weekly_matrix(days=28)
+    # Last column is a Sunday: the weekend rate, not the weekly mean
+    assert matrix.weekdays[-1] == 6
+    expected = [r.expected for r in poisson_detector(matrix)]
+    assert all(e < 4 for e in expected)
+
+
+@pytest.mark.parametrize("detector", [ewma_detector, cusum_detector, poisson_detector])
+def test_steady_series_raise_no_alarm(detector):
+    matrix = weekly_matrix()
+    matrix.counts[:, -1] = 2
+    assert not any(r.is_anomaly for r in detector(matrix))
+
+
+@pytest.mark.parametrize("detector", [ewma_detector, cusum_detector, poisson_detector])
+def test_spike_is_flagged(detector):
+    matrix = weekly_matrix()
+    matrix.counts[0, -1] = 40
+    results = {(r.location, r.symptom): r for r in detector(matrix)}
+    assert results[KEYS[0]].is_anomaly
+    assert results[KEYS[0]].severity in ("moderate", "high")
+    assert not results[KEYS[1]].is_anomaly
+
+
+def test_partial_day_scales_expectation():
+    full = weekly_matrix()
+    partial = weekly_matrix(current_fraction=0.25)
+    full_expected = poisson_detector(full)[0].expected
+    assert poisson_detector(partial)[0].expected == pytest.approx(full_expected * 0.25, abs=0.01)
+
+    # A quarter of a normal weekday is quiet, not a drop or a spike...
+    matrix = weekly_matrix(days=31, current_fraction=0.25)
+    matrix.counts[:, -1] = 3
+    assert not any(r.is_anomaly for r in run_detectors(matrix, anomalies_only=False))
+    # ...but a full day's reports by breakfast is
+    matrix.counts[0, -1] = 20
+    assert {r.detector for r in run_detectors(matrix)} == {"ewma", "cusum", "poisson"}
+
+
+def test_min_count_suppresses_tiny_series():
+    matrix = SeriesMatrix([("Pune", "rash")], np.array([[0.0] * 28 + [2.0]]), weekly_matrix().period_ends)
+    assert run_detectors(matrix) == []
+
+
+def test_short_history_is_skipped():
+    assert run_detectors(weekly_matrix(days=2)) == []
+
+
+def test_summarize_detections_merges_detectors():
+    matrix = weekly_matrix()
+    matrix.counts[0, -1] = 40
+    summary = summarize_detections(run_detectors(matrix))
+    assert len(summary) == 1
+    assert (summary[0]["location"], summary[0]["symptom"]) == KEYS[0]
+    assert sorted(summary[0]["detectors"]) == ["cusum", "ewma", "poisson"]
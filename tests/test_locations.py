@@ -0,0 +1,45 @@
+# tests/test_locations.py
+import pytest
+
+from utils.locations import canonical_location_name, location_query, record_location_name, resolve_location
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("mumbai", "Mumbai"),
+    ("Pune 411001", "Pune"),
+    ("Andheri (E)", "Andheri"),
+    ("Dadar, Mumbai", "Dadar"),
+    ("Kalyan, Thane", "Kalyan"),
+    # Generic "<name> Nagar" suffixes must not shadow the city
+    ("Ambedkar Nagar, Mumbai", "Mumbai"),
+    ("Gandhi Nagar Pune", "Pune"),
+])
+def test_canonical_location_name(text, expected):
+    assert canonical_location_name(text) == expected
+
+
+@pytest.mark.parametrize("text", ["Bid Road", "Fort Kochi"])
+def test_unresolved_locations_are_not_guessed(text):
+    assert resolve_location(text) is None
+    assert canonical_location_name(text) == text
+
+
+@pytest.mark.parametrize("text", [None, ""])
+def test_missing_location_is_unknown(text):
+    assert canonical_location_name(text) == "Unknown"
+
+
+def test_resolved_location_has_kind_and_geohash():
+    resolved = resolve_location("Dadar, Mumbai")
+    assert resolved.kind == "area"
+    assert resolved.geohash.startswith("te7")
+
+
+def test_location_query_matches_canonical_and_raw_spelling():
+    assert sorted(location_query("pune")["$in"]) == ["Pune", "pune"]
+
+
+def test_record_location_name():
+    assert record_location_name({"location": "dadar, mumbai"}) == "Dadar"
+    # Records normalized at write time are taken as stored
+    assert record_location_name({"location": "Somewhere", "location_id": "x"}) == "Somewhere"
@@ -0,0 +1,65 @@
+# tests/test_series.py
+from datetime import datetime, timedelta
+
+import pytest
+
+import surveillance.series as series
+from surveillance.rollups import rollup_increments
+
+# Monday 06:00 UTC: the current day is a quarter over
+END = datetime(2026, 10, 19, 6, 0)
+MIDNIGHT = datetime(2026, 10, 19)
+
+
+@pytest.fixture
+def reports(mongo, monkeypatch):
+    """Write health records and their hourly rollups side by side"""
+    monkeypatch.setattr(series, "hourly_rollups_collection", mongo.rollups)
+
+    def write(reported_at, location="Pune", symptom_ids=(1,)):
+        record = {"reported_at": reported_at, "location": location, "symptom_ids": list(symptom_ids)}
+        mongo.health_records.insert_one(dict(record))
+        for query, inc, on_insert in rollup_increments(record):
+            mongo.rollups.update_one(query, {"$inc": inc, "$setOnInsert": on_insert}, upsert=True)
+
+    return write
+
+
+def as_dict(matrix):
+    return {key: list(matrix.row(key)) for key in matrix.keys}
+
+
+def test_columns_are_utc_calendar_days(mongo, reports):
+    reports(MIDNIGHT)                                   # first second of today
+    reports(MIDNIGHT - timedelta(seconds=1))            # last second of yesterday
+    reports(MIDNIGHT - timedelta(days=1, hours=-3))     # yesterday 03:00
+    reports(END + timedelta(minutes=5))                 # after the load time
+
+    matrix = series.load_daily_series(3, end=END, source=mongo.health_records)
+    assert as_dict(matrix) == {("Pune", "fever"): [0.0, 2.0, 1.0]}
+    assert matrix.period_ends == [MIDNIGHT - timedelta(days=1), MIDNIGHT, MIDNIGHT + timedelta(days=1)]
+    assert list(matrix.weekdays) == [5, 6, 0]
+    assert matrix.current_fraction == pytest.approx(0.25)
+
+
+def test_legacy_symptom_text_is_normalized(mongo):
+    mongo.health_records.insert_one({"reported_at": END - timedelta(hours=1), "location": "pune", "symptoms": ["bukhar"]})
+    matrix = series.load_daily_series(2, end=END, source=mongo.health_records)
+    assert as_dict(matrix) == {("Pune", "fever"): [0.0, 1.0]}
+
+
+def test_rollup_series_matches_raw_series(mongo, reports):
+    for day in range(10):
+        for hour in range(0, 24, 5):
+            reported_at = MIDNIGHT - timedelta(days=day) + timedelta(hours=hour, minutes=17)
+            if reported_at < END:
+                reports(reported_at, ["Pune", "Dadar, Mumbai"][hour % 2], [1, 2][: 1 + day % 2])
+
+    raw = series.load_daily_series(8, end=END, source=mongo.health_records)
+    rolled = series.load_daily_rollup_series(8, end=END)
+    assert as_dict(rolled) == as_dict(raw)
+    assert rolled.period_ends == raw.period_ends
+    assert rolled.current_fraction == raw.current_fraction
+    assert set(series.load_daily_rollup_series(8, end=END, location="Pune").keys) == {
+        ("Pune", "fever"), ("Pune", "cough"),
+    }
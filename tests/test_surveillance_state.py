@@ -0,0 +1,99 @@
+# tests/test_surveillance_state.py
+from datetime import datetime, timedelta
+
+import pytest
+
+import surveillance.state as state_module
+from surveillance.state import SurveillanceState, _RingMatrix
+from utils.symptoms import symptom_id
+
+NOW = datetime(2026, 10, 19, 12, 0)
+FEVER, COUGH = symptom_id("fever"), symptom_id("cough")
+
+
+def record(_id, minutes_ago, location="Pune", symptoms=(FEVER,), inserted_late=0):
+    reported_at = NOW - timedelta(minutes=minutes_ago)
+    return {
+        "_id": _id,
+        "reported_at": reported_at,
+        "inserted_at": reported_at + timedelta(minutes=inserted_late),
+        "location": location,
+        "symptom_ids": list(symptoms),
+    }
+
+
+@pytest.fixture
+def state():
+    return SurveillanceState(bucket_minutes=60, window_hours=24, baseline_days=7)
+
+
+def test_ring_matrix_expires_old_buckets():
+    ring = _RingMatrix(4)
+    ring.add("a", 10)
+    ring.add("a", 11, 2)
+    assert list(ring.window()) == [3]
+    assert list(ring.window(1)) == [2]
+    ring.advance(14)
+    assert list(ring.window()) == [2]
+    ring.advance(20)
+    assert list(ring.window()) == [0]
+    # Counts older than the window are refused
+    assert not ring.add("a", 15)
+
+
+def test_ingest_counts_windows_and_dedupes_by_id(state):
+    records = [
+        record(1, 10, symptoms=(FEVER, COUGH)),
+        record(2, 30, location="Dadar, Mumbai"),
+        record(3, 5 * 60),
+    ]
+    assert state.ingest(records) == 3
+    # Re-reading the overlap window must not count anything twice
+    assert state.ingest(records) == 0
+
+    assert state.location_counts() == {"Pune": 2, "Dadar": 1}
+    assert state.location_counts(hours=1) == {"Pune": 1, "Dadar": 1}
+    assert state.symptom_counts() == {"fever": 3, "cough": 1}
+    assert state.series_counts(hours=1) == {("Pune", FEVER): 1, ("Pune", COUGH): 1, ("Dadar", FEVER): 1}
+    assert state.pair_counts() == {("Pune", FEVER, COUGH): 1}
+    assert state.total_reports() == 3
+
+
+def test_late_inserts_land_in_their_reported_bucket(state):
+    state.ingest([record(1, 10)])
+    state.ingest([record(2, 3 * 60, inserted_late=3 * 60 - 1)])
+    assert state.location_counts(hours=1) == {"Pune": 1}
+    assert state.location_counts() == {"Pune": 2}
+    assert state.watermark == NOW - timedelta(minutes=1)
+
+
+def test_baseline_days_outlive_the_hourly_window(state):
+    state.ingest([record(1, 3 * 24 * 60), record(2, 10)])
+    reports, _ = state.baseline_counts()
+    assert reports == {"Pune": 2}
+    assert state.location_counts() == {"Pune": 1}
+
+
+def test_checkpoint_round_trip(state, mongo, monkeypatch):
+    monkeypatch.setattr(state_module, "surveillance_state_collection", mongo.surveillance_state)
+    state.ingest([record(1, 10, symptoms=(FEVER, COUGH)), record(2, 90)])
+    state.checkpoint()
+
+    restored = SurveillanceState(bucket_minutes=60, window_hours=24, baseline_days=7)
+    assert restored.restore()
+    assert restored.series_counts() == state.series_counts()
+    assert restored.baseline_counts() == state.baseline_counts()
+    assert restored.watermark == state.watermark
+    assert restored.ingest([record(1, 10)]) == 0
+
+
+def test_checkpoint_from_other_layout_or_source_is_rebuilt(state, mongo, monkeypatch):
+    monkeypatch.setattr(state_module, "surveillance_state_collection", mongo.surveillance_state)
+    state.ingest([record(1, 10)])
+    state.checkpoint()
+
+    assert not SurveillanceState(bucket_minutes=30, window_hours=24, baseline_days=7).restore()
+
+    other = SurveillanceState(bucket_minutes=60, window_hours=24, baseline_days=7)
+    other.source = "health_events"
+    assert not other.restore()
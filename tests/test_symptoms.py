@@ -0,0 +1,48 @@
+# tests/test_symptoms.py
+import pytest
+
+from utils.symptoms import (
+    OTHER_SYMPTOM_ID,
+    match_symptoms,
+    normalize_symptoms,
+    query_symptom_ids,
+    record_symptom_ids,
+    symptom_id,
+    symptom_name,
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("high fever and cough", ["fever", "cough"]),
+    ("fever, headache", ["fever", "headache"]),
+    ("bukhar", ["fever"]),
+    ("khansi", ["cough"]),
+])
+def test_match_symptoms_finds_synonyms(text, expected):
+    assert [symptom_name(i) for i in match_symptoms(text)] == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("no fever", []),
+    ("not fever or cough", []),
+    ("bukhar nahi hai", []),
+    ("no fever but cough", ["cough"]),
+])
+def test_match_symptoms_skips_negated_mentions(text, expected):
+    assert [symptom_name(i) for i in match_symptoms(text)] == expected
+
+
+def test_normalize_symptoms_dedupes_and_keeps_unknown_as_other():
+    assert normalize_symptoms(["fever", "Fever", "cough", "itching", ""]) == [
+        symptom_id("fever"), symptom_id("cough"), OTHER_SYMPTOM_ID,
+    ]
+
+
+def test_query_symptom_ids():
+    assert query_symptom_ids("fever") == (symptom_id("fever"),)
+
+
+def test_record_symptom_ids_falls_back_to_raw_text():
+    ids = [symptom_id("fever"), symptom_id("cough")]
+    assert record_symptom_ids({"symptom_ids": ids}) == ids
+    assert record_symptom_ids({"symptoms": ["fever", "cough"]}) == ids
@@ -9,7 +9,13 @@ from .telegram_tools import (
     send_telegram_message,
     broadcast_telegram_message
 )
-from .anomaly_tools import detect_spike
+from .anomaly_tools import (
+    detect_spike,
+    run_outbreak_detectors,
+    scan_space_time_clusters,
+    compute_symptom_correlation,
+    read_surveillance_snapshot
+)
 from .gov_mock_tools import submit_to_mock_authority
 
 __all__ = [
@@ -21,5 +27,9 @@ __all__ = [
     "send_telegram_message",
     "broadcast_telegram_message",
     "detect_spike",
+    "run_outbreak_detectors",
+    "scan_space_time_clusters",
+    "compute_symptom_correlation",
+    "read_surveillance_snapshot",
     "submit_to_mock_authority"
 ]
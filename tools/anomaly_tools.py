@@ -1,7 +1,15 @@
 from crewai.tools import tool
-from typing import Dict
+from typing import Dict, List, Optional
+from config import settings
+from surveillance.detectors import run_detectors, summarize_detections
+from surveillance.scan import run_space_time_scan
+from surveillance.series import load_daily_series
+from surveillance.snapshot import get_snapshot_cache
+from surveillance.state import get_surveillance_state
+from surveillance.syndromes import compute_correlations
 from utils import log
 import statistics
+import json
 from builtins import str, bool, int, float, dict, list,len,round, Exception
 @tool("Detect Spike")
 def detect_spike(
@@ -72,9 +80,185 @@ def detect_spike(
         if anomalies:
             log.warning(f"Anomalies detected: {len(anomalies)}")
         
-        import json
         return json.dumps(result)
         
     except Exception as e:
         log.error(f"Error in anomaly detection: {str(e)}")
         return f"Error in anomaly detection: {str(e)}"
+
+
+@tool("Run Outbreak Detectors")
+def run_outbreak_detectors(
+    baseline_days: int = settings.DETECTOR_BASELINE_DAYS,
+    location: Optional[str] = None,
+    detectors: Optional[List[str]] = None
+) -> str:
+    """
+    Run EWMA, CUSUM and Poisson (day-of-week) outbreak detectors over the
+    daily counts of every location and symptom in one call.
+    
+    Args:
+        baseline_days: Days of history used as the baseline (default: 56)
+        location: Restrict analysis to one location (optional)
+        detectors: Subset of "ewma", "cusum", "poisson" (default: all)
+    
+    Returns:
+        str: JSON string with anomalies per series and an escalation flag
+    """
+    try:
+        matrix = load_daily_series(days=int(baseline_days) + 1, location=location)
+        results = run_detectors(matrix, detectors or ("ewma", "cusum", "poisson"))
+        anomalies = summarize_detections(results)
+        
+        result = {
+            'series_analyzed': len(matrix),
+            'baseline_days': int(baseline_days),
+            'anomalies_detected': len(anomalies),
+            'escalation_required': any(len(a['detectors']) >= 2 or a['severity'] == 'high' for a in anomalies),
+            'anomalies': anomalies[:20]
+        }
+        
+        if anomalies:
+            log.warning(f"Outbreak detectors flagged {len(anomalies)} series")
+        
+        return json.dumps(result)
+        
+    except Exception as e:
+        log.error(f"Error running outbreak detectors: {str(e)}")
+        return f"Error running outbreak detectors: {str(e)}"
+
+
+@tool("Scan Space-Time Clusters")
+def scan_space_time_clusters(
+    symptom: Optional[str] = None,
+    periods: int = settings.SCAN_STUDY_PERIODS,
+    period_hours: int = 24
+) -> str:
+    """
+    Find geographic clusters of recent cases with a space-time permutation
+    scan over neighbouring locations, with Monte Carlo p-values.
+    
+    Args:
+        symptom: Only count reports with this symptom (optional)
+        periods: Number of periods in the study window (default: 28)
+        period_hours: Length of each period in hours (default: 24)
+    
+    Returns:
+        str: JSON string with significant clusters
+    """
+    try:
+        clusters = run_space_time_scan(
+            periods=int(periods),
+            period_hours=int(period_hours),
+            symptom=symptom
+        )
+        
+        result = {
+            'clusters_detected': len(clusters),
+            'escalation_required': len(clusters) > 0,
+            'clusters': [c.model_dump(mode="json") for c in clusters]
+        }
+        
+        return json.dumps(result)
+        
+    except Exception as e:
+        log.error(f"Error in space-time scan: {str(e)}")
+        return f"Error in space-time scan: {str(e)}"
+
+
+@tool("Compute Symptom Correlation")
+def compute_symptom_correlation(
+    time_window_hours: int = 24,
+    location: Optional[str] = None,
+    min_count: int = settings.DETECTOR_MIN_COUNT
+) -> str:
+    """
+    Find symptoms reported together more often than chance (lift / PMI)
+    and count respiratory, gastrointestinal and vector-borne syndrome
+    clusters, per location.
+    
+    Args:
+        time_window_hours: Window to analyze in hours (default: 24)
+        location: Restrict analysis to one location (optional)
+        min_count: Minimum co-occurrences for a symptom pair (default: 3)
+    
+    Returns:
+        str: JSON string with syndrome counts and elevated symptom pairs
+    """
+    try:
+        state = get_surveillance_state()
+        state.refresh()
+        overall = compute_correlations(state, time_window_hours, location=location)[0]
+        
+        hotspots = []
+        if not location:
+            for correlation in compute_correlations(state, time_window_hours, per_location=True):
+                elevated = [s for s in correlation.syndromes() if s['elevated']]
+                if elevated:
+                    hotspots.append({
+                        'location': correlation.location,
+                        'reports': correlation.reports,
+                        'syndromes': elevated
+                    })
+        
+        result = {
+            'time_window_hours': time_window_hours,
+            **overall.to_dict(int(min_count)),
+            'syndrome_hotspots': hotspots[:10],
+            'escalation_required': any(s['elevated'] for s in overall.syndromes()) or bool(hotspots)
+        }
+        
+        return json.dumps(result)
+        
+    except Exception as e:
+        log.error(f"Error computing symptom correlation: {str(e)}")
+        return f"Error computing symptom correlation: {str(e)}"
+
+
+@tool("Read Surveillance Snapshot")
+def read_surveillance_snapshot(location: Optional[str] = None) -> str:
+    """
+    Latest results of the scheduled surveillance analysis: case counts,
+    detector anomalies, pending escalations and syndrome clusters, with
+    the time they were computed. Reads a cached snapshot, so it is cheap
+    to call on every message.
+    
+    Args:
+        location: Only include anomalies and escalations for this location (optional)
+    
+    Returns:
+        str: JSON string with the snapshot summary
+    """
+    try:
+        cache = get_snapshot_cache()
+        snapshot = cache.current()
+        if snapshot is None:
+            return json.dumps({'available': False, 'message': 'No surveillance analysis has run yet'})
+        
+        def matches(item):
+            return not location or str(item.get('location', '')).lower() == location.lower()
+        
+        top_locations = sorted(snapshot['location_counts'].items(), key=lambda kv: kv[1], reverse=True)[:10]
+        top_symptoms = sorted(snapshot['symptom_counts'].items(), key=lambda kv: kv[1], reverse=True)[:10]
+        result = {
+            'available': True,
+            **cache.freshness(snapshot),
+            'window_hours': snapshot['window_hours'],
+            'total_reports': snapshot['total_reports'],
+            'top_locations': dict(top_locations),
+            'top_symptoms': dict(top_symptoms),
+            'anomalies': [a for a in snapshot['anomalies'] if matches(a)][:10],
+            'escalations': [
+                {k: e.get(k) for k in ('location', 'symptom', 'severity', 'observed', 'expected', 'windows', 'decision')}
+                for e in snapshot['escalations'] if matches(e)
+            ][:10],
+            'elevated_syndromes': [s for s in snapshot['syndromes'] if s['elevated']],
+            'hotspots': [h for h in snapshot['hotspots'] if matches(h)][:5]
+        }
+        result['computed_at'] = result['computed_at'].isoformat()
+        
+        return json.dumps(result, default=str)
+        
+    except Exception as e:
+        log.error(f"Error reading surveillance snapshot: {str(e)}")
+        return f"Error reading surveillance snapshot: {str(e)}"
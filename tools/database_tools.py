@@ -19,6 +19,15 @@ from database import (
     SessionState,
 )
 from utils import log
+from database.session_store import TRANSITIONS, InvalidTransition, get_session_store
+from database.user_cache import get_user_cache
+from database.write_batcher import get_write_batcher
+from followups.queue import followup_priority, get_followup_queue
+from surveillance.alerts import ESCALATION, get_alert_index
+from surveillance.rollups import hourly_rollups_collection, rollup_increments
+from surveillance.timeseries import event_from_record, timeseries_collection
+from utils.locations import location_fields, location_query, record_location_name
+from utils.symptoms import normalize_symptoms, record_symptom_ids, symptom_name, SYMPTOM_IDS
 
 
 # ✅ REMOVED: nest_asyncio.apply() - causes Uvicorn errors
@@ -69,41 +78,8 @@ def _run_async(coro):
 
 
 async def _fetch_user(telegram_id: str):
-    """Fetch user from database"""
-    return await users_collection.find_one({"telegram_id": telegram_id})
-
-
-async def _fetch_active_session(telegram_id: str):
-    """Fetch active session for user"""
-    return await sessions_collection.find_one(
-        {
-            "telegram_id": telegram_id,
-            "session_state": {"$ne": SessionState.COMPLETED.value},
-        },
-        sort=[("started_at", DESCENDING)],
-    )
-
-
-async def _ensure_session(telegram_id: str):
-    """Ensure user has an active session"""
-    session = await _fetch_active_session(telegram_id)
-    now = datetime.utcnow()
-    
-    if session:
-        await sessions_collection.update_one(
-            {"_id": session["_id"]},
-            {"$set": {"last_activity": now}},
-        )
-        return await sessions_collection.find_one({"_id": session["_id"]})
-    
-    session_model = Session(
-        telegram_id=telegram_id,
-        session_state=SessionState.INITIAL,
-    )
-    payload = _model_dump(session_model)
-    result = await sessions_collection.insert_one(payload)
-    payload["_id"] = result.inserted_id
-    return payload
+    """Fetch user from the profile cache"""
+    return await get_user_cache().aget(telegram_id)
 
 
 # ========== CREWAI TOOLS (SYNC) ==========
@@ -121,7 +97,7 @@ def get_user_session(telegram_id: str) -> str:
     """
     try:
         # ✅ Use SYNC MongoDB (no async needed)
-        user = sync_users.find_one({"telegram_id": telegram_id})
+        user = get_user_cache().get(telegram_id)
         if not user:
             return json.dumps({
                 "error": "User not found",
@@ -129,30 +105,25 @@ def get_user_session(telegram_id: str) -> str:
                 "found": False
             })
         
-        session = sync_sessions.find_one(
-            {
-                "telegram_id": telegram_id,
-                "session_state": {"$ne": "COMPLETED"}
-            },
-            sort=[("started_at", -1)]
-        )
+        session = get_session_store().get_active(telegram_id)
         
         if not session:
             return json.dumps({
                 "user_id": str(user.get("_id")),
                 "telegram_id": telegram_id,
                 "session": None,
-                "state": "INITIAL",
+                "state": SessionState.INITIAL.value,
                 "found": True
             })
         
         result = {
-            'session_id': str(session.get('_id')),
-            'state': session.get('session_state', 'INITIAL'),
-            'context': session.get('context', {}),
-            'current_question': session.get('current_question', 0),
-            'symptoms_collected': session.get('symptoms_collected', []),
-            'started_at': session.get('started_at', datetime.utcnow()).isoformat(),
+            'session_id': session.id,
+            'state': session.session_state.value,
+            'allowed_transitions': sorted(s.value for s in TRANSITIONS[session.session_state]),
+            'context': session.context,
+            'current_question': session.current_question,
+            'symptoms_collected': session.symptoms_collected,
+            'started_at': session.started_at.isoformat(),
             'user_info': {
                 'name': f"{user.get('first_name', '')} {user.get('last_name', '')}".strip(),
                 'location': user.get('location'),
@@ -215,8 +186,8 @@ def write_health_record(**kwargs) -> str:
         if not telegram_id or telegram_id == "None":
             # Try to infer from most recent active session (common CrewAI case)
             latest_session = sync_sessions.find_one(
-                {"session_state": {"$ne": "COMPLETED"}},
-                sort=[("started_at", -1)],
+                {"active": True},
+                sort=[("last_activity", -1)],
             )
             inferred_id = latest_session.get("telegram_id") if latest_session else None
 
@@ -285,7 +256,7 @@ def write_health_record(**kwargs) -> str:
             followup_hours = None
         
         # ✅ DATABASE OPERATION - SYNC MongoDB
-        user = sync_users.find_one({"telegram_id": telegram_id})
+        user = get_user_cache().get(telegram_id)
         
         if not user:
             # Create user if not exists
@@ -296,46 +267,59 @@ def write_health_record(**kwargs) -> str:
                 "updated_at": datetime.utcnow()
             }
             result = sync_users.insert_one(user_data)
-            user = sync_users.find_one({"_id": result.inserted_id})
+            user_data["_id"] = result.inserted_id
+            user = get_user_cache().put(user_data)
             log.info(f"✅ Created user {telegram_id}")
         
-        # Get session (optional)
-        session = sync_sessions.find_one(
-            {
-                "telegram_id": telegram_id,
-                "session_state": {"$ne": "COMPLETED"}
-            },
-            sort=[("started_at", -1)]
-        )
+        # Get session (optional, usually served from the hot cache)
+        session = get_session_store().get_active(telegram_id)
+        
+        # Canonical symptom IDs stored alongside the raw text for aggregation
+        symptom_ids = normalize_symptoms(symptoms or [])
+        
+        # Resolve location against the gazetteer so surveillance groups by stable IDs
+        resolved_location = location_fields(location or user.get("location"))
         
         # Create health record
         record = {
             "telegram_id": telegram_id,
             "user_id": str(user["_id"]),
-            "session_id": str(session["_id"]) if session else None,
+            "session_id": session.id if session else None,
             "symptoms": symptoms or [],
+            "symptom_ids": symptom_ids,
             "symptom_details": symptom_details or {},
             "risk_level": risk_level.upper(),
             "severity_score": float(severity_score),
-            "location": location or user.get("location", "Unknown"),
+            **resolved_location,
             "reported_at": datetime.utcnow(),
             "temperature": temperature,
-            "has_fever": (temperature and temperature > 37.5) if temperature else ('fever' in str(symptoms).lower()),
-            "has_cough": 'cough' in str(symptoms).lower(),
-            "has_breathing_difficulty": any(term in str(symptoms).lower() for term in ['breath', 'breathing', 'shortness']),
+            "has_fever": (temperature and temperature > 37.5) if temperature else (SYMPTOM_IDS["fever"] in symptom_ids),
+            "has_cough": SYMPTOM_IDS["cough"] in symptom_ids,
+            "has_breathing_difficulty": SYMPTOM_IDS["breathing difficulty"] in symptom_ids,
             "agent_assessment": agent_assessment or "Assessment completed",
             "recommendations": recommendations or [],
             "requires_followup": bool(requires_followup),
+            "followup_completed": False,
             "created_at": datetime.utcnow()
         }
         
         if followup_hours:
             record["followup_date"] = datetime.utcnow() + timedelta(hours=int(followup_hours))
-        
-        result = sync_health_records.insert_one(record)
-        
-        log.info(f"✅ Health record created: ID={result.inserted_id}, Risk={risk_level.upper()}")
-        return f"✅ SUCCESS: Health record saved (ID: {result.inserted_id}). Risk: {risk_level.upper()}, Severity: {severity_score}/10"
+            record["followup_priority"] = followup_priority(record["risk_level"], record["severity_score"])
+        
+        # Record and its hourly rollups are written by the batcher within milliseconds
+        batcher = get_write_batcher()
+        record_id = batcher.insert(sync_health_records.name, record)
+        for key, inc, on_insert in rollup_increments(record):
+            batcher.increment(hourly_rollups_collection.name, key, inc, on_insert)
+        if settings.HEALTH_TIMESERIES_ENABLED:
+            batcher.insert(timeseries_collection().name, event_from_record(record))
+        if record["requires_followup"] and record.get("followup_date"):
+            # Fires at followup_date in the API process's follow-up scheduler
+            get_followup_queue().add(record_id, record["followup_date"], record["followup_priority"])
+        
+        log.info(f"✅ Health record queued: ID={record_id}, Risk={risk_level.upper()}")
+        return f"✅ SUCCESS: Health record saved (ID: {record_id}). Risk: {risk_level.upper()}, Severity: {severity_score}/10"
         
     except Exception as e:
         log.error(f"❌ Error in write_health_record: {str(e)}")
@@ -365,54 +349,25 @@ def update_session(
     """
     try:
         # ✅ Use SYNC MongoDB
-        user = sync_users.find_one({"telegram_id": telegram_id})
+        user = get_user_cache().get(telegram_id)
         if not user:
             return "❌ No user found"
         
-        session = sync_sessions.find_one(
-            {
-                "telegram_id": telegram_id,
-                "session_state": {"$ne": "COMPLETED"}
-            },
-            sort=[("started_at", -1)]
-        )
-        
-        if not session:
-            # Create new session
-            session = {
-                "telegram_id": telegram_id,
-                "session_state": "INITIAL",
-                "context": {},
-                "symptoms_collected": [],
-                "started_at": datetime.utcnow(),
-                "last_activity": datetime.utcnow()
-            }
-            result = sync_sessions.insert_one(session)
-            session["_id"] = result.inserted_id
-        
-        updates = {}
-        
-        if session_state:
-            try:
-                updates["session_state"] = SessionState[session_state.upper()].value
-            except KeyError:
-                log.warning(f"Invalid session state: {session_state}")
-        
-        if context:
-            merged_context = {**session.get("context", {}), **context}
-            updates["context"] = merged_context
-        
-        if symptoms_collected:
-            current = set(session.get("symptoms_collected", []))
-            current.update(symptoms_collected)
-            updates["symptoms_collected"] = list(current)
-        
-        updates["last_activity"] = datetime.utcnow()
-        
-        sync_sessions.update_one(
-            {"_id": session["_id"]},
-            {"$set": updates}
-        )
+        store = get_session_store()
+        try:
+            store.update(
+                telegram_id,
+                state=session_state or None,
+                context=context,
+                symptoms=symptoms_collected,
+            )
+        except InvalidTransition as e:
+            # Keep the context and symptoms; only the state change is refused
+            log.warning(f"⚠️ Rejected session transition for {telegram_id}: {e}")
+            if context or symptoms_collected:
+                store.update(telegram_id, context=context, symptoms=symptoms_collected)
+                return f"⚠️ Context and symptoms saved, but the state change was rejected: {e}"
+            return f"❌ {e}"
         
         log.info(f"✅ Session updated for {telegram_id}")
         return f"✅ Session updated successfully for {telegram_id}"
@@ -445,7 +400,7 @@ def get_recent_symptoms(
         query = {"reported_at": {"$gte": cutoff_time}}
         
         if location:
-            query["location"] = location
+            query["location"] = location_query(location)
         
         records = list(
             sync_health_records.find(query)
@@ -458,12 +413,13 @@ def get_recent_symptoms(
         risk_distribution = {'LOW': 0, 'MODERATE': 0, 'HIGH': 0, 'CRITICAL': 0}
         
         for record in records:
-            # Count symptoms
-            for symptom in record.get("symptoms", []):
+            # Count canonical symptoms
+            for symptom_id in record_symptom_ids(record):
+                symptom = symptom_name(symptom_id)
                 symptom_counts[symptom] = symptom_counts.get(symptom, 0) + 1
             
             # Count locations
-            record_location = record.get("location")
+            record_location = record_location_name(record)
             if record_location:
                 location_counts[record_location] = location_counts.get(record_location, 0) + 1
             
@@ -527,7 +483,14 @@ def write_alert_log(
         str: Success message
     """
     try:
-        # ✅ Use SYNC MongoDB
+        # Drop duplicates of an active alert before touching the database
+        decision = get_alert_index().check(affected_location, affected_symptoms, severity, case_count)
+        if not decision.allowed:
+            return (
+                f"⏭️ Duplicate alert suppressed: {decision.reason} (alert ID {decision.previous_id}). "
+                f"No new alert logged; do not notify again for this outbreak."
+            )
+        
         alert = {
             "alert_type": alert_type,
             "severity": severity.upper(),
@@ -537,14 +500,27 @@ def write_alert_log(
             "affected_symptoms": affected_symptoms or [],
             "case_count": case_count,
             "anomaly_score": anomaly_score,
+            "alert_key": decision.key,
+            "escalation_of": decision.previous_id,
+            "is_resolved": False,
             "sent_at": datetime.utcnow(),
             "created_at": datetime.utcnow()
         }
         
-        result = sync_alerts.insert_one(alert)
-        
-        log.warning(f"🚨 Alert logged: {alert_type} - {title}")
-        return f"✅ Alert logged with ID {result.inserted_id}"
+        # Written directly, not batched: alerts are rare and a failed write
+        # has to release the dedup mark before anyone relies on it
+        try:
+            alert_id = sync_alerts.insert_one(alert).inserted_id
+        except Exception:
+            # Not logged, so it must not suppress the next attempt
+            get_alert_index().rollback(decision)
+            raise
+        get_alert_index().attach(decision.key, str(alert_id))
+        
+        log.warning(f"🚨 Alert logged ({decision.action}): {alert_type} - {title}")
+        if decision.action == ESCALATION:
+            return f"✅ Alert logged with ID {alert_id} (escalation of {decision.previous_id}: {decision.reason})"
+        return f"✅ Alert logged with ID {alert_id}"
         
     except Exception as e:
         log.error(f"❌ Error logging alert: {str(e)}")
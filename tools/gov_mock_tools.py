@@ -1,7 +1,7 @@
 from crewai.tools import tool
-from datetime import datetime
 from utils import log
-import json
+from reporting import AuthoritySubmission, get_reporting_pipeline
+from surveillance.alerts import AUTHORITY, get_alert_index
 from builtins import str, bool, int, float, dict, list,len,round, Exception, any, set, KeyError, open
 @tool("Submit to Mock Authority")
 def submit_to_mock_authority(
@@ -24,37 +24,38 @@ def submit_to_mock_authority(
         summary: Alert summary
     
     Returns:
-        str: Submission confirmation
+        str: Queueing confirmation (delivery to the authority is asynchronous)
     """
     try:
-        submission_data = {
-            'submission_id': f"MOCK-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}",
-            'timestamp': datetime.utcnow().isoformat(),
-            'alert_type': alert_type,
-            'severity': severity,
-            'location': location,
-            'case_count': case_count,
-            'symptoms': symptoms,
-            'summary': summary,
-            'status': 'submitted',
-            'authority_response': 'Alert received and logged. Investigation team will be notified.'
-        }
+        if isinstance(symptoms, str):
+            symptoms = [s.strip() for s in symptoms.split(',') if s.strip()]
         
-        # Log to file
-        log_file = "data/mock_gov_submissions.json"
-        try:
-            with open(log_file, 'r') as f:
-                submissions = json.load(f)
-        except:
-            submissions = []
+        # Each outbreak signature is reported once, and again only on escalation
+        alerts = get_alert_index()
+        decision = alerts.check(location, symptoms, severity, case_count, channel=AUTHORITY)
+        if not decision.allowed:
+            return f"Already reported to health authority ({decision.reason}). Submission skipped."
         
-        submissions.append(submission_data)
+        submission = AuthoritySubmission(
+            alert_type=alert_type,
+            severity=severity,
+            location=location,
+            case_count=int(case_count or 0),
+            symptoms=[str(s) for s in symptoms or []],
+            summary=summary,
+        )
         
-        with open(log_file, 'w') as f:
-            json.dump(submissions, f, indent=2)
+        # Queued and delivered in batches by the reporting pipeline
+        try:
+            submission_id = get_reporting_pipeline().submit(submission)
+        except Exception:
+            # Not queued, so it must not suppress the next attempt
+            alerts.rollback(decision)
+            raise
+        alerts.mark_submitted(decision.key)
         
-        log.info(f"Mock submission to authority: {submission_data['submission_id']}")
-        return f"Successfully submitted to health authority. Submission ID: {submission_data['submission_id']}"
+        log.info(f"Queued submission to authority: {submission_id}")
+        return f"Queued for delivery to health authority. Submission ID: {submission_id}"
         
     except Exception as e:
         log.error(f"Error in mock authority submission: {str(e)}")
@@ -2,20 +2,13 @@ from crewai.tools import tool
 from config import settings
 from utils import log
 from utils.translation import translate_text_sync
-from pymongo import MongoClient
-import requests
-
-_mongo_client = MongoClient(settings.MONGODB_URL)
-_mongo_db = _mongo_client[settings.MONGODB_DB_NAME]
-_users_collection = _mongo_db["users"]
+from messaging import enqueue_message, get_broadcast_engine
+from database.user_cache import get_user_cache
 
 
 def _get_user_language(chat_id: str) -> str:
     try:
-        doc = _users_collection.find_one({"telegram_id": str(chat_id)}, {"preferred_language": 1})
-        lang = doc.get("preferred_language") if doc else None
-        if lang in ("en", "hi", "mr"):
-            return lang
+        return get_user_cache().get_language(chat_id)
     except Exception as db_err:
         log.warning("Unable to fetch language for %s: %s", chat_id, db_err)
     return "en"
@@ -41,19 +34,11 @@ def send_telegram_message(chat_id: str, message: str, parse_mode: str = "HTML")
 
         log.info("🌐 Sending in %s language", language)
 
-        # Send message to Telegram
-        url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
-        payload = {
-            "chat_id": chat_id,
-            "text": text_to_send,
-            "parse_mode": parse_mode
-        }
-
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
+        # Queue in the durable outbox; workers deliver with retries so the crew never blocks
+        enqueue_message(chat_id, text_to_send, parse_mode=parse_mode, source="send_telegram_message")
 
-        log.info(f"✅ Message sent to {chat_id}")
-        return f"Message sent successfully to {chat_id}"
+        log.info(f"📮 Message for {chat_id} queued for delivery")
+        return f"Message queued for delivery to {chat_id}"
 
     except Exception as e:
         log.error(f"❌ Error sending Telegram message: {str(e)}")
@@ -66,36 +51,20 @@ def broadcast_telegram_message(chat_ids: list, message: str) -> str:
     Broadcast a message to multiple users via Telegram.
     """
     try:
-        url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
-        success_count = 0
-
-        for chat_id in chat_ids:
-            try:
-                language = _get_user_language(chat_id)
-
-                # Same translation logic with fallback
-                if language != "en":
-                    translated = translate_text_sync(message, language)
-                    text_to_send = translated if translated else message
-                else:
-                    text_to_send = message
-
-                payload = {
-                    "chat_id": chat_id,
-                    "text": text_to_send,
-                    "parse_mode": "HTML"
-                }
-
-                response = requests.post(url, json=payload)
-                response.raise_for_status()
-                success_count += 1
-
-            except Exception as e:
-                log.error(f"Failed to send to {chat_id}: {str(e)}")
-                continue
-
-        log.info(f"Broadcast completed: {success_count}/{len(chat_ids)} successful")
-        return f"Broadcast completed: {success_count}/{len(chat_ids)} messages sent successfully"
+        engine = get_broadcast_engine()
+        job_id = engine.create_job(chat_ids, message)
+
+        # Large broadcasts keep running in the background after the wait
+        progress = engine.run_sync(job_id, wait=settings.BROADCAST_TOOL_WAIT_SECONDS)
+        if progress.status != "completed":
+            log.info(f"📣 Broadcast {job_id} still running: {progress.sent + progress.failed}/{progress.total}")
+            return (
+                f"Broadcast {job_id} in progress: {progress.sent}/{progress.total} sent so far, "
+                f"continuing in the background"
+            )
+
+        log.info(f"Broadcast completed: {progress.sent}/{progress.total} successful")
+        return f"Broadcast completed: {progress.sent}/{progress.total} messages sent successfully"
 
     except Exception as e:
         log.error(f"Error broadcasting messages: {str(e)}")
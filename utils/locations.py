@@ -0,0 +1,397 @@
+# utils/locations.py
+import difflib
+import json
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, ConfigDict
+
+from config import settings
+from utils.logger import log
+
+# Bump when entries are added or aliases change so stored aggregates get rebuilt
+GAZETTEER_VERSION = 2
+
+# (id, name, kind, district, lat, lon, aliases, pincodes)
+# IDs are stored in health records - never reuse or rename them. Aliases must
+# be specific: generic words ("nagar", "fort", "road") appear in addresses
+# all over the state.
+GAZETTEER: List[Tuple[str, str, str, str, float, float, List[str], List[str]]] = [
+    # Mumbai
+    ("mh-mumbai", "Mumbai", "district", "Mumbai", 18.9388, 72.8354,
+     ["bombay", "mumbai city", "south mumbai", "colaba", "मुंबई", "मुम्बई"], []),
+    ("mh-mumbai-suburban", "Mumbai Suburban", "district", "Mumbai Suburban", 19.1136, 72.8697,
+     ["suburban mumbai", "mumbai suburbs", "मुंबई उपनगर"], []),
+    ("mh-mumbai-suburban-andheri", "Andheri", "area", "Mumbai Suburban", 19.1197, 72.8468,
+     ["andheri", "अंधेरी"], ["400053", "400058", "400059", "400069", "400093"]),
+    ("mh-mumbai-suburban-bandra", "Bandra", "area", "Mumbai Suburban", 19.0596, 72.8295,
+     ["bandra", "वांद्रे", "बांद्रा"], ["400050", "400051"]),
+    ("mh-mumbai-suburban-borivali", "Borivali", "area", "Mumbai Suburban", 19.2307, 72.8567,
+     ["borivali", "borivli", "बोरीवली"], ["400066", "400091", "400092"]),
+    ("mh-mumbai-dadar", "Dadar", "area", "Mumbai", 19.0178, 72.8478,
+     ["dadar", "दादर"], ["400014", "400028"]),
+    ("mh-mumbai-suburban-kurla", "Kurla", "area", "Mumbai Suburban", 19.0726, 72.8845,
+     ["kurla", "कुर्ला"], ["400070", "400024"]),
+    ("mh-mumbai-suburban-ghatkopar", "Ghatkopar", "area", "Mumbai Suburban", 19.0860, 72.9081,
+     ["ghatkopar", "घाटकोपर"], ["400077", "400084", "400086"]),
+    # Thane
+    ("mh-thane", "Thane", "district", "Thane", 19.2183, 72.9781,
+     ["thane", "thana", "ठाणे"], ["400601", "400602", "400603", "400604", "400606", "400607", "400610", "400615"]),
+    ("mh-thane-kalyan", "Kalyan", "city", "Thane", 19.2403, 73.1305,
+     ["kalyan", "कल्याण"], ["421301", "421306"]),
+    ("mh-thane-dombivli", "Dombivli", "city", "Thane", 19.2094, 73.0939,
+     ["dombivli", "dombivali", "डोंबिवली"], ["421201", "421202", "421203", "421204"]),
+    ("mh-thane-bhiwandi", "Bhiwandi", "city", "Thane", 19.2813, 73.0483,
+     ["bhiwandi", "भिवंडी"], ["421302", "421305"]),
+    ("mh-thane-ulhasnagar", "Ulhasnagar", "city", "Thane", 19.2215, 73.1645,
+     ["ulhasnagar", "उल्हासनगर"], ["421001", "421002", "421003", "421004", "421005"]),
+    ("mh-thane-ambernath", "Ambernath", "city", "Thane", 19.1864, 73.1925,
+     ["ambernath", "ambarnath", "अंबरनाथ"], ["421501", "421505"]),
+    ("mh-thane-badlapur", "Badlapur", "city", "Thane", 19.1550, 73.2650,
+     ["badlapur", "बदलापूर"], ["421503"]),
+    ("mh-thane-mira-bhayandar", "Mira-Bhayandar", "city", "Thane", 19.2952, 72.8544,
+     ["mira road", "bhayandar", "mira bhayandar", "मीरा भाईंदर"], ["401101", "401105", "401107"]),
+    ("mh-thane-navi-mumbai", "Navi Mumbai", "city", "Thane", 19.0330, 73.0297,
+     ["navi mumbai", "new bombay", "vashi", "nerul", "belapur", "airoli", "kharghar", "नवी मुंबई"],
+     ["400703", "400705", "400706", "400708", "400614", "410210"]),
+    # Konkan
+    ("mh-palghar", "Palghar", "district", "Palghar", 19.6967, 72.7699,
+     ["palghar", "पालघर"], ["401404"]),
+    ("mh-palghar-vasai-virar", "Vasai-Virar", "city", "Palghar", 19.3919, 72.8397,
+     ["vasai", "virar", "nalasopara", "vasai virar", "वसई", "विरार"], ["401201", "401202", "401203", "401303", "401305"]),
+    ("mh-raigad", "Raigad", "district", "Raigad", 18.6414, 72.8722,
+     ["raigad", "raigarh", "alibag", "alibaug", "रायगड"], []),
+    ("mh-raigad-panvel", "Panvel", "city", "Raigad", 18.9894, 73.1175,
+     ["panvel", "पनवेल"], ["410206"]),
+    ("mh-ratnagiri", "Ratnagiri", "district", "Ratnagiri", 16.9902, 73.3120,
+     ["ratnagiri", "रत्नागिरी"], []),
+    ("mh-sindhudurg", "Sindhudurg", "district", "Sindhudurg", 16.1100, 73.6900,
+     ["sindhudurg", "oros", "सिंधुदुर्ग"], []),
+    # Pune division
+    ("mh-pune", "Pune", "district", "Pune", 18.5204, 73.8567,
+     ["pune", "poona", "पुणे"], []),
+    ("mh-pune-pimpri-chinchwad", "Pimpri-Chinchwad", "city", "Pune", 18.6298, 73.7997,
+     ["pimpri", "chinchwad", "pimpri chinchwad", "pcmc", "पिंपरी चिंचवड"], ["411017", "411018", "411019", "411033", "411044"]),
+    ("mh-pune-baramati", "Baramati", "city", "Pune", 18.1515, 74.5815,
+     ["baramati", "बारामती"], ["413102"]),
+    ("mh-satara", "Satara", "district", "Satara", 17.6805, 74.0183,
+     ["satara", "सातारा"], []),
+    ("mh-sangli", "Sangli", "district", "Sangli", 16.8524, 74.5815,
+     ["sangli", "सांगली"], ["416416"]),
+    ("mh-kolhapur", "Kolhapur", "district", "Kolhapur", 16.7050, 74.2433,
+     ["kolhapur", "कोल्हापूर", "कोल्हापुर"], []),
+    ("mh-solapur", "Solapur", "district", "Solapur", 17.6599, 75.9064,
+     ["solapur", "sholapur", "सोलापूर", "सोलापुर"], []),
+    # North Maharashtra
+    ("mh-nashik", "Nashik", "district", "Nashik", 19.9975, 73.7898,
+     ["nashik", "nasik", "नाशिक", "नासिक"], []),
+    ("mh-nashik-malegaon", "Malegaon", "city", "Nashik", 20.5537, 74.5288,
+     ["malegaon", "मालेगाव"], ["423203"]),
+    ("mh-ahmednagar", "Ahmednagar", "district", "Ahmednagar", 19.0948, 74.7480,
+     ["ahmednagar", "ahmadnagar", "ahilyanagar", "अहमदनगर"], []),
+    ("mh-jalgaon", "Jalgaon", "district", "Jalgaon", 21.0077, 75.5626,
+     ["jalgaon", "जळगाव"], []),
+    ("mh-dhule", "Dhule", "district", "Dhule", 20.9042, 74.7749,
+     ["dhule", "dhulia", "धुळे"], []),
+    ("mh-nandurbar", "Nandurbar", "district", "Nandurbar", 21.3700, 74.2400,
+     ["nandurbar", "नंदुरबार"], []),
+    # Marathwada
+    ("mh-aurangabad", "Aurangabad", "district", "Aurangabad", 19.8762, 75.3433,
+     ["aurangabad", "sambhajinagar", "chhatrapati sambhajinagar", "औरंगाबाद", "संभाजीनगर"], []),
+    ("mh-jalna", "Jalna", "district", "Jalna", 19.8347, 75.8816,
+     ["jalna", "जालना"], []),
+    ("mh-beed", "Beed", "district", "Beed", 18.9891, 75.7601,
+     ["beed", "बीड"], []),
+    ("mh-latur", "Latur", "district", "Latur", 18.4088, 76.5604,
+     ["latur", "लातूर"], []),
+    ("mh-osmanabad", "Osmanabad", "district", "Osmanabad", 18.1860, 76.0419,
+     ["osmanabad", "dharashiv", "उस्मानाबाद", "धाराशिव"], []),
+    ("mh-nanded", "Nanded", "district", "Nanded", 19.1383, 77.3210,
+     ["nanded", "नांदेड"], []),
+    ("mh-parbhani", "Parbhani", "district", "Parbhani", 19.2608, 76.7748,
+     ["parbhani", "परभणी"], []),
+    ("mh-hingoli", "Hingoli", "district", "Hingoli", 19.7173, 77.1494,
+     ["hingoli", "हिंगोली"], []),
+    # Vidarbha
+    ("mh-nagpur", "Nagpur", "district", "Nagpur", 21.1458, 79.0882,
+     ["nagpur", "नागपूर", "नागपुर"], []),
+    ("mh-wardha", "Wardha", "district", "Wardha", 20.7453, 78.6022,
+     ["wardha", "वर्धा"], []),
+    ("mh-amravati", "Amravati", "district", "Amravati", 20.9374, 77.7796,
+     ["amravati", "अमरावती"], []),
+    ("mh-akola", "Akola", "district", "Akola", 20.7002, 77.0082,
+     ["akola", "अकोला"], []),
+    ("mh-washim", "Washim", "district", "Washim", 20.1120, 77.1330,
+     ["washim", "वाशिम"], []),
+    ("mh-buldhana", "Buldhana", "district", "Buldhana", 20.5293, 76.1842,
+     ["buldhana", "buldana", "बुलढाणा"], []),
+    ("mh-yavatmal", "Yavatmal", "district", "Yavatmal", 20.3888, 78.1204,
+     ["yavatmal", "yeotmal", "यवतमाळ"], []),
+    ("mh-chandrapur", "Chandrapur", "district", "Chandrapur", 19.9615, 79.2961,
+     ["chandrapur", "चंद्रपूर"], []),
+    ("mh-bhandara", "Bhandara", "district", "Bhandara", 21.1777, 79.6570,
+     ["bhandara", "भंडारा"], []),
+    ("mh-gondia", "Gondia", "district", "Gondia", 21.4624, 80.1920,
+     ["gondia", "gondiya", "गोंदिया"], []),
+    ("mh-gadchiroli", "Gadchiroli", "district", "Gadchiroli", 20.1809, 80.0000,
+     ["gadchiroli", "गडचिरोली"], []),
+]
+
+# Fallback for pincodes not listed on an entry: first three digits → entry ID
+PINCODE_PREFIXES: Dict[str, str] = {
+    "400": "mh-mumbai", "401": "mh-palghar", "402": "mh-raigad", "410": "mh-raigad",
+    "411": "mh-pune", "412": "mh-pune", "413": "mh-solapur", "414": "mh-ahmednagar",
+    "415": "mh-satara", "416": "mh-kolhapur", "421": "mh-thane", "422": "mh-nashik",
+    "423": "mh-nashik", "424": "mh-dhule", "425": "mh-jalgaon", "431": "mh-aurangabad",
+    "440": "mh-nagpur", "441": "mh-nagpur", "442": "mh-chandrapur", "443": "mh-buldhana",
+    "444": "mh-amravati", "445": "mh-yavatmal",
+}
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_PINCODE = re.compile(r"\b([1-9]\d{5})\b")
+_DIRECTIONS = re.compile(r"\((?:e|w|n|s|east|west|north|south)\)|\b(?:east|west|north|south)\b")
+_NOISE_WORDS = re.compile(
+    r"\b(?:city|district|dist|taluka|tal|tehsil|near|area|maharashtra|india|mh)\b"
+)
+_SEPARATORS = re.compile(r"[\s_\-/,.;:()\[\]]+")
+
+
+class ResolvedLocation(BaseModel):
+    """A gazetteer entry matched from free-text location input"""
+
+    model_config = ConfigDict(frozen=True)
+
+    location_id: str
+    name: str
+    kind: str
+    district: str
+    lat: float
+    lon: float
+    geohash: str
+    pincode: Optional[str] = None
+    match: str
+    score: float = 1.0
+
+
+def encode_geohash(lat: float, lon: float, precision: int = 7) -> str:
+    """Standard base32 geohash"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    bits, bit_count, even = 0, 0, True
+    chars = []
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def _normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFC", str(text)).casefold()
+    text = _DIRECTIONS.sub(" ", text)
+    text = _NOISE_WORDS.sub(" ", text)
+    return _SEPARATORS.sub(" ", text).strip()
+
+
+class _Gazetteer:
+    """Alias, pincode and coordinate indexes over the gazetteer entries"""
+
+    def __init__(self):
+        self.entries: Dict[str, dict] = {}
+        self.aliases: Dict[str, str] = {}
+        self.pincodes: Dict[str, str] = {}
+
+        rows = list(GAZETTEER)
+        rows.extend(self._load_extra())
+        for location_id, name, kind, district, lat, lon, aliases, pincodes in rows:
+            self.entries[location_id] = {
+                "location_id": location_id,
+                "name": name,
+                "kind": kind,
+                "district": district,
+                "lat": lat,
+                "lon": lon,
+                "geohash": encode_geohash(lat, lon),
+            }
+            for alias in [name, *aliases]:
+                key = _normalize_text(alias)
+                if key:
+                    self.aliases.setdefault(key, location_id)
+            for pincode in pincodes:
+                self.pincodes[pincode] = location_id
+
+        self.alias_keys = list(self.aliases)
+        self.max_alias_words = max(len(k.split()) for k in self.alias_keys)
+
+    @staticmethod
+    def _load_extra() -> List[tuple]:
+        """Optional extra entries from DATA_DIR/gazetteer.json (same fields as GAZETTEER)"""
+        path = settings.DATA_DIR / "gazetteer.json"
+        if not path.exists():
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return [
+                    (e["id"], e["name"], e.get("kind", "area"), e.get("district", e["name"]),
+                     float(e["lat"]), float(e["lon"]), e.get("aliases", []), e.get("pincodes", []))
+                    for e in json.load(f)
+                ]
+        except Exception as e:
+            log.error(f"❌ Could not load gazetteer extras from {path}: {e}")
+            return []
+
+    def result(self, location_id: str, match: str, score: float = 1.0,
+               pincode: Optional[str] = None) -> ResolvedLocation:
+        return ResolvedLocation(**self.entries[location_id], match=match, score=score, pincode=pincode)
+
+
+_gazetteer = _Gazetteer()
+
+
+_KIND_RANK = {"area": 0, "city": 1, "district": 2}
+
+
+def _best_token_match(tokens: List[str]) -> Optional[str]:
+    """
+    Pick among every alias phrase found in the tokens. A district or city
+    named anywhere in the text wins over a neighbourhood that belongs
+    elsewhere ("Andheri ... Pune" → Pune); among consistent matches the
+    most specific place wins, then the longest phrase, then the leftmost.
+    """
+    matches = []
+    for size in range(min(len(tokens), _gazetteer.max_alias_words), 0, -1):
+        for start in range(len(tokens) - size + 1):
+            location_id = _gazetteer.aliases.get(" ".join(tokens[start:start + size]))
+            if location_id:
+                matches.append((location_id, size, start))
+    if not matches:
+        return None
+
+    entries = _gazetteer.entries
+    regions = {entries[m[0]]["district"] for m in matches if entries[m[0]]["kind"] != "area"}
+    if regions:
+        matches = [m for m in matches if entries[m[0]]["kind"] != "area" or entries[m[0]]["district"] in regions]
+    best = min(matches, key=lambda m: (_KIND_RANK.get(entries[m[0]]["kind"], 0), -m[1], m[2]))
+    return best[0]
+
+
+@lru_cache(maxsize=4096)
+def resolve_location(text: Optional[str]) -> Optional[ResolvedLocation]:
+    """
+    Resolve free-text location input to a gazetteer entry.
+
+    Tries, in order: a 6-digit pincode, an exact alias, alias phrases
+    contained in the text, and finally a fuzzy match for typos. Returns None
+    when nothing matches confidently.
+    """
+    if not text or not str(text).strip():
+        return None
+
+    pin = _PINCODE.search(str(text))
+    if pin:
+        code = pin.group(1)
+        location_id = _gazetteer.pincodes.get(code) or PINCODE_PREFIXES.get(code[:3])
+        if location_id:
+            return _gazetteer.result(location_id, "pincode", pincode=code)
+
+    normalized = _normalize_text(text)
+    if not normalized or normalized == "unknown":
+        return None
+
+    location_id = _gazetteer.aliases.get(normalized)
+    if location_id:
+        return _gazetteer.result(location_id, "exact")
+
+    # Alias phrases inside the text ("near andheri station" → Andheri)
+    tokens = normalized.split()
+    location_id = _best_token_match(tokens)
+    if location_id:
+        return _gazetteer.result(location_id, "token", score=0.95)
+
+    candidates = [normalized] + [t for t in tokens if len(t) >= 4]
+    for candidate in candidates:
+        close = difflib.get_close_matches(candidate, _gazetteer.alias_keys, n=1, cutoff=0.82)
+        if close:
+            score = difflib.SequenceMatcher(None, candidate, close[0]).ratio()
+            return _gazetteer.result(_gazetteer.aliases[close[0]], "fuzzy", score=round(score, 2))
+
+    return None
+
+
+def canonical_location_name(text: Optional[str]) -> str:
+    """Canonical name for grouping; unresolved input is kept as trimmed text"""
+    resolved = resolve_location(text)
+    if resolved:
+        return resolved.name
+    return (str(text).strip() if text else "") or "Unknown"
+
+
+def location_fields(text: Optional[str]) -> Dict[str, Optional[str]]:
+    """Fields stored on a health record for raw location input"""
+    resolved = resolve_location(text)
+    raw = (str(text).strip() if text else "") or "Unknown"
+    if not resolved:
+        return {"location": raw, "location_raw": raw, "location_id": None, "district": None, "geohash": None}
+    return {
+        "location": resolved.name,
+        "location_raw": raw,
+        "location_id": resolved.location_id,
+        "district": resolved.district,
+        "geohash": resolved.geohash,
+    }
+
+
+def location_query(location: str) -> Dict:
+    """Mongo filter matching a location by canonical name or its legacy raw spelling"""
+    return {"$in": list({canonical_location_name(location), location})}
+
+
+def record_location_name(record: Dict) -> str:
+    """Grouping key for a health record, resolving records written before normalization"""
+    if record.get("location_id"):
+        return record.get("location") or "Unknown"
+    return canonical_location_name(record.get("location"))
+
+
+def location_geohash(name: str) -> Optional[str]:
+    """Geohash for a canonical location name"""
+    resolved = resolve_location(name)
+    return resolved.geohash if resolved else None
+
+
+def gazetteer_adjacency(radius_km: float = 25.0, min_neighbours: int = 3) -> Dict[str, List[str]]:
+    """
+    Neighbour table derived from gazetteer coordinates: every place within
+    `radius_km`, topped up with the nearest places so no entry is isolated.
+    """
+    entries = list(_gazetteer.entries.values())
+    adjacency: Dict[str, List[str]] = {}
+    for entry in entries:
+        distances = sorted(
+            (haversine_km(entry["lat"], entry["lon"], other["lat"], other["lon"]), other["name"])
+            for other in entries
+            if other is not entry
+        )
+        neighbours = [name for d, name in distances if d <= radius_km]
+        if len(neighbours) < min_neighbours:
+            neighbours = [name for _, name in distances[:min_neighbours]]
+        adjacency[entry["name"]] = neighbours
+    return adjacency
@@ -0,0 +1,84 @@
+# utils/metrics.py
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class LatencyRecorder:
+    """
+    Call counts, errors and latency percentiles over a bounded window of
+    recent samples. Thread-safe; cheap enough to record every call.
+    """
+
+    def __init__(self, name: str, window: int = 2048):
+        self.name = name
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.counters: Dict[str, int] = {"retries": 0}
+
+    def record(self, seconds: float, ok: bool = True) -> None:
+        with self._lock:
+            self.calls += 1
+            if not ok:
+                self.errors += 1
+            self._samples.append(seconds)
+
+    def incr(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    @contextmanager
+    def time(self):
+        """Time a block; exceptions are recorded as errors and re-raised"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(time.perf_counter() - start, ok=False)
+            raise
+        self.record(time.perf_counter() - start)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            snapshot = {
+                "calls": self.calls,
+                "errors": self.errors,
+                **self.counters,
+            }
+
+        def percentile(p: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+        snapshot.update({
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(samples[-1] * 1000, 2) if samples else None,
+        })
+        return snapshot
+
+
+_recorders: Dict[str, LatencyRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def get_recorder(name: str) -> LatencyRecorder:
+    """Process-wide recorder for `name`, created on first use"""
+    with _recorders_lock:
+        recorder = _recorders.get(name)
+        if recorder is None:
+            recorder = _recorders[name] = LatencyRecorder(name)
+        return recorder
+
+
+def metrics_snapshot() -> Dict[str, Dict]:
+    with _recorders_lock:
+        recorders = list(_recorders.values())
+    return {recorder.name: recorder.snapshot() for recorder in recorders}
@@ -0,0 +1,296 @@
+# utils/symptoms.py
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bump when IDs are added or reassigned so stored aggregates get rebuilt
+VOCABULARY_VERSION = 2
+
+# (id, canonical name, group, synonyms in en / hi / mr incl. romanized forms)
+# IDs are stored in health records - never reuse or renumber them.
+SYMPTOM_VOCABULARY: List[Tuple[int, str, str, List[str]]] = [
+    (1, "fever", "constitutional", [
+        "fever", "high fever", "mild fever", "feverish", "temperature", "pyrexia",
+        "bukhar", "bukhaar", "बुखार", "ज्वर", "jwar", "ताप", "taap",
+    ]),
+    (2, "cough", "respiratory", [
+        "cough", "coughing", "dry cough", "wet cough", "khansi", "khaansi",
+        "खांसी", "खाँसी", "खोकला", "khokla",
+    ]),
+    (3, "breathing difficulty", "respiratory", [
+        "breathing difficulty", "difficulty breathing", "difficulty in breathing",
+        "shortness of breath", "short of breath", "breathlessness", "breathless",
+        "trouble breathing", "breathing problem", "dyspnea", "saans phoolna",
+        "saans lene mein takleef", "सांस फूलना", "साँस फूलना", "सांस लेने में तकलीफ",
+        "दम लागणे", "श्वास घेण्यास त्रास", "dham lagna",
+    ]),
+    (4, "sore throat", "respiratory", [
+        "sore throat", "throat pain", "throat irritation", "gala kharab", "gale mein dard",
+        "गले में खराश", "गले में दर्द", "घसा खवखवणे", "घसा दुखणे", "ghasa dukhne",
+    ]),
+    (5, "runny nose", "respiratory", [
+        "runny nose", "running nose", "blocked nose", "nasal congestion", "common cold",
+        "cold", "zukam", "jukam", "जुकाम", "सर्दी", "sardi", "सर्दी-खोकला", "नाक वाहणे",
+    ]),
+    (6, "sneezing", "respiratory", [
+        "sneezing", "sneeze", "chheenk", "छींक", "शिंका", "shinka",
+    ]),
+    (7, "loss of taste or smell", "respiratory", [
+        "loss of taste", "loss of smell", "anosmia", "no taste", "no smell",
+        "स्वाद नहीं", "गंध नहीं", "चव नाही", "वास येत नाही",
+    ]),
+    (8, "chest pain", "respiratory", [
+        "chest pain", "chest tightness", "seene mein dard", "सीने में दर्द",
+        "छाती में दर्द", "छातीत दुखणे",
+    ]),
+    (9, "headache", "constitutional", [
+        "headache", "head ache", "head pain", "migraine", "sir dard", "sar dard",
+        "सिरदर्द", "सिर दर्द", "डोकेदुखी", "डोके दुखणे", "dokedukhi",
+    ]),
+    (10, "body ache", "constitutional", [
+        "body ache", "body aches", "body pain", "muscle pain", "myalgia", "badan dard",
+        "बदन दर्द", "शरीर दर्द", "अंगदुखी", "angdukhi",
+    ]),
+    (11, "joint pain", "vector-borne", [
+        "joint pain", "joint pains", "arthralgia", "jodon mein dard", "जोड़ों में दर्द",
+        "जोडों में दर्द", "सांधेदुखी", "sandhedukhi",
+    ]),
+    (12, "fatigue", "constitutional", [
+        "fatigue", "tiredness", "tired", "weakness", "exhaustion", "lethargy",
+        "kamzori", "कमजोरी", "कमज़ोरी", "थकान", "thakan", "थकवा", "अशक्तपणा",
+    ]),
+    (13, "chills", "constitutional", [
+        "chills", "shivering", "rigors", "kapkapi", "कंपकंपी", "ठंड लगना",
+        "थंडी वाजणे", "हुडहुडी",
+    ]),
+    (14, "nausea", "gastrointestinal", [
+        "nausea", "nauseous", "queasy", "ji machlana", "जी मिचलाना", "मितली", "मळमळ", "malmal",
+    ]),
+    (15, "vomiting", "gastrointestinal", [
+        "vomiting", "vomit", "vomits", "throwing up", "ulti", "उल्टी", "उलटी", "ओकारी",
+    ]),
+    (16, "diarrhea", "gastrointestinal", [
+        "diarrhea", "diarrhoea", "loose motion", "loose motions", "loose stools",
+        "dast", "दस्त", "जुलाब", "julab", "अतिसार",
+    ]),
+    (17, "abdominal pain", "gastrointestinal", [
+        "abdominal pain", "stomach pain", "stomach ache", "stomachache", "belly pain",
+        "pet dard", "पेट दर्द", "पेट में दर्द", "पोटदुखी", "पोट दुखणे", "potdukhi",
+    ]),
+    (18, "loss of appetite", "gastrointestinal", [
+        "loss of appetite", "no appetite", "poor appetite", "bhookh nahi",
+        "भूख न लगना", "भूख नहीं", "भूक न लागणे", "भूक नाही",
+    ]),
+    (19, "dehydration", "gastrointestinal", [
+        "dehydration", "dehydrated", "पानी की कमी", "निर्जलीकरण",
+    ]),
+    (20, "rash", "vector-borne", [
+        "rash", "skin rash", "red spots", "rashes", "chakatte", "चकत्ते", "दाने",
+        "पुरळ", "pural",
+    ]),
+    (21, "red eyes", "vector-borne", [
+        "red eyes", "eye redness", "conjunctivitis", "pink eye", "आंखें लाल",
+        "आँखें लाल", "डोळे लाल",
+    ]),
+    (22, "bleeding", "vector-borne", [
+        "bleeding", "nosebleed", "nose bleed", "bleeding gums", "खून आना", "रक्तस्राव",
+        "रक्तस्त्राव",
+    ]),
+    (23, "jaundice", "hepatic", [
+        "jaundice", "yellow eyes", "yellow skin", "piliya", "पीलिया", "कावीळ", "kavil",
+    ]),
+    (24, "dizziness", "neurological", [
+        "dizziness", "dizzy", "vertigo", "lightheaded", "chakkar", "चक्कर",
+        "चक्कर आना", "चक्कर येणे",
+    ]),
+    (25, "seizure", "neurological", [
+        "seizure", "seizures", "convulsion", "convulsions", "fits", "दौरा", "झटके",
+        "फिट्स", "आकडी",
+    ]),
+    (26, "unconsciousness", "neurological", [
+        "unconscious", "unconsciousness", "fainting", "fainted", "passed out",
+        "बेहोशी", "बेहोश", "बेशुद्ध",
+    ]),
+    # Reported symptoms the vocabulary does not cover; never matched from text
+    (27, "other", "unmapped", []),
+]
+
+OTHER_SYMPTOM_ID = 27
+
+SYMPTOM_NAMES: Dict[int, str] = {sid: name for sid, name, _, _ in SYMPTOM_VOCABULARY}
+SYMPTOM_IDS: Dict[str, int] = {name: sid for sid, name, _, _ in SYMPTOM_VOCABULARY}
+SYMPTOM_GROUPS: Dict[int, str] = {sid: group for sid, _, group, _ in SYMPTOM_VOCABULARY}
+
+_SEPARATORS = re.compile(r"[\s_\-/,.;:()\[\]]+")
+
+# Negation before a symptom ("no fever", "without cough", "बिना बुखार") or
+# right after it ("bukhar nahi", "खांसी नहीं"); the scope before a symptom
+# ends at the previous symptom, except across "or" ("no fever or cough")
+_NEGATIONS_BEFORE = {"no", "not", "without", "never", "denies", "denied", "bina", "बिना"}
+_NEGATIONS_AFTER = {"nahi", "nahin", "नहीं", "नही", "नाही", "नको"}
+_NEGATION_CONTINUES = {"or", "nor", "ya", "या", "किंवा"}
+_NEGATION_LOOKBACK = 3
+
+
+def _normalize_text(text: str) -> str:
+    """Casefold, NFC-normalize and collapse separators to single spaces"""
+    text = unicodedata.normalize("NFC", str(text)).casefold()
+    return " " + _SEPARATORS.sub(" ", text).strip() + " "
+
+
+def _is_word_char(ch: str) -> bool:
+    # Devanagari vowel signs are combining marks, not alphanumerics
+    return ch.isalnum() or unicodedata.category(ch).startswith("M")
+
+
+class _AhoCorasick:
+    """Aho-Corasick automaton over synonym phrases, mapping matches to IDs"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[int, int]]] = [[]]
+
+        for phrase, symptom_id in patterns:
+            state = 0
+            for ch in phrase:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = nxt
+            self.output[state].append((len(phrase), symptom_id))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """All (start, end, id) matches that sit on word boundaries"""
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for length, symptom_id in self.output[state]:
+                start, end = i - length + 1, i + 1
+                before = text[start - 1] if start > 0 else " "
+                after = text[end] if end < len(text) else " "
+                if not _is_word_char(before) and not _is_word_char(after):
+                    matches.append((start, end, symptom_id))
+        return matches
+
+
+def _build_matcher() -> _AhoCorasick:
+    patterns = []
+    for symptom_id, name, group, synonyms in SYMPTOM_VOCABULARY:
+        if group == "unmapped":
+            continue
+        for phrase in {name, *synonyms}:
+            normalized = _normalize_text(phrase).strip()
+            if normalized:
+                patterns.append((normalized, symptom_id))
+    return _AhoCorasick(patterns)
+
+
+_matcher = _build_matcher()
+
+
+@lru_cache(maxsize=4096)
+def _scan(text: str) -> Tuple[Tuple[int, ...], bool]:
+    """(affirmed symptom IDs in order of appearance, whether any mention was negated)"""
+    if not text:
+        return (), False
+    normalized = _normalize_text(text)
+    matches = _matcher.find(normalized)
+    matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+
+    ids: List[int] = []
+    covered_until, previous_end, previous_negated, any_negated = -1, 0, False, False
+    for start, end, symptom_id in matches:
+        if start < covered_until:
+            continue
+        covered_until = end
+        before = normalized[previous_end:start].split()
+        after = normalized[end:].split()[:1]
+        negated = (
+            any(w in _NEGATIONS_BEFORE for w in before[-_NEGATION_LOOKBACK:])
+            or bool(after and after[0] in _NEGATIONS_AFTER)
+            or (previous_negated and bool(before) and all(w in _NEGATION_CONTINUES for w in before))
+        )
+        previous_end, previous_negated = end, negated
+        if negated:
+            any_negated = True
+        elif symptom_id not in ids:
+            ids.append(symptom_id)
+    return tuple(ids), any_negated
+
+
+def match_symptoms(text: str) -> Tuple[int, ...]:
+    """
+    Canonical symptom IDs mentioned in free text, in order of appearance.
+    Overlapping matches resolve to the longest phrase ("high fever" over
+    "fever"), so each span of text maps to one symptom. Negated mentions
+    ("no fever", "khansi nahi") are left out.
+    """
+    return _scan(text)[0]
+
+
+def normalize_symptoms(symptoms: Iterable[str]) -> List[int]:
+    """
+    Unique canonical IDs for a list of raw symptom strings. Entries the
+    vocabulary does not recognise map to OTHER_SYMPTOM_ID so they still
+    count; entries that only negate a symptom map to nothing.
+    """
+    ids: List[int] = []
+    for symptom in symptoms or []:
+        text = str(symptom).strip()
+        if not text:
+            continue
+        matched, negated = _scan(text)
+        if not matched and not negated:
+            matched = (OTHER_SYMPTOM_ID,)
+        for symptom_id in matched:
+            if symptom_id not in ids:
+                ids.append(symptom_id)
+    return ids
+
+
+def symptom_name(symptom_id: int) -> Optional[str]:
+    return SYMPTOM_NAMES.get(symptom_id)
+
+
+def symptom_id(name: str) -> Optional[int]:
+    """ID for a canonical name or any synonym"""
+    canonical = SYMPTOM_IDS.get(str(name).strip().lower())
+    if canonical is not None:
+        return canonical
+    ids = match_symptoms(name)
+    return ids[0] if ids else None
+
+
+def query_symptom_ids(text: str) -> Tuple[int, ...]:
+    """IDs a symptom filter refers to: a canonical name (incl. "other") or free text"""
+    canonical = SYMPTOM_IDS.get(str(text).strip().lower())
+    return (canonical,) if canonical is not None else match_symptoms(text)
+
+
+def record_symptom_ids(record: Dict) -> List[int]:
+    """Symptom IDs stored on a health record, deriving them for older records"""
+    ids = record.get("symptom_ids")
+    if ids is not None:
+        return list(ids)
+    return normalize_symptoms(record.get("symptoms") or [])